@@ -2,10 +2,12 @@
 import asyncio
 import json
 import logging
+from uuid import uuid4
 
-from aiohttp import web
+from aiohttp import hdrs, web
 from aiohttp.web_exceptions import HTTPBadRequest
 import async_timeout
+import attr
 import voluptuous as vol
 
 from homeassistant.auth.permissions.const import POLICY_READ
@@ -32,8 +34,13 @@ from homeassistant.const import (
     __version__,
 )
 import homeassistant.core as ha
-from homeassistant.exceptions import ServiceNotFound, TemplateError, Unauthorized
-from homeassistant.helpers import template
+from homeassistant.exceptions import (
+    HomeAssistantError,
+    ServiceNotFound,
+    TemplateError,
+    Unauthorized,
+)
+from homeassistant.helpers import config_validation as cv, template
 from homeassistant.helpers.json import JSONEncoder
 from homeassistant.helpers.service import async_get_all_descriptions
 from homeassistant.helpers.state import AsyncTrackStates
@@ -46,9 +53,20 @@ ATTR_REQUIRES_API_PASSWORD = "requires_api_password"
 ATTR_VERSION = "version"
 
 DOMAIN = "api"
+DATA_EVENT_STREAM_HUB = "api_event_stream_hub"
 STREAM_PING_PAYLOAD = "ping"
 STREAM_PING_INTERVAL = 50  # seconds
 
+SERVICE_CALLS_SCHEMA = vol.Schema(
+    [
+        {
+            vol.Required("domain"): cv.string,
+            vol.Required("service"): cv.string,
+            vol.Optional("service_data"): dict,
+        }
+    ]
+)
+
 
 def setup(hass, config):
     """Register the API with the HTTP interface."""
@@ -83,6 +101,92 @@ class APIStatusView(HomeAssistantView):
         return self.json_message("API running.")
 
 
+def _stream_message(payload):
+    """Return a payload encoded as server-sent event."""
+    return f"data: {payload}\n\n".encode("UTF-8")
+
+
+@attr.s(slots=True)
+class EventStreamClient:
+    """Represent a client of the event stream."""
+
+    event_types = attr.ib(type=list)
+    entity_ids = attr.ib(type=set, default=None)
+    queue = attr.ib(type=asyncio.Queue, factory=asyncio.Queue)
+
+    def matches(self, event):
+        """Return if the client wants to receive an event."""
+        if self.entity_ids is None or event.event_type == EVENT_HOMEASSISTANT_STOP:
+            return True
+        return event.data.get("entity_id") in self.entity_ids
+
+
+class EventStreamHub:
+    """Forward events to the clients of the event stream.
+
+    The hub listens once per event type requested by any client and
+    serializes every event once for all clients that receive it.
+    """
+
+    def __init__(self, hass):
+        """Initialize the hub."""
+        self.hass = hass
+        self._clients = {}
+        self._unsubs = {}
+        self._last_event = None
+        self._last_payload = None
+
+    @ha.callback
+    def async_subscribe(self, client):
+        """Start forwarding the requested events to a client."""
+        for event_type in client.event_types:
+            clients = self._clients.setdefault(event_type, [])
+            if not clients:
+                self._unsubs[event_type] = self.hass.bus.async_listen(
+                    event_type, self._async_forward_factory(event_type)
+                )
+            clients.append(client)
+
+    @ha.callback
+    def async_unsubscribe(self, client):
+        """Stop forwarding events to a client."""
+        for event_type in client.event_types:
+            clients = self._clients[event_type]
+            clients.remove(client)
+            if not clients:
+                del self._clients[event_type]
+                self._unsubs.pop(event_type)()
+
+    def _async_forward_factory(self, event_type):
+        """Return a listener forwarding events to the clients of an event type."""
+
+        @ha.callback
+        def forward_events(event):
+            """Forward an event to the clients."""
+            if event.event_type == EVENT_TIME_CHANGED:
+                return
+
+            for client in self._clients.get(event_type, ()):
+                if not client.matches(event):
+                    continue
+
+                if event.event_type == EVENT_HOMEASSISTANT_STOP:
+                    client.queue.put_nowait(None)
+                    continue
+
+                _LOGGER.debug("STREAM %s FORWARDING %s", id(client), event)
+                client.queue.put_nowait(self._async_encode(event))
+
+        return forward_events
+
+    def _async_encode(self, event):
+        """Return the encoded event, shared by all clients."""
+        if event is not self._last_event:
+            self._last_payload = _stream_message(json.dumps(event, cls=JSONEncoder))
+            self._last_event = event
+        return self._last_payload
+
+
 class APIEventStream(HomeAssistantView):
     """View to handle EventStream requests."""
 
@@ -90,66 +194,66 @@ class APIEventStream(HomeAssistantView):
     name = "api:stream"
 
     async def get(self, request):
-        """Provide a streaming interface for the event bus."""
+        """Provide a streaming interface for the event bus.
+
+        The restrict query parameter limits the stream to a comma separated
+        list of event types, entity_id to events of a list of entities.
+        """
         if not request["hass_user"].is_admin:
             raise Unauthorized()
         hass = request.app["hass"]
-        stop_obj = object()
-        to_write = asyncio.Queue()
 
         restrict = request.query.get("restrict")
         if restrict:
-            restrict = restrict.split(",") + [EVENT_HOMEASSISTANT_STOP]
-
-        async def forward_events(event):
-            """Forward events to the open request."""
-            if event.event_type == EVENT_TIME_CHANGED:
-                return
-
-            if restrict and event.event_type not in restrict:
-                return
+            event_types = list(set(restrict.split(",") + [EVENT_HOMEASSISTANT_STOP]))
+        else:
+            event_types = [MATCH_ALL]
 
-            _LOGGER.debug("STREAM %s FORWARDING %s", id(stop_obj), event)
+        entity_ids = request.query.get("entity_id")
+        if entity_ids:
+            entity_ids = set(entity_ids.lower().split(","))
+        else:
+            entity_ids = None
 
-            if event.event_type == EVENT_HOMEASSISTANT_STOP:
-                data = stop_obj
-            else:
-                data = json.dumps(event, cls=JSONEncoder)
+        client = EventStreamClient(event_types, entity_ids)
+        to_write = client.queue
+        ping = _stream_message(STREAM_PING_PAYLOAD)
 
-            await to_write.put(data)
+        hub = hass.data.get(DATA_EVENT_STREAM_HUB)
+        if hub is None:
+            hub = hass.data[DATA_EVENT_STREAM_HUB] = EventStreamHub(hass)
 
         response = web.StreamResponse()
         response.content_type = "text/event-stream"
         await response.prepare(request)
 
-        unsub_stream = hass.bus.async_listen(MATCH_ALL, forward_events)
+        hub.async_subscribe(client)
 
         try:
-            _LOGGER.debug("STREAM %s ATTACHED", id(stop_obj))
+            _LOGGER.debug("STREAM %s ATTACHED", id(client))
 
             # Fire off one message so browsers fire open event right away
-            await to_write.put(STREAM_PING_PAYLOAD)
+            to_write.put_nowait(ping)
 
             while True:
                 try:
                     with async_timeout.timeout(STREAM_PING_INTERVAL):
                         payload = await to_write.get()
 
-                    if payload is stop_obj:
+                    if payload is None:
                         break
 
-                    msg = f"data: {payload}\n\n"
-                    _LOGGER.debug("STREAM %s WRITING %s", id(stop_obj), msg.strip())
-                    await response.write(msg.encode("UTF-8"))
+                    _LOGGER.debug("STREAM %s WRITING %s", id(client), payload.strip())
+                    await response.write(payload)
                 except asyncio.TimeoutError:
-                    await to_write.put(STREAM_PING_PAYLOAD)
+                    to_write.put_nowait(ping)
 
         except asyncio.CancelledError:
-            _LOGGER.debug("STREAM %s ABORT", id(stop_obj))
+            _LOGGER.debug("STREAM %s ABORT", id(client))
 
         finally:
-            _LOGGER.debug("STREAM %s RESPONSE CLOSED", id(stop_obj))
-            unsub_stream()
+            _LOGGER.debug("STREAM %s RESPONSE CLOSED", id(client))
+            hub.async_unsubscribe(client)
 
         return response
 
@@ -194,17 +298,39 @@ class APIStatesView(HomeAssistantView):
     url = URL_API_STATES
     name = "api:states"
 
+    def __init__(self):
+        """Initialize the states view."""
+        # Distinguishes the generations of the state machine between restarts
+        self._run_id = uuid4().hex[:8]
+
     @ha.callback
     def get(self, request):
-        """Get current states."""
+        """Get current states.
+
+        The entity_id query parameter limits the states to a comma separated
+        list of entities, the domain parameter to the entities of a domain.
+        """
+        hass = request.app["hass"]
         user = request["hass_user"]
+
+        etag = f'"{self._run_id}-{user.id}-{hass.states.generation}"'
+        if request.headers.get(hdrs.IF_NONE_MATCH) == etag:
+            return web.Response(status=304, headers={hdrs.ETAG: etag})
+
+        entity_ids = request.query.get("entity_id")
+        domain = request.query.get("domain")
+        if entity_ids:
+            states = filter(None, map(hass.states.get, entity_ids.split(",")))
+        elif domain:
+            states = map(hass.states.get, hass.states.async_entity_ids(domain))
+        else:
+            states = hass.states.async_all()
+
         entity_perm = user.permissions.check_entity
-        states = [
-            state
-            for state in request.app["hass"].states.async_all()
-            if entity_perm(state.entity_id, "read")
-        ]
-        return self.json(states)
+        states = [state for state in states if entity_perm(state.entity_id, "read")]
+        response = self.json(states)
+        response.headers[hdrs.ETAG] = etag
+        return response
 
 
 class APIEntityStateView(HomeAssistantView):
@@ -330,6 +456,39 @@ class APIServicesView(HomeAssistantView):
         services = await async_services_json(request.app["hass"])
         return self.json(services)
 
+    async def post(self, request):
+        """Call a list of services in order.
+
+        Returns the result of every call with the states it changed.
+        """
+        hass = request.app["hass"]
+        try:
+            calls = SERVICE_CALLS_SCHEMA(await request.json())
+        except ValueError:
+            return self.json_message("Data should be valid JSON.", HTTP_BAD_REQUEST)
+        except vol.Invalid as err:
+            return self.json_message(f"Invalid service calls: {err}", HTTP_BAD_REQUEST)
+
+        context = self.context(request)
+        results = []
+        for call in calls:
+            with AsyncTrackStates(hass) as changed_states:
+                try:
+                    await hass.services.async_call(
+                        call["domain"],
+                        call["service"],
+                        call.get("service_data"),
+                        True,
+                        context,
+                    )
+                except (vol.Invalid, HomeAssistantError) as err:
+                    results.append({"success": False, "error": str(err)})
+                    continue
+
+            results.append({"success": True, "changed_states": changed_states})
+
+        return self.json(results)
+
 
 class APIDomainServicesView(HomeAssistantView):
     """View to handle DomainServices requests."""
@@ -14,7 +14,7 @@ import attr
 import voluptuous as vol
 
 from homeassistant.components import websocket_api
-from homeassistant.components.http import KEY_AUTHENTICATED, HomeAssistantView
+from homeassistant.components.http import KEY_AUTHENTICATED, KEY_HASS, HomeAssistantView
 from homeassistant.components.media_player.const import (
     ATTR_MEDIA_CONTENT_ID,
     ATTR_MEDIA_CONTENT_TYPE,
@@ -49,7 +49,9 @@ from homeassistant.helpers.entity_component import EntityComponent
 from homeassistant.loader import bind_hass
 from homeassistant.setup import async_when_setup
 
-from .const import DATA_CAMERA_PREFS, DOMAIN
+from .const import DATA_CAMERA_PREFS, DATA_MJPEG_HUBS, DOMAIN
+from .image_cache import CameraImageCache
+from .mjpeg_hub import FRAME_BOUNDARY, MjpegStreamHub
 from .prefs import CameraPreferences
 
 # mypy: allow-untyped-calls, allow-untyped-defs
@@ -67,6 +69,7 @@ ENTITY_ID_FORMAT = DOMAIN + ".{}"
 ATTR_FILENAME = "filename"
 ATTR_MEDIA_PLAYER = "media_player"
 ATTR_FORMAT = "format"
+ATTR_WIDTH = "width"
 
 STATE_RECORDING = "recording"
 STATE_STREAMING = "streaming"
@@ -83,6 +86,7 @@ TOKEN_CHANGE_INTERVAL = timedelta(minutes=5)
 _RND = SystemRandom()
 
 MIN_STREAM_INTERVAL = 0.5  # seconds
+DEFAULT_IMAGE_CACHE_MAX_AGE = 0  # seconds
 
 CAMERA_SERVICE_SCHEMA = vol.Schema({vol.Optional(ATTR_ENTITY_ID): cv.comp_entity_ids})
 
@@ -110,6 +114,7 @@ SCHEMA_WS_CAMERA_THUMBNAIL = websocket_api.BASE_COMMAND_MESSAGE_SCHEMA.extend(
     {
         vol.Required("type"): WS_TYPE_CAMERA_THUMBNAIL,
         vol.Required("entity_id"): cv.entity_id,
+        vol.Optional(ATTR_WIDTH): vol.All(vol.Coerce(int), vol.Range(min=1)),
     }
 )
 
@@ -140,13 +145,13 @@ async def async_request_stream(hass, entity_id, fmt):
 
 
 @bind_hass
-async def async_get_image(hass, entity_id, timeout=10):
+async def async_get_image(hass, entity_id, timeout=10, width=None):
     """Fetch an image from a camera entity."""
     camera = _get_camera_from_entity_id(hass, entity_id)
 
     with suppress(asyncio.CancelledError, asyncio.TimeoutError):
         async with async_timeout.timeout(timeout):
-            image = await camera.async_camera_image()
+            image = await camera.async_cached_camera_image(width)
 
             if image:
                 return Image(camera.content_type, image)
@@ -167,40 +172,37 @@ async def async_get_still_stream(request, image_cb, content_type, interval):
 
     This method must be run in the event loop.
     """
+    hass = request.app[KEY_HASS]
+    hubs = hass.data.setdefault(DATA_MJPEG_HUBS, {})
+    key = (image_cb, content_type, interval)
+    hub = hubs.get(key)
+    if hub is None:
+        hub = hubs[key] = MjpegStreamHub(
+            hass, image_cb, content_type, interval, lambda: hubs.pop(key, None)
+        )
+
     response = web.StreamResponse()
-    response.content_type = "multipart/x-mixed-replace; boundary=--frameboundary"
+    response.content_type = f"multipart/x-mixed-replace; boundary=--{FRAME_BOUNDARY}"
     await response.prepare(request)
 
-    async def write_to_mjpeg_stream(img_bytes):
-        """Write image to stream."""
-        await response.write(
-            bytes(
-                "--frameboundary\r\n"
-                "Content-Type: {}\r\n"
-                "Content-Length: {}\r\n\r\n".format(content_type, len(img_bytes)),
-                "utf-8",
-            )
-            + img_bytes
-            + b"\r\n"
-        )
+    queue = hub.async_subscribe()
+    first_frame = True
 
-    last_image = None
-
-    while True:
-        img_bytes = await image_cb()
-        if not img_bytes:
-            break
+    try:
+        while True:
+            frame = await queue.get()
+            if frame is None:
+                break
 
-        if img_bytes != last_image:
-            await write_to_mjpeg_stream(img_bytes)
+            await response.write(frame)
 
             # Chrome seems to always ignore first picture,
             # print it twice.
-            if last_image is None:
-                await write_to_mjpeg_stream(img_bytes)
-            last_image = img_bytes
-
-        await asyncio.sleep(interval)
+            if first_frame:
+                await response.write(frame)
+                first_frame = False
+    finally:
+        hub.async_unsubscribe(queue)
 
     return response
 
@@ -309,6 +311,8 @@ async def async_unload_entry(hass, entry):
 class Camera(Entity):
     """The base class for camera entities."""
 
+    _image_cache = None
+
     def __init__(self):
         """Initialize a camera."""
         self.is_streaming = False
@@ -356,6 +360,23 @@ class Camera(Entity):
         """Return the interval between frames of the mjpeg stream."""
         return 0.5
 
+    @property
+    def image_cache_max_age(self):
+        """Return the number of seconds a fetched image may be reused."""
+        camera_prefs = self.hass.data.get(DATA_CAMERA_PREFS)
+        if camera_prefs is not None:
+            max_age = camera_prefs.get(self.entity_id).image_cache_max_age
+            if max_age is not None:
+                return max_age
+        return DEFAULT_IMAGE_CACHE_MAX_AGE
+
+    @property
+    def image_cache(self):
+        """Return the cache for images of this camera."""
+        if self._image_cache is None:
+            self._image_cache = CameraImageCache(self)
+        return self._image_cache
+
     async def stream_source(self):
         """Return the source of the stream."""
         return None
@@ -368,6 +389,10 @@ class Camera(Entity):
         """Return bytes of camera image."""
         return await self.hass.async_add_job(self.camera_image)
 
+    async def async_cached_camera_image(self, width=None):
+        """Return bytes of a recent camera image, shared between callers."""
+        return await self.image_cache.async_get_image(width)
+
     async def handle_async_still_stream(self, request, interval):
         """Generate an HTTP MJPEG stream from camera images."""
         return await async_get_still_stream(
@@ -497,9 +522,18 @@ class CameraImageView(CameraView):
 
     async def handle(self, request, camera):
         """Serve camera image."""
+        width = request.query.get(ATTR_WIDTH)
+        if width is not None:
+            try:
+                width = int(width)
+            except ValueError:
+                raise web.HTTPBadRequest()
+            if width < 1:
+                raise web.HTTPBadRequest()
+
         with suppress(asyncio.CancelledError, asyncio.TimeoutError):
             async with async_timeout.timeout(10):
-                image = await camera.async_camera_image()
+                image = await camera.async_cached_camera_image(width)
 
             if image:
                 return web.Response(body=image, content_type=camera.content_type)
@@ -536,7 +570,7 @@ async def websocket_camera_thumbnail(hass, connection, msg):
     Async friendly.
     """
     try:
-        image = await async_get_image(hass, msg["entity_id"])
+        image = await async_get_image(hass, msg["entity_id"], width=msg.get(ATTR_WIDTH))
         await connection.send_big_result(
             msg["id"],
             {
@@ -609,6 +643,9 @@ async def websocket_get_prefs(hass, connection, msg):
         vol.Required("type"): "camera/update_prefs",
         vol.Required("entity_id"): cv.entity_id,
         vol.Optional("preload_stream"): bool,
+        vol.Optional("image_cache_max_age"): vol.All(
+            vol.Coerce(float), vol.Range(min=0)
+        ),
     }
 )
 async def websocket_update_prefs(hass, connection, msg):
@@ -2,5 +2,7 @@
 DOMAIN = "camera"
 
 DATA_CAMERA_PREFS = "camera_prefs"
+DATA_MJPEG_HUBS = "camera_mjpeg_hubs"
 
 PREF_PRELOAD_STREAM = "preload_stream"
+PREF_IMAGE_CACHE_MAX_AGE = "image_cache_max_age"
@@ -0,0 +1,116 @@
+"""Shared image cache for camera entities."""
+import asyncio
+import io
+import logging
+
+# mypy: allow-untyped-defs, no-check-untyped-defs
+
+_LOGGER = logging.getLogger(__name__)
+
+RESIZE_FORMATS = ("JPEG", "PNG")
+
+
+def _resize_image(image, width):
+    """Scale an image down to the given width, keeping its format."""
+    try:
+        from PIL import Image
+    except ImportError:
+        _LOGGER.debug("Pillow is not installed, not resizing image")
+        return image
+
+    try:
+        img = Image.open(io.BytesIO(image))
+    except OSError:
+        _LOGGER.warning("Failed to open image for resizing")
+        return image
+
+    imgfmt = img.format
+    if imgfmt not in RESIZE_FORMATS:
+        _LOGGER.debug("Not resizing image of unsupported type: %s", imgfmt)
+        return image
+
+    old_width, old_height = img.size
+    if old_width <= width:
+        return image
+
+    height = max(1, int(old_height * width / old_width))
+    img = img.resize((width, height), Image.ANTIALIAS)
+    if imgfmt == "JPEG" and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+
+    imgbuf = io.BytesIO()
+    img.save(imgbuf, imgfmt)
+    return imgbuf.getvalue()
+
+
+class CameraImageCache:
+    """Cache the latest image of a camera.
+
+    Concurrent callers share a single in-flight fetch and images younger
+    than the max age of the camera are served without fetching again.
+    """
+
+    def __init__(self, camera):
+        """Initialize the image cache."""
+        self._camera = camera
+        self._image = None
+        self._fetched = None
+        self._resized = {}
+        self._fetch_task = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_age(self):
+        """Return how long a fetched image is served from the cache."""
+        return self._camera.image_cache_max_age
+
+    def _is_fresh(self):
+        """Return if the cached image can still be used."""
+        return (
+            self._image is not None
+            and self._camera.hass.loop.time() - self._fetched < self.max_age
+        )
+
+    async def async_get_image(self, width=None):
+        """Return a recent image of the camera, optionally scaled to a width."""
+        if self._is_fresh():
+            self.hits += 1
+            image = self._image
+        elif self._fetch_task is not None:
+            self.hits += 1
+            image = await asyncio.shield(self._fetch_task)
+        else:
+            self.misses += 1
+            self._fetch_task = self._camera.hass.async_create_task(self._async_fetch())
+            image = await asyncio.shield(self._fetch_task)
+
+        if not image or not width:
+            return image
+
+        resized = self._resized.get(width)
+        if resized is None or resized[0] is not image:
+            resized = (
+                image,
+                await self._camera.hass.async_add_executor_job(
+                    _resize_image, image, width
+                ),
+            )
+            if image is self._image:
+                self._resized[width] = resized
+
+        return resized[1]
+
+    async def _async_fetch(self):
+        """Fetch a new image from the camera."""
+        try:
+            image = await self._camera.async_camera_image()
+        finally:
+            self._fetch_task = None
+
+        if image:
+            self._image = image
+            self._fetched = self._camera.hass.loop.time()
+            self._resized = {}
+
+        return image
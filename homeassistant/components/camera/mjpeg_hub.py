@@ -0,0 +1,107 @@
+"""Share MJPEG streams composed from camera stills between clients."""
+import asyncio
+import logging
+
+# mypy: allow-untyped-defs, no-check-untyped-defs
+
+_LOGGER = logging.getLogger(__name__)
+
+FRAME_BOUNDARY = "frameboundary"
+
+
+def encode_frame(content_type, img_bytes):
+    """Encode an image as a part of a multipart MJPEG stream."""
+    return (
+        bytes(
+            f"--{FRAME_BOUNDARY}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(img_bytes)}\r\n\r\n",
+            "utf-8",
+        )
+        + img_bytes
+        + b"\r\n"
+    )
+
+
+class MjpegStreamHub:
+    """Poll images once and fan the frames out to all connected clients.
+
+    Every client has a queue that only holds the latest frame, so slow
+    readers skip frames instead of buffering them. Polling stops when the
+    last client disconnects.
+    """
+
+    def __init__(self, hass, image_cb, content_type, interval, on_stop=None):
+        """Initialize the stream hub."""
+        self.hass = hass
+        self._image_cb = image_cb
+        self._content_type = content_type
+        self._interval = interval
+        self._on_stop = on_stop
+        self._clients = []
+        self._last_frame = None
+        self._task = None
+
+    @property
+    def client_count(self):
+        """Return the number of connected clients."""
+        return len(self._clients)
+
+    def async_subscribe(self):
+        """Register a client and return the queue its frames arrive on."""
+        queue = asyncio.Queue(maxsize=1)
+        self._clients.append(queue)
+        if self._last_frame is not None:
+            queue.put_nowait(self._last_frame)
+        if self._task is None:
+            self._task = self.hass.loop.create_task(self._async_poll())
+        return queue
+
+    def async_unsubscribe(self, queue):
+        """Remove a client, stopping the hub when it was the last one."""
+        if queue not in self._clients:
+            return
+        self._clients.remove(queue)
+        if not self._clients:
+            self._async_stop()
+
+    def _async_stop(self):
+        """Stop polling images."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._on_stop is not None:
+            self._on_stop()
+
+    def _async_publish(self, frame):
+        """Hand a frame to every client, replacing frames not yet sent."""
+        for queue in self._clients:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(frame)
+
+    async def _async_poll(self):
+        """Fetch images until there are no more clients."""
+        last_image = None
+        try:
+            while self._clients:
+                img_bytes = await self._image_cb()
+                if not img_bytes:
+                    break
+
+                if img_bytes != last_image:
+                    self._last_frame = encode_frame(self._content_type, img_bytes)
+                    self._async_publish(self._last_frame)
+                    last_image = img_bytes
+
+                await asyncio.sleep(self._interval)
+        except asyncio.CancelledError:
+            return
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Error fetching image for MJPEG stream")
+
+        # Image source ended, let all clients finish their response
+        self._task = None
+        self._async_publish(None)
+        self._clients.clear()
+        self._async_stop()
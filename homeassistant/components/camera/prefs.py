@@ -1,5 +1,5 @@
 """Preference management for camera component."""
-from .const import DOMAIN, PREF_PRELOAD_STREAM
+from .const import DOMAIN, PREF_IMAGE_CACHE_MAX_AGE, PREF_PRELOAD_STREAM
 
 # mypy: allow-untyped-defs, no-check-untyped-defs
 
@@ -24,6 +24,11 @@ class CameraEntityPreferences:
         """Return if stream is loaded on hass start."""
         return self._prefs.get(PREF_PRELOAD_STREAM, False)
 
+    @property
+    def image_cache_max_age(self):
+        """Return how many seconds a camera image may be served from cache."""
+        return self._prefs.get(PREF_IMAGE_CACHE_MAX_AGE)
+
 
 class CameraPreferences:
     """Handle camera preferences."""
@@ -44,13 +49,21 @@ class CameraPreferences:
         self._prefs = prefs
 
     async def async_update(
-        self, entity_id, *, preload_stream=_UNDEF, stream_options=_UNDEF
+        self,
+        entity_id,
+        *,
+        preload_stream=_UNDEF,
+        stream_options=_UNDEF,
+        image_cache_max_age=_UNDEF,
     ):
         """Update camera preferences."""
         if not self._prefs.get(entity_id):
             self._prefs[entity_id] = {}
 
-        for key, value in ((PREF_PRELOAD_STREAM, preload_stream),):
+        for key, value in (
+            (PREF_PRELOAD_STREAM, preload_stream),
+            (PREF_IMAGE_CACHE_MAX_AGE, image_cache_max_age),
+        ):
             if value is not _UNDEF:
                 self._prefs[entity_id][key] = value
 
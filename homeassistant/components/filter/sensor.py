@@ -1,16 +1,15 @@
 """Allows the creation of a sensor that filters state property."""
+from bisect import bisect_left, insort
 from collections import Counter, deque
 from copy import copy
 from datetime import timedelta
-from functools import partial
 import logging
 from numbers import Number
-import statistics
 from typing import Optional
 
 import voluptuous as vol
 
-from homeassistant.components import history
+from homeassistant.components.recorder.preload import async_preload_states
 from homeassistant.components.sensor import PLATFORM_SCHEMA
 from homeassistant.const import (
     ATTR_ENTITY_ID,
@@ -177,7 +176,7 @@ class SensorFilter(Entity):
         """Register callbacks."""
 
         @callback
-        def filter_sensor_state_listener(entity, old_state, new_state, update_ha=True):
+        def filter_sensor_state_listener(entity, old_state, new_state):
             """Handle device state changes."""
             if new_state.state in [STATE_UNKNOWN, STATE_UNAVAILABLE]:
                 return
@@ -211,8 +210,7 @@ class SensorFilter(Entity):
                     ATTR_UNIT_OF_MEASUREMENT
                 )
 
-            if update_ha:
-                self.async_schedule_update_ha_state()
+            self.async_schedule_update_ha_state()
 
         if "recorder" in self.hass.config.components:
             history_list = []
@@ -232,52 +230,67 @@ class SensorFilter(Entity):
                 ):
                     largest_window_time = filt.window_size
 
-            # Retrieve the largest window_size of each type
-            if largest_window_items > 0:
-                filter_history = await self.hass.async_add_job(
-                    partial(
-                        history.get_last_state_changes,
-                        self.hass,
-                        largest_window_items,
-                        entity_id=self._entity,
-                    )
-                )
-                if self._entity in filter_history:
-                    history_list.extend(filter_history[self._entity])
+            # Retrieve the largest window_size of each type at once
+            start = None
             if largest_window_time > timedelta(seconds=0):
                 start = dt_util.utcnow() - largest_window_time
-                filter_history = await self.hass.async_add_job(
-                    partial(
-                        history.state_changes_during_period,
-                        self.hass,
-                        start,
-                        entity_id=self._entity,
-                    )
+            if largest_window_items > 0 or start is not None:
+                history_list = await async_preload_states(
+                    self.hass,
+                    self._entity,
+                    limit=largest_window_items or None,
+                    start_time=start,
+                    changes_only=True,
                 )
-                if self._entity in filter_history:
-                    history_list.extend(
-                        [
-                            state
-                            for state in filter_history[self._entity]
-                            if state not in history_list
-                        ]
-                    )
 
             # Sort the window states
             history_list = sorted(history_list, key=lambda s: s.last_updated)
-            _LOGGER.debug(
-                "Loading from history: %s",
-                [(s.state, s.last_updated) for s in history_list],
-            )
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug(
+                    "Loading from history: %s",
+                    [(s.state, s.last_updated) for s in history_list],
+                )
 
             # Replay history through the filter chain
-            prev_state = None
-            for state in history_list:
-                filter_sensor_state_listener(self._entity, prev_state, state, False)
-                prev_state = state
+            replayed = self._filter_states(history_list)
+            if replayed:
+                first_state = replayed[0][0]
+                self._state = replayed[-1][1].state
+                if self._icon is None:
+                    self._icon = first_state.attributes.get(ATTR_ICON, ICON)
+                if self._unit_of_measurement is None:
+                    self._unit_of_measurement = first_state.attributes.get(
+                        ATTR_UNIT_OF_MEASUREMENT
+                    )
 
         async_track_state_change(self.hass, self._entity, filter_sensor_state_listener)
 
+    def _filter_states(self, states):
+        """Run a batch of states through the filter chain, a filter at a time.
+
+        Returns (state, filtered_state) tuples of the states that made it
+        through all filters.
+        """
+        batch = [
+            (state, state)
+            for state in states
+            if state.state not in [STATE_UNKNOWN, STATE_UNAVAILABLE]
+        ]
+        for filt in self._filters:
+            filtered = []
+            for state, temp_state in batch:
+                try:
+                    filtered_state = filt.filter_state(copy(temp_state))
+                except ValueError:
+                    _LOGGER.error(
+                        "Could not convert state: %s to number", temp_state.state
+                    )
+                    continue
+                if not filt.skip_processing:
+                    filtered.append((state, filtered_state))
+            batch = filtered
+        return batch
+
     @property
     def name(self):
         """Return the name of the sensor."""
@@ -388,10 +401,7 @@ class Filter:
         """Implement a common interface for filters."""
         filtered = self._filter_state(FilterState(new_state))
         filtered.set_precision(self.precision)
-        if self._store_raw:
-            self.states.append(copy(FilterState(new_state)))
-        else:
-            self.states.append(copy(filtered))
+        self.states.append(FilterState(new_state) if self._store_raw else filtered)
         new_state.state = filtered.state
         return new_state
 
@@ -466,10 +476,23 @@ class OutlierFilter(Filter):
         self._radius = radius
         self._stats_internal = Counter()
         self._store_raw = True
+        # Values of self.states kept sorted for the rolling median
+        self._sorted = []
+
+    def _median(self):
+        """Return the median of the window."""
+        size = len(self._sorted)
+        if not size:
+            return 0
+        middle = size // 2
+        if size % 2:
+            return self._sorted[middle]
+        return (self._sorted[middle - 1] + self._sorted[middle]) / 2
 
     def _filter_state(self, new_state):
         """Implement the outlier filter."""
-        median = statistics.median([s.state for s in self.states]) if self.states else 0
+        raw = new_state.state
+        median = self._median()
         if (
             len(self.states) == self.states.maxlen
             and abs(new_state.state - median) > self._radius
@@ -484,6 +507,13 @@ class OutlierFilter(Filter):
                 new_state,
             )
             new_state.state = median
+
+        # The raw state joins the window after filtering
+        if len(self.states) == self.states.maxlen:
+            if not self.states:
+                return new_state
+            del self._sorted[bisect_left(self._sorted, self.states[0].state)]
+        insort(self._sorted, raw)
         return new_state
 
 
@@ -528,27 +558,37 @@ class TimeSMAFilter(Filter):
         self._time_window = window_size
         self.last_leak = None
         self.queue = deque()
+        # Time weighted sum of the queue from its first to its last state
+        self._queue_sum = 0
 
     def _leak(self, left_boundary):
         """Remove timeouted elements."""
         while self.queue:
             if self.queue[0].timestamp + self._time_window <= left_boundary:
                 self.last_leak = self.queue.popleft()
+                if self.queue:
+                    self._queue_sum -= (
+                        self.queue[0].timestamp - self.last_leak.timestamp
+                    ).total_seconds() * self.last_leak.state
+                else:
+                    self._queue_sum = 0
             else:
                 return
 
     def _filter_state(self, new_state):
         """Implement the Simple Moving Average filter."""
         self._leak(new_state.timestamp)
+        if self.queue:
+            self._queue_sum += (
+                new_state.timestamp - self.queue[-1].timestamp
+            ).total_seconds() * self.queue[-1].state
         self.queue.append(copy(new_state))
 
-        moving_sum = 0
         start = new_state.timestamp - self._time_window
         prev_state = self.last_leak or self.queue[0]
-        for state in self.queue:
-            moving_sum += (state.timestamp - start).total_seconds() * prev_state.state
-            start = state.timestamp
-            prev_state = state
+        moving_sum = (
+            self.queue[0].timestamp - start
+        ).total_seconds() * prev_state.state + self._queue_sum
 
         new_state.state = moving_sum / self._time_window.total_seconds()
 
@@ -5,13 +5,13 @@ from itertools import groupby
 import logging
 import time
 
-from sqlalchemy import and_, func
+from sqlalchemy import and_, case, func, literal
 import voluptuous as vol
 
 from homeassistant.components import recorder
 from homeassistant.components.http import HomeAssistantView
-from homeassistant.components.recorder.models import States
-from homeassistant.components.recorder.util import execute, session_scope
+from homeassistant.components.recorder.models import Entities, LazyState, States
+from homeassistant.components.recorder.util import execute, read_session_scope
 from homeassistant.const import (
     ATTR_HIDDEN,
     CONF_DOMAINS,
@@ -42,6 +42,9 @@ CONFIG_SCHEMA = vol.Schema(
 SIGNIFICANT_DOMAINS = ("thermostat", "climate", "water_heater")
 IGNORE_DOMAINS = ("zone", "scene")
 
+# Each first state adds two parameters, SQLite allows 999 of them
+MAX_FIRST_STATES_PER_QUERY = 400
+
 
 def get_significant_states(
     hass,
@@ -50,6 +53,8 @@ def get_significant_states(
     entity_ids=None,
     filters=None,
     include_start_time_state=True,
+    minimal_response=False,
+    attributes=None,
 ):
     """
     Return states changes during UTC period start_time - end_time.
@@ -57,15 +62,18 @@ def get_significant_states(
     Significant states are all states where there is a state change,
     as well as all states from certain domains (for instance
     thermostat so that we get current temperature in our graphs).
+
+    With minimal_response or a list of attributes, only the first state of
+    each entity is returned in full, see states_to_json.
     """
     timer_start = time.perf_counter()
 
-    with session_scope(hass=hass) as session:
-        query = session.query(States).filter(
-            (
-                States.domain.in_(SIGNIFICANT_DOMAINS)
-                | (States.last_changed == States.last_updated)
-            )
+    # A minimal response only returns the attributes of the first states
+    omit_attributes = minimal_response and not attributes
+
+    with read_session_scope(hass=hass) as session:
+        query = _query_states(session, omit_attributes).filter(
+            (States.domain.in_(SIGNIFICANT_DOMAINS) | States.last_changed.is_(None))
             & (States.last_updated > start_time)
         )
 
@@ -77,39 +85,45 @@ def get_significant_states(
 
         query = query.order_by(States.last_updated)
 
-        states = (
+        states = [
             state
-            for state in execute(query)
-            if (_is_significant(state) and not state.attributes.get(ATTR_HIDDEN, False))
-        )
+            for state in execute(query, lazy=True)
+            if _is_significant(state) and not _is_hidden(state)
+        ]
 
     if _LOGGER.isEnabledFor(logging.DEBUG):
         elapsed = time.perf_counter() - timer_start
         _LOGGER.debug("get_significant_states took %fs", elapsed)
 
     return states_to_json(
-        hass, states, start_time, entity_ids, filters, include_start_time_state
+        hass,
+        states,
+        start_time,
+        entity_ids,
+        filters,
+        include_start_time_state,
+        minimal_response,
+        attributes,
     )
 
 
 def state_changes_during_period(hass, start_time, end_time=None, entity_id=None):
     """Return states changes during UTC period start_time - end_time."""
 
-    with session_scope(hass=hass) as session:
-        query = session.query(States).filter(
-            (States.last_changed == States.last_updated)
-            & (States.last_updated > start_time)
+    with read_session_scope(hass=hass) as session:
+        query = _query_states(session).filter(
+            States.last_changed.is_(None) & (States.last_updated > start_time)
         )
 
         if end_time is not None:
             query = query.filter(States.last_updated < end_time)
 
         if entity_id is not None:
-            query = query.filter_by(entity_id=entity_id.lower())
+            query = query.filter(States.entity_id_in([entity_id.lower()]))
 
         entity_ids = [entity_id] if entity_id is not None else None
 
-        states = execute(query.order_by(States.last_updated))
+        states = execute(query.order_by(States.last_updated), lazy=True)
 
     return states_to_json(hass, states, start_time, entity_ids)
 
@@ -119,18 +133,17 @@ def get_last_state_changes(hass, number_of_states, entity_id):
 
     start_time = dt_util.utcnow()
 
-    with session_scope(hass=hass) as session:
-        query = session.query(States).filter(
-            (States.last_changed == States.last_updated)
-        )
+    with read_session_scope(hass=hass) as session:
+        query = _query_states(session).filter(States.last_changed.is_(None))
 
         if entity_id is not None:
-            query = query.filter_by(entity_id=entity_id.lower())
+            query = query.filter(States.entity_id_in([entity_id.lower()]))
 
         entity_ids = [entity_id] if entity_id is not None else None
 
         states = execute(
-            query.order_by(States.last_updated.desc()).limit(number_of_states)
+            query.order_by(States.last_updated.desc()).limit(number_of_states),
+            lazy=True,
         )
 
     return states_to_json(
@@ -148,8 +161,8 @@ def get_states(hass, utc_point_in_time, entity_ids=None, run=None, filters=None)
         if run is None:
             return []
 
-    with session_scope(hass=hass) as session:
-        query = session.query(States)
+    with read_session_scope(hass=hass) as session:
+        query = _query_states(session)
 
         if entity_ids and len(entity_ids) == 1:
             # Use an entirely different (and extremely fast) query if we only
@@ -158,7 +171,7 @@ def get_states(hass, utc_point_in_time, entity_ids=None, run=None, filters=None)
                 query.filter(
                     States.last_updated >= run.start,
                     States.last_updated < utc_point_in_time,
-                    States.entity_id.in_(entity_ids),
+                    States.entity_id_in(entity_ids),
                 )
                 .order_by(States.last_updated.desc())
                 .limit(1)
@@ -170,7 +183,7 @@ def get_states(hass, utc_point_in_time, entity_ids=None, run=None, filters=None)
             # last recorder run started.
 
             most_recent_states_by_date = session.query(
-                States.entity_id.label("max_entity_id"),
+                States.entity_row_id.label("max_entity_row_id"),
                 func.max(States.last_updated).label("max_last_updated"),
             ).filter(
                 (States.last_updated >= run.start)
@@ -178,10 +191,10 @@ def get_states(hass, utc_point_in_time, entity_ids=None, run=None, filters=None)
             )
 
             if entity_ids:
-                most_recent_states_by_date.filter(States.entity_id.in_(entity_ids))
+                most_recent_states_by_date.filter(States.entity_id_in(entity_ids))
 
             most_recent_states_by_date = most_recent_states_by_date.group_by(
-                States.entity_id
+                States.entity_row_id
             )
 
             most_recent_states_by_date = most_recent_states_by_date.subquery()
@@ -191,13 +204,14 @@ def get_states(hass, utc_point_in_time, entity_ids=None, run=None, filters=None)
             ).join(
                 most_recent_states_by_date,
                 and_(
-                    States.entity_id == most_recent_states_by_date.c.max_entity_id,
+                    States.entity_row_id
+                    == most_recent_states_by_date.c.max_entity_row_id,
                     States.last_updated
                     == most_recent_states_by_date.c.max_last_updated,
                 ),
             )
 
-            most_recent_state_ids = most_recent_state_ids.group_by(States.entity_id)
+            most_recent_state_ids = most_recent_state_ids.group_by(States.entity_row_id)
 
             most_recent_state_ids = most_recent_state_ids.subquery()
 
@@ -209,15 +223,18 @@ def get_states(hass, utc_point_in_time, entity_ids=None, run=None, filters=None)
             if filters:
                 query = filters.apply(query, entity_ids)
 
-        return [
-            state
-            for state in execute(query)
-            if not state.attributes.get(ATTR_HIDDEN, False)
-        ]
+        return [state for state in execute(query, lazy=True) if not _is_hidden(state)]
 
 
 def states_to_json(
-    hass, states, start_time, entity_ids, filters=None, include_start_time_state=True
+    hass,
+    states,
+    start_time,
+    entity_ids,
+    filters=None,
+    include_start_time_state=True,
+    minimal_response=False,
+    attributes=None,
 ):
     """Convert SQL results into JSON friendly data structure.
 
@@ -227,6 +244,11 @@ def states_to_json(
     We also need to go back and create a synthetic zero data point for
     each list of states, otherwise our graphs won't start on the Y
     axis correctly.
+
+    With minimal_response or a list of attributes, all but the first state
+    of each entity are returned as dicts with only the state, last_changed
+    and the requested attributes. A minimal response expects the states of
+    get_significant_states, which were queried without their attributes.
     """
     result = defaultdict(list)
     # Set all entity IDs to empty lists in result set to maintain the order
@@ -236,11 +258,13 @@ def states_to_json(
 
     # Get the states at the start time
     timer_start = time.perf_counter()
+    start_time_entity_ids = set()
     if include_start_time_state:
         for state in get_states(hass, start_time, entity_ids, filters=filters):
             state.last_changed = start_time
             state.last_updated = start_time
             result[state.entity_id].append(state)
+            start_time_entity_ids.add(state.entity_id)
 
     if _LOGGER.isEnabledFor(logging.DEBUG):
         elapsed = time.perf_counter() - timer_start
@@ -250,10 +274,49 @@ def states_to_json(
     for ent_id, group in groupby(states, lambda state: state.entity_id):
         result[ent_id].extend(group)
 
+    if minimal_response and not attributes:
+        # The states were queried without attributes, read them for the
+        # entities whose first state is not a state at the start time
+        _load_attributes(
+            hass,
+            [
+                ent_states[0]
+                for ent_id, ent_states in result.items()
+                if ent_states
+                and ent_id not in start_time_entity_ids
+                and isinstance(ent_states[0], LazyState)
+            ],
+        )
+
+    if minimal_response or attributes:
+        # States of an entity often share their attributes, parse them once
+        attributes_cache = {}
+        for ent_id, ent_states in result.items():
+            result[ent_id] = ent_states[:1] + [
+                _compact_state(state, attributes, attributes_cache)
+                for state in ent_states[1:]
+            ]
+
     # Filter out the empty lists if some states had 0 results.
     return {key: val for key, val in result.items() if val}
 
 
+def _compact_state(state, attributes, attributes_cache):
+    """Return the state and requested attributes of a state."""
+    compact = {"state": state.state, "last_changed": state.last_changed}
+    if attributes:
+        if not isinstance(state, LazyState):
+            state_attributes = state.attributes
+        elif any(state.attributes_may_contain(f'"{key}"') for key in attributes):
+            state_attributes = state.shared_attributes(attributes_cache)
+        else:
+            state_attributes = {}
+        compact["attributes"] = {
+            key: state_attributes[key] for key in attributes if key in state_attributes
+        }
+    return compact
+
+
 def get_state(hass, utc_point_in_time, entity_id, run=None):
     """Return a state at a specific point in time."""
     states = list(get_states(hass, utc_point_in_time, (entity_id,), run))
@@ -327,6 +390,10 @@ class HistoryPeriodView(HomeAssistantView):
         if entity_ids:
             entity_ids = entity_ids.lower().split(",")
         include_start_time_state = "skip_initial_state" not in request.query
+        minimal_response = "minimal_response" in request.query
+        attributes = request.query.get("attributes")
+        if attributes:
+            attributes = attributes.split(",")
 
         hass = request.app["hass"]
 
@@ -338,6 +405,8 @@ class HistoryPeriodView(HomeAssistantView):
             entity_ids,
             self.filters,
             include_start_time_state,
+            minimal_response,
+            attributes,
         )
         result = list(result.values())
         if _LOGGER.isEnabledFor(logging.DEBUG):
@@ -384,7 +453,7 @@ class Filters:
 
         # specific entities requested - do not in/exclude anything
         if entity_ids is not None:
-            return query.filter(States.entity_id.in_(entity_ids))
+            return query.filter(States.entity_id_in(entity_ids))
         query = query.filter(~States.domain.in_(IGNORE_DOMAINS))
 
         filter_query = None
@@ -392,19 +461,19 @@ class Filters:
         if self.excluded_domains and not self.included_domains:
             filter_query = ~States.domain.in_(self.excluded_domains)
             if self.included_entities:
-                filter_query &= States.entity_id.in_(self.included_entities)
+                filter_query &= States.entity_id_in(self.included_entities)
         # filter if only included domain is configured
         elif not self.excluded_domains and self.included_domains:
             filter_query = States.domain.in_(self.included_domains)
             if self.included_entities:
-                filter_query |= States.entity_id.in_(self.included_entities)
+                filter_query |= States.entity_id_in(self.included_entities)
         # filter if included and excluded domain is configured
         elif self.excluded_domains and self.included_domains:
             filter_query = ~States.domain.in_(self.excluded_domains)
             if self.included_entities:
                 filter_query &= States.domain.in_(
                     self.included_domains
-                ) | States.entity_id.in_(self.included_entities)
+                ) | States.entity_id_in(self.included_entities)
             else:
                 filter_query &= States.domain.in_(
                     self.included_domains
@@ -415,15 +484,80 @@ class Filters:
             and not self.included_domains
             and self.included_entities
         ):
-            filter_query = States.entity_id.in_(self.included_entities)
+            filter_query = States.entity_id_in(self.included_entities)
         if filter_query is not None:
             query = query.filter(filter_query)
         # finally apply excluded entities filter if configured
         if self.excluded_entities:
-            query = query.filter(~States.entity_id.in_(self.excluded_entities))
+            query = query.filter(~States.entity_id_in(self.excluded_entities))
         return query
 
 
+def _query_states(session, omit_attributes=False):
+    """Return a query of only the states columns that history hands out.
+
+    With omit_attributes, attributes are only read for the states that
+    _is_significant and _is_hidden need them for, the others get none.
+    """
+    attributes = States.attributes
+    if omit_attributes:
+        attributes = case(
+            [
+                (States.domain == "script", States.attributes),
+                (States.attributes.like(f'%"{ATTR_HIDDEN}"%'), States.attributes),
+            ],
+            else_=literal("{}"),
+        ).label("attributes")
+
+    return (
+        session.query(
+            Entities.entity_id,
+            States.state,
+            attributes,
+            States.last_changed,
+            States.last_updated,
+            States.context_id,
+            States.context_user_id,
+        )
+        .select_from(States)
+        .join(Entities, States.entity_row_id == Entities.entity_row_id)
+    )
+
+
+def _load_attributes(hass, states):
+    """Read the attributes of states that were queried without them.
+
+    A state is found again by its entity id and last updated time, so there
+    should be at most one state per entity.
+    """
+    if not states:
+        return
+
+    with read_session_scope(hass=hass) as session:
+        for offset in range(0, len(states), MAX_FIRST_STATES_PER_QUERY):
+            chunk = {
+                (state.entity_id, state.last_updated): state
+                for state in states[offset : offset + MAX_FIRST_STATES_PER_QUERY]
+            }
+            query = _query_states(session).filter(
+                Entities.entity_id.in_({entity_id for entity_id, _ in chunk})
+                & States.last_updated.in_({last_updated for _, last_updated in chunk})
+            )
+            for full_state in execute(query, lazy=True):
+                state = chunk.get((full_state.entity_id, full_state.last_updated))
+                if state is not None:
+                    state.attributes = full_state.attributes
+
+
+def _is_hidden(state):
+    """Test if a state is hidden, only parsing attributes that mention it."""
+    if isinstance(state, LazyState) and not state.attributes_may_contain(
+        f'"{ATTR_HIDDEN}"'
+    ):
+        return False
+    return state.attributes.get(ATTR_HIDDEN, False)
+
+
 def _is_significant(state):
     """Test if state is significant for history charts.
 
@@ -1,7 +1,9 @@
 """Component to make instant statistics about your history."""
+from collections import deque
 import datetime
 import logging
 import math
+import threading
 
 import voluptuous as vol
 
@@ -112,16 +114,36 @@ class HistoryStatsSensor(Entity):
         self.value = None
         self.count = None
 
+        # State changes since the start of the period as (timestamp, matches)
+        # tuples, kept up to date from the state machine once tracking starts
+        self._changes = deque()
+        self._changes_start = None
+        self._initial_state = False
+        self._changes_lock = threading.Lock()
+        self._tracking = False
+
         @callback
         def start_refresh(*args):
             """Register state tracking."""
 
             @callback
-            def force_refresh(*args):
-                """Force the component to refresh."""
+            def force_refresh(entity_id, old_state, new_state):
+                """Record the state change and refresh the component."""
+                if (
+                    new_state is not None
+                    and new_state.last_changed == new_state.last_updated
+                ):
+                    with self._changes_lock:
+                        self._changes.append(
+                            (
+                                new_state.last_changed.timestamp(),
+                                new_state.state == self._entity_state,
+                            )
+                        )
                 self.async_schedule_update_ha_state(True)
 
-            force_refresh()
+            self._tracking = True
+            self.async_schedule_update_ha_state(True)
             async_track_state_change(self.hass, self._entity_id, force_refresh)
 
         # Delay first refresh to keep startup fast
@@ -203,25 +225,33 @@ class HistoryStatsSensor(Entity):
             # Don't compute anything as the value cannot have changed
             return
 
-        # Get history between start and end
-        history_list = history.state_changes_during_period(
-            self.hass, start, end, str(self._entity_id)
-        )
+        if (
+            not self._tracking
+            or self._changes_start is None
+            or start_timestamp < self._changes_start
+        ):
+            # Window moved back or nothing loaded yet, read it from history
+            if not self._load_changes(start, start_timestamp):
+                return
+        else:
+            # Expire the changes that left the window
+            with self._changes_lock:
+                while self._changes and self._changes[0][0] <= start_timestamp:
+                    self._initial_state = self._changes.popleft()[1]
+                self._changes_start = start_timestamp
 
-        if self._entity_id not in history_list.keys():
-            return
+        with self._changes_lock:
+            changes = list(self._changes)
 
-        # Get the first state
-        last_state = history.get_state(self.hass, start, self._entity_id)
-        last_state = last_state is not None and last_state == self._entity_state
+        last_state = self._initial_state
         last_time = start_timestamp
         elapsed = 0
         count = 0
 
         # Make calculations
-        for item in history_list.get(self._entity_id):
-            current_state = item.state == self._entity_state
-            current_time = item.last_changed.timestamp()
+        for current_time, current_state in changes:
+            if current_time >= end.timestamp():
+                break
 
             if last_state:
                 elapsed += current_time - last_time
@@ -242,6 +272,32 @@ class HistoryStatsSensor(Entity):
         # Save counter
         self.count = count
 
+    def _load_changes(self, start, start_timestamp):
+        """Read the state changes since the start of the period from history."""
+        history_list = history.state_changes_during_period(
+            self.hass, start, None, str(self._entity_id)
+        )
+
+        if self._entity_id not in history_list.keys():
+            return False
+
+        initial_state = history.get_state(self.hass, start, self._entity_id)
+        changes = deque(
+            (item.last_changed.timestamp(), item.state == self._entity_state)
+            for item in history_list.get(self._entity_id)
+        )
+
+        with self._changes_lock:
+            # Keep changes that arrived while history was being read
+            last_time = changes[-1][0] if changes else start_timestamp
+            changes.extend(item for item in self._changes if item[0] > last_time)
+            self._changes = changes
+            self._changes_start = start_timestamp
+            self._initial_state = (
+                initial_state is not None and initial_state == self._entity_state
+            )
+        return True
+
     def update_period(self):
         """Parse the templates and store a datetime tuple in _period."""
         start = None
@@ -1,9 +1,9 @@
 """Ban logic for HTTP component."""
 from collections import defaultdict
 from datetime import datetime
-from ipaddress import ip_address
+from ipaddress import ip_address, ip_network
 import logging
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 from aiohttp.web import middleware
 from aiohttp.web_exceptions import HTTPForbidden, HTTPUnauthorized
@@ -22,6 +22,8 @@ from .const import KEY_REAL_IP
 _LOGGER = logging.getLogger(__name__)
 
 KEY_BANNED_IPS = "ha_banned_ips"
+KEY_PENDING_IP_BANS = "ha_pending_ip_bans"
+KEY_IP_BANS_WRITER = "ha_ip_bans_writer"
 KEY_FAILED_LOGIN_ATTEMPTS = "ha_failed_login_attempts"
 KEY_LOGIN_THRESHOLD = "ha_login_threshold"
 
@@ -42,11 +44,13 @@ def setup_bans(hass, app, login_threshold):
     app.middlewares.append(ban_middleware)
     app[KEY_FAILED_LOGIN_ATTEMPTS] = defaultdict(int)
     app[KEY_LOGIN_THRESHOLD] = login_threshold
+    app[KEY_PENDING_IP_BANS] = []
+    app[KEY_IP_BANS_WRITER] = None
 
     async def ban_startup(app):
         """Initialize bans when app starts up."""
-        app[KEY_BANNED_IPS] = await async_load_ip_bans_config(
-            hass, hass.config.path(IP_BANS_FILE)
+        app[KEY_BANNED_IPS] = IpBanList(
+            await async_load_ip_bans_config(hass, hass.config.path(IP_BANS_FILE))
         )
 
     app.on_startup.append(ban_startup)
@@ -60,12 +64,7 @@ async def ban_middleware(request, handler):
         return await handler(request)
 
     # Verify if IP is not banned
-    ip_address_ = request[KEY_REAL_IP]
-    is_banned = any(
-        ip_ban.ip_address == ip_address_ for ip_ban in request.app[KEY_BANNED_IPS]
-    )
-
-    if is_banned:
+    if request.app[KEY_BANNED_IPS].is_banned(request[KEY_REAL_IP]):
         raise HTTPForbidden()
 
     try:
@@ -117,11 +116,8 @@ async def process_wrong_login(request):
         >= request.app[KEY_LOGIN_THRESHOLD]
     ):
         new_ban = IpBan(remote_addr)
-        request.app[KEY_BANNED_IPS].append(new_ban)
-
-        await hass.async_add_job(
-            update_ip_bans_config, hass.config.path(IP_BANS_FILE), new_ban
-        )
+        request.app[KEY_BANNED_IPS].add(new_ban)
+        async_save_ip_ban(hass, request.app, new_ban)
 
         _LOGGER.warning("Banned IP %s for too many login attempts", remote_addr)
 
@@ -155,14 +151,97 @@ async def process_success_login(request):
         request.app[KEY_FAILED_LOGIN_ATTEMPTS].pop(remote_addr)
 
 
+@callback
+def async_save_ip_ban(hass, app, ip_ban):
+    """Queue a new ban to be appended to the ip bans file.
+
+    Bans queued while the file is being written are written together in
+    the next batch.
+    """
+    app[KEY_PENDING_IP_BANS].append(ip_ban)
+
+    writer = app[KEY_IP_BANS_WRITER]
+    if writer is None or writer.done():
+        app[KEY_IP_BANS_WRITER] = hass.async_create_task(
+            _async_write_ip_bans(hass, app)
+        )
+
+
+async def _async_write_ip_bans(hass, app):
+    """Write pending bans to the ip bans file in the executor."""
+    while app[KEY_PENDING_IP_BANS]:
+        ip_bans = app[KEY_PENDING_IP_BANS]
+        app[KEY_PENDING_IP_BANS] = []
+        await hass.async_add_executor_job(
+            update_ip_bans_config, hass.config.path(IP_BANS_FILE), ip_bans
+        )
+
+
 class IpBan:
-    """Represents banned IP address."""
+    """Represents banned IP address or network."""
 
     def __init__(self, ip_ban: str, banned_at: Optional[datetime] = None) -> None:
         """Initialize IP Ban object."""
-        self.ip_address = ip_address(ip_ban)
+        if "/" in str(ip_ban):
+            self.ip_address = None
+            self.ip_network = ip_network(ip_ban, strict=False)
+        else:
+            self.ip_address = ip_address(ip_ban)
+            self.ip_network = None
         self.banned_at = banned_at or datetime.utcnow()
 
+    def __str__(self) -> str:
+        """Return the banned address or network."""
+        return str(self.ip_network or self.ip_address)
+
+
+class IpBanList:
+    """Banned IP addresses and networks.
+
+    Addresses are kept in a set and networks in a set per IP version and
+    prefix length, so a lookup costs one set check per prefix length in use
+    instead of a scan over all bans.
+    """
+
+    def __init__(self, ip_bans: Iterable[IpBan] = ()) -> None:
+        """Initialize the ban list."""
+        self._ip_bans: List[IpBan] = []
+        self._addresses: Set = set()
+        self._networks: Dict[Tuple[int, int], Set] = {}
+        for ip_ban in ip_bans:
+            self.add(ip_ban)
+
+    def __len__(self) -> int:
+        """Return the number of bans."""
+        return len(self._ip_bans)
+
+    def __iter__(self) -> Iterator[IpBan]:
+        """Iterate over the bans."""
+        return iter(self._ip_bans)
+
+    def add(self, ip_ban: IpBan) -> None:
+        """Add a ban."""
+        self._ip_bans.append(ip_ban)
+        if ip_ban.ip_network is None:
+            self._addresses.add(ip_ban.ip_address)
+            return
+        network = ip_ban.ip_network
+        self._networks.setdefault((network.version, network.prefixlen), set()).add(
+            network
+        )
+
+    def is_banned(self, address) -> bool:
+        """Return if an address is banned."""
+        if address in self._addresses:
+            return True
+        for (version, prefixlen), networks in self._networks.items():
+            if (
+                address.version == version
+                and ip_network((address, prefixlen), strict=False) in networks
+            ):
+                return True
+        return False
+
 
 async def async_load_ip_bans_config(hass: HomeAssistant, path: str) -> List[IpBan]:
     """Load list of banned IPs from config file."""
@@ -187,13 +266,12 @@ async def async_load_ip_bans_config(hass: HomeAssistant, path: str) -> List[IpBa
     return ip_list
 
 
-def update_ip_bans_config(path: str, ip_ban: IpBan) -> None:
-    """Update config file with new banned IP address."""
+def update_ip_bans_config(path: str, ip_bans: List[IpBan]) -> None:
+    """Update config file with new banned IP addresses."""
+    ip_ = {
+        str(ip_ban): {ATTR_BANNED_AT: ip_ban.banned_at.strftime("%Y-%m-%dT%H:%M:%S")}
+        for ip_ban in ip_bans
+    }
     with open(path, "a") as out:
-        ip_ = {
-            str(ip_ban.ip_address): {
-                ATTR_BANNED_AT: ip_ban.banned_at.strftime("%Y-%m-%dT%H:%M:%S")
-            }
-        }
         out.write("\n")
         out.write(dump(ip_))
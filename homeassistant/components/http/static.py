@@ -1,22 +1,106 @@
 """Static file handling for HTTP component."""
+import asyncio
+from collections import OrderedDict
+import mimetypes
 from pathlib import Path
+import stat
+from time import monotonic
+from typing import Dict, Optional, Set
 
 from aiohttp import hdrs
-from aiohttp.web import FileResponse
+from aiohttp.web import FileResponse, Response
 from aiohttp.web_exceptions import HTTPForbidden, HTTPNotFound
 from aiohttp.web_urldispatcher import StaticResource
+import attr
 
 # mypy: allow-untyped-defs
 
 CACHE_TIME = 31 * 86400  # = 1 month
 CACHE_HEADERS = {hdrs.CACHE_CONTROL: f"public, max-age={CACHE_TIME}"}
 
+# How long a looked up file is served without checking the disk again
+FILE_CACHE_TIME = 60  # seconds
+# How many looked up files are kept, least recently requested are dropped first
+FILE_CACHE_SIZE = 256
+
+# Precompressed siblings, in order of preference
+PRECOMPRESSED_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+
+
+@attr.s(slots=True)
+class CachedFile:
+    """Represent a looked up static file."""
+
+    path = attr.ib(type=Path)
+    etag = attr.ib(type=str)
+    content_type = attr.ib(type=str)
+    encodings = attr.ib(type=Dict[str, Path])
+    checked = attr.ib(type=float)
+
+
+def _accepted_encodings(accept_encoding: str) -> Set[str]:
+    """Return the content codings an Accept-Encoding header allows."""
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, *params = item.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+
+    wildcard = qualities.pop("*", 0.0)
+    return {
+        encoding
+        for encoding, _ in PRECOMPRESSED_SUFFIXES
+        if qualities.get(encoding, wildcard) > 0
+    }
+
+
+def _etag_matches(request, etag: str) -> bool:
+    """Return if the client already has the representation with this etag."""
+    if_none_match = request.headers.get(hdrs.IF_NONE_MATCH)
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.replace("W/", "", 1) == etag:
+            return True
+    return False
+
+
+class NegotiatedFileResponse(FileResponse):
+    """File response for a file whose content coding is already chosen."""
+
+    async def prepare(self, request):
+        """Keep FileResponse from swapping in a gzip sibling on its own."""
+        headers = request.headers.copy()
+        headers.popall(hdrs.ACCEPT_ENCODING, None)
+        return await super().prepare(request.clone(headers=headers))
+
 
 class CachingStaticResource(StaticResource):
-    """Static Resource handler that will add cache headers."""
+    """Static Resource handler that will add cache headers.
 
-    async def _handle(self, request):
-        rel_url = request.match_info["filename"]
+    Looked up files are kept in memory with their etag and precompressed
+    siblings, so repeated requests do not touch the disk until the file is
+    served.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the resource."""
+        super().__init__(*args, **kwargs)
+        self._file_cache: "OrderedDict[str, CachedFile]" = OrderedDict()
+
+    def _lookup_file(self, rel_url: str, logger) -> Optional[CachedFile]:
+        """Resolve a requested file, return None for directories."""
         try:
             filename = Path(rel_url)
             if filename.anchor:
@@ -27,22 +111,83 @@ class CachingStaticResource(StaticResource):
             filepath = self._directory.joinpath(filename).resolve()
             if not self._follow_symlinks:
                 filepath.relative_to(self._directory)
+            file_stat = filepath.stat()
         except (ValueError, FileNotFoundError) as error:
             # relatively safe
             raise HTTPNotFound() from error
+        except HTTPForbidden:
+            raise
         except Exception as error:
             # perm error or other kind!
-            request.app.logger.exception(error)
+            logger.exception(error)
             raise HTTPNotFound() from error
 
-        # on opening a dir, load its contents if allowed
-        if filepath.is_dir():
-            return await super()._handle(request)
-        if filepath.is_file():
-            return FileResponse(
-                filepath,
-                chunk_size=self._chunk_size,
-                # type ignore: https://github.com/aio-libs/aiohttp/pull/3976
-                headers=CACHE_HEADERS,  # type: ignore
+        if stat.S_ISDIR(file_stat.st_mode):
+            return None
+        if not stat.S_ISREG(file_stat.st_mode):
+            raise HTTPNotFound()
+
+        encodings = {}
+        for encoding, suffix in PRECOMPRESSED_SUFFIXES:
+            compressed = filepath.with_name(filepath.name + suffix)
+            if compressed.is_file():
+                encodings[encoding] = compressed
+
+        return CachedFile(
+            path=filepath,
+            etag=f"{file_stat.st_mtime_ns:x}-{file_stat.st_size:x}",
+            content_type=(
+                mimetypes.guess_type(str(filepath))[0] or "application/octet-stream"
+            ),
+            encodings=encodings,
+            checked=monotonic(),
+        )
+
+    async def _handle(self, request):
+        rel_url = request.match_info["filename"]
+
+        cached = self._file_cache.get(rel_url)
+        if cached is None or monotonic() - cached.checked > FILE_CACHE_TIME:
+            self._file_cache.pop(rel_url, None)
+            cached = await asyncio.get_event_loop().run_in_executor(
+                None, self._lookup_file, rel_url, request.app.logger
+            )
+            if cached is None:
+                # on opening a dir, load its contents if allowed
+                return await super()._handle(request)
+            self._file_cache[rel_url] = cached
+            if len(self._file_cache) > FILE_CACHE_SIZE:
+                self._file_cache.popitem(last=False)
+        else:
+            self._file_cache.move_to_end(rel_url)
+
+        headers = dict(CACHE_HEADERS)
+        path = cached.path
+        etag = cached.etag
+        if cached.encodings:
+            headers[hdrs.VARY] = hdrs.ACCEPT_ENCODING
+            accepted = _accepted_encodings(
+                request.headers.get(hdrs.ACCEPT_ENCODING, "")
             )
-        raise HTTPNotFound
+            for encoding, compressed in cached.encodings.items():
+                if encoding in accepted:
+                    path = compressed
+                    etag = f"{etag}-{encoding}"
+                    headers[hdrs.CONTENT_TYPE] = cached.content_type
+                    headers[hdrs.CONTENT_ENCODING] = encoding
+                    break
+
+        etag = f'"{etag}"'
+        headers[hdrs.ETAG] = etag
+        if _etag_matches(request, etag):
+            headers.pop(hdrs.CONTENT_TYPE, None)
+            headers.pop(hdrs.CONTENT_ENCODING, None)
+            return Response(status=304, headers=headers)
+
+        # FileResponse uses sendfile where the platform supports it
+        return NegotiatedFileResponse(
+            path,
+            chunk_size=self._chunk_size,
+            # type ignore: https://github.com/aio-libs/aiohttp/pull/3976
+            headers=headers,  # type: ignore
+        )
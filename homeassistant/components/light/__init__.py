@@ -248,6 +248,7 @@ async def async_setup(hass, config):
         SERVICE_TURN_ON,
         vol.All(cv.make_entity_service_schema(LIGHT_TURN_ON_SCHEMA), preprocess_data),
         async_handle_light_on_service,
+        cache_schema=True,
     )
 
     component.async_register_entity_service(
@@ -257,10 +258,11 @@ async def async_setup(hass, config):
             ATTR_FLASH: vol.In([FLASH_SHORT, FLASH_LONG]),
         },
         "async_turn_off",
+        cache_schema=True,
     )
 
     component.async_register_entity_service(
-        SERVICE_TOGGLE, LIGHT_TURN_ON_SCHEMA, "async_toggle"
+        SERVICE_TOGGLE, LIGHT_TURN_ON_SCHEMA, "async_toggle", cache_schema=True
     )
 
     return True
@@ -7,7 +7,7 @@ import time
 from sqlalchemy.exc import SQLAlchemyError
 import voluptuous as vol
 
-from homeassistant.components import sun
+from homeassistant.components import sun, websocket_api
 from homeassistant.components.alexa.smart_home import EVENT_ALEXA_SMART_HOME
 from homeassistant.components.homekit.const import (
     ATTR_DISPLAY_NAME,
@@ -16,11 +16,18 @@ from homeassistant.components.homekit.const import (
     EVENT_HOMEKIT_CHANGED,
 )
 from homeassistant.components.http import HomeAssistantView
-from homeassistant.components.recorder.models import Events, States
+from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.components.recorder.models import (
+    Entities,
+    Events,
+    LazyEvent,
+    LazyState,
+    States,
+)
 from homeassistant.components.recorder.util import (
     QUERY_RETRY_WAIT,
     RETRIES,
-    session_scope,
+    read_session_scope,
 )
 from homeassistant.const import (
     ATTR_DOMAIN,
@@ -59,6 +66,9 @@ DOMAIN = "logbook"
 
 GROUP_BY_MINUTES = 15
 
+# Number of database rows fetched per page when streaming the logbook
+STREAM_PAGE_SIZE = 1000
+
 CONFIG_SCHEMA = vol.Schema(
     {
         DOMAIN: vol.Schema(
@@ -139,7 +149,9 @@ async def async_setup(hass, config):
         message = message.async_render()
         async_log_entry(hass, name, message, domain, entity_id)
 
-    hass.http.register_view(LogbookView(config.get(DOMAIN, {})))
+    hass.data[DOMAIN] = config.get(DOMAIN, {})
+    hass.http.register_view(LogbookView(hass.data[DOMAIN]))
+    hass.components.websocket_api.async_register_command(websocket_event_stream)
 
     hass.components.frontend.async_register_built_in_panel(
         "logbook", "logbook", "hass:format-list-bulleted-type"
@@ -190,6 +202,114 @@ class LogbookView(HomeAssistantView):
         return await hass.async_add_job(json_events)
 
 
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "logbook/event_stream",
+        vol.Required("start_time"): str,
+        vol.Optional("entity_id"): cv.entity_id,
+    }
+)
+@websocket_api.async_response
+async def websocket_event_stream(hass, connection, msg):
+    """Stream logbook entries, first from the database and then live.
+
+    Listeners are attached before the database is read, live events are
+    buffered until all pages of history have been sent.
+    """
+    start_time = dt_util.parse_datetime(msg["start_time"])
+    if start_time is None:
+        connection.send_error(msg["id"], "invalid_start_time", "Invalid start_time")
+        return
+
+    start_day = dt_util.as_utc(start_time)
+    end_day = dt_util.utcnow()
+    entity_id = msg.get("entity_id")
+    entities_filter = _generate_filter_from_config(hass.data[DOMAIN])
+    live_events = []
+    streaming = False
+
+    def send_events(events, partial=False):
+        """Send humanified events to the subscriber."""
+        connection.send_message(
+            websocket_api.event_message(
+                msg["id"], {"events": list(humanify(hass, events)), "partial": partial},
+            )
+        )
+
+    @callback
+    def forward_event(event):
+        """Forward a new event to the subscriber."""
+        if (
+            entity_id is not None
+            and event.event_type == EVENT_STATE_CHANGED
+            and event.data.get(ATTR_ENTITY_ID) != entity_id
+        ):
+            return
+        if not _keep_event(event, entities_filter):
+            return
+        if streaming:
+            send_events([event])
+        else:
+            live_events.append(event)
+
+    unsubs = [
+        hass.bus.async_listen(event_type, forward_event)
+        for event_type in ALL_EVENT_TYPES
+    ]
+
+    @callback
+    def unsubscribe():
+        """Remove the listeners of the stream."""
+        for unsub in unsubs:
+            unsub()
+
+    connection.subscriptions[msg["id"]] = unsubscribe
+    connection.send_result(msg["id"])
+
+    # Make sure everything fired before the stream started is in the database
+    await hass.async_add_executor_job(hass.data[DATA_INSTANCE].block_till_done)
+
+    pending = []
+    after = None
+    while True:
+        events, after = await hass.async_add_executor_job(
+            _get_events_page,
+            hass,
+            entities_filter,
+            start_day,
+            end_day,
+            entity_id,
+            after,
+        )
+        if msg["id"] not in connection.subscriptions:
+            return
+
+        events = pending + events
+        pending = []
+        if after is not None:
+            # Hold back the last group, it can continue on the next page
+            group = events[-1].time_fired.minute // GROUP_BY_MINUTES if events else None
+            split = len(events)
+            while (
+                split > 0
+                and events[split - 1].time_fired.minute // GROUP_BY_MINUTES == group
+            ):
+                split -= 1
+            events, pending = events[:split], events[split:]
+            if events:
+                send_events(events, partial=True)
+            continue
+
+        send_events(events)
+        break
+
+    backlog = [event for event in live_events if event.time_fired >= end_day]
+    live_events.clear()
+    streaming = True
+    if backlog:
+        send_events(backlog)
+
+
 def humanify(hass, events):
     """Generate a converted list of events into Entry objects.
 
@@ -237,14 +357,14 @@ def humanify(hass, events):
         for event in events_batch:
             if event.event_type == EVENT_STATE_CHANGED:
 
-                to_state = State.from_dict(event.data.get("new_state"))
+                to_state = _as_state(event.data.get("new_state"))
 
                 domain = to_state.domain
 
                 # Skip all but the last sensor state
                 if (
                     domain in CONTINUOUS_DOMAINS
-                    and event != last_sensor_event[to_state.entity_id]
+                    and event is not last_sensor_event[to_state.entity_id]
                 ):
                     continue
 
@@ -382,7 +502,7 @@ def humanify(hass, events):
 def _get_related_entity_ids(session, entity_filter):
     timer_start = time.perf_counter()
 
-    query = session.query(States).with_entities(States.entity_id).distinct()
+    query = session.query(Entities.entity_id)
 
     for tryno in range(0, RETRIES):
         try:
@@ -425,39 +545,98 @@ def _generate_filter_from_config(config):
     )
 
 
+def _yield_events(rows, entities_filter):
+    """Yield Events that are not filtered away."""
+    for row in rows:
+        if row.event_type != EVENT_STATE_CHANGED:
+            event = LazyEvent(row)
+            if _keep_event(event, entities_filter):
+                yield event
+            continue
+
+        # Do not report on new entities and entity removal, these rows
+        # are skipped before anything of them is converted
+        if row.old_state_id is None or not row.state:
+            continue
+
+        new_state = LazyState(row)
+        if not _keep_state(row.entity_id, new_state.attributes, entities_filter):
+            continue
+
+        event = LazyEvent(row)
+        event.data = {"entity_id": row.entity_id, "new_state": new_state}
+        yield event
+
+
+def _events_query(session, entities_filter, start_day, end_day, entity_id):
+    """Return the query for the logbook events of a period of time."""
+    if entity_id is not None:
+        entity_ids = [entity_id.lower()]
+    else:
+        entity_ids = _get_related_entity_ids(session, entities_filter)
+
+    return (
+        session.query(
+            Events.event_id,
+            Events.event_type,
+            Events.event_data,
+            Events.origin,
+            Events.time_fired,
+            Events.context_id,
+            Events.context_user_id,
+            Entities.entity_id,
+            States.state,
+            States.attributes,
+            States.last_changed,
+            States.last_updated,
+            States.old_state_id,
+        )
+        .order_by(Events.time_fired, Events.event_id)
+        .outerjoin(States, (Events.event_id == States.event_id))
+        .outerjoin(Entities, (States.entity_row_id == Entities.entity_row_id))
+        .filter(Events.event_type.in_(ALL_EVENT_TYPES))
+        .filter((Events.time_fired > start_day) & (Events.time_fired < end_day))
+        .filter(
+            (States.last_changed.is_(None) & Entities.entity_id.in_(entity_ids))
+            | (States.state_id.is_(None))
+        )
+    )
+
+
 def _get_events(hass, config, start_day, end_day, entity_id=None):
     """Get events for a period of time."""
     entities_filter = _generate_filter_from_config(config)
 
-    def yield_events(query):
-        """Yield Events that are not filtered away."""
-        for row in query.yield_per(500):
-            event = row.to_native()
-            if _keep_event(event, entities_filter):
-                yield event
+    with read_session_scope(hass=hass) as session:
+        query = _events_query(session, entities_filter, start_day, end_day, entity_id)
+        return list(
+            humanify(hass, _yield_events(query.yield_per(500), entities_filter))
+        )
 
-    with session_scope(hass=hass) as session:
-        if entity_id is not None:
-            entity_ids = [entity_id.lower()]
-        else:
-            entity_ids = _get_related_entity_ids(session, entities_filter)
-
-        query = (
-            session.query(Events)
-            .order_by(Events.time_fired)
-            .outerjoin(States, (Events.event_id == States.event_id))
-            .filter(Events.event_type.in_(ALL_EVENT_TYPES))
-            .filter((Events.time_fired > start_day) & (Events.time_fired < end_day))
-            .filter(
-                (
-                    (States.last_updated == States.last_changed)
-                    & States.entity_id.in_(entity_ids)
-                )
-                | (States.state_id.is_(None))
+
+def _get_events_page(
+    hass, entities_filter, start_day, end_day, entity_id=None, after=None
+):
+    """Get a page of events for a period of time.
+
+    Pages are ordered by (time_fired, event_id) and `after` is the key of the
+    last row of the previous page. Returns the kept events and the key to
+    fetch the next page with, which is None on the last page.
+    """
+    with read_session_scope(hass=hass) as session:
+        query = _events_query(session, entities_filter, start_day, end_day, entity_id)
+        if after is not None:
+            time_fired, event_id = after
+            query = query.filter(
+                (Events.time_fired > time_fired)
+                | ((Events.time_fired == time_fired) & (Events.event_id > event_id))
             )
-        )
+        rows = query.limit(STREAM_PAGE_SIZE).all()
 
-        return list(humanify(hass, yield_events(query)))
+    next_key = None
+    if len(rows) == STREAM_PAGE_SIZE:
+        next_key = (rows[-1].time_fired, rows[-1].event_id)
+    return list(_yield_events(rows, entities_filter)), next_key
 
 
 def _keep_event(event, entities_filter):
@@ -479,27 +658,23 @@ def _keep_event(event, entities_filter):
         if not new_state:
             return False
 
-        attributes = new_state.get("attributes", {})
+        if isinstance(new_state, State):
+            attributes = new_state.attributes
+            last_changed = new_state.last_changed
+            last_updated = new_state.last_updated
+        else:
+            attributes = new_state.get("attributes", {})
+            last_changed = new_state.get("last_changed")
+            last_updated = new_state.get("last_updated")
 
         # If last_changed != last_updated only attributes have changed
         # we do not report on that yet.
-        last_changed = new_state.get("last_changed")
-        last_updated = new_state.get("last_updated")
         if last_changed != last_updated:
             return False
 
-        domain = split_entity_id(entity_id)[0]
-
-        # Also filter auto groups.
-        if domain == "group" and attributes.get("auto", False):
-            return False
+        return _keep_state(entity_id, attributes, entities_filter)
 
-        # exclude entities which are customized hidden
-        hidden = attributes.get(ATTR_HIDDEN, False)
-        if hidden:
-            return False
-
-    elif event.event_type == EVENT_LOGBOOK_ENTRY:
+    if event.event_type == EVENT_LOGBOOK_ENTRY:
         domain = event.data.get(ATTR_DOMAIN)
         entity_id = event.data.get(ATTR_ENTITY_ID)
 
@@ -523,6 +698,28 @@ def _keep_event(event, entities_filter):
     return not entity_id or entities_filter(entity_id)
 
 
+def _keep_state(entity_id, attributes, entities_filter):
+    """Return if a changed state should be reported."""
+    domain = split_entity_id(entity_id)[0]
+
+    # Also filter auto groups.
+    if domain == "group" and attributes.get("auto", False):
+        return False
+
+    # exclude entities which are customized hidden
+    if attributes.get(ATTR_HIDDEN, False):
+        return False
+
+    return entities_filter(entity_id)
+
+
+def _as_state(state):
+    """Return a state from either a State or its dict representation."""
+    if state is None or isinstance(state, State):
+        return state
+    return State.from_dict(state)
+
+
 def _entry_message_from_state(domain, state):
     """Convert a state to a message for the logbook."""
     # We pass domain in so we don't have to split entity_id again
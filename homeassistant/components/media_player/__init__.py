@@ -263,6 +263,7 @@ async def async_setup(hass, config):
         ),
         "async_set_volume_level",
         [SUPPORT_VOLUME_SET],
+        cache_schema=True,
     )
     component.async_register_entity_service(
         SERVICE_VOLUME_MUTE,
@@ -274,6 +275,7 @@ async def async_setup(hass, config):
         ),
         "async_mute_volume",
         [SUPPORT_VOLUME_MUTE],
+        cache_schema=True,
     )
     component.async_register_entity_service(
         SERVICE_MEDIA_SEEK,
@@ -289,6 +291,7 @@ async def async_setup(hass, config):
         ),
         "async_media_seek",
         [SUPPORT_SEEK],
+        cache_schema=True,
     )
     component.async_register_entity_service(
         SERVICE_SELECT_SOURCE,
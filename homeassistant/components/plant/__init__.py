@@ -6,7 +6,7 @@ import logging
 import voluptuous as vol
 
 from homeassistant.components.recorder.models import States
-from homeassistant.components.recorder.util import execute, session_scope
+from homeassistant.components.recorder.util import execute, read_session_scope
 from homeassistant.const import (
     ATTR_TEMPERATURE,
     ATTR_UNIT_OF_MEASUREMENT,
@@ -297,12 +297,12 @@ class Plant(Entity):
             return
 
         _LOGGER.debug("Initializing values for %s from the database", self._name)
-        with session_scope(hass=self.hass) as session:
+        with read_session_scope(hass=self.hass) as session:
             query = (
                 session.query(States)
                 .filter(
-                    (States.entity_id == entity_id.lower())
-                    and (States.last_updated > start_date)
+                    States.entity_id_in([entity_id.lower()])
+                    & (States.last_updated > start_date)
                 )
                 .order_by(States.last_updated.asc())
             )
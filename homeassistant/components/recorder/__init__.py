@@ -10,11 +10,11 @@ import threading
 import time
 from typing import Any, Dict, Optional
 
-from sqlalchemy import create_engine, exc
+from sqlalchemy import create_engine, exc, func, text
 from sqlalchemy.engine import Engine
 from sqlalchemy.event import listens_for
 from sqlalchemy.orm import scoped_session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import QueuePool, StaticPool
 import voluptuous as vol
 
 from homeassistant.components import persistent_notification
@@ -38,8 +38,8 @@ import homeassistant.util.dt as dt_util
 
 from . import migration, purge
 from .const import DATA_INSTANCE
-from .models import Base, Events, RecorderRuns, States
-from .util import session_scope
+from .models import Base, Entities, Events, RecorderRuns, States
+from .util import read_session_scope, session_scope
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -61,10 +61,13 @@ DEFAULT_URL = "sqlite:///{hass_config_path}"
 DEFAULT_DB_FILE = "home-assistant_v2.db"
 DEFAULT_DB_MAX_RETRIES = 10
 DEFAULT_DB_RETRY_WAIT = 3
+DEFAULT_DB_MAX_READ_QUERIES = 4
 
 CONF_DB_URL = "db_url"
 CONF_DB_MAX_RETRIES = "db_max_retries"
 CONF_DB_RETRY_WAIT = "db_retry_wait"
+CONF_DB_READ_URL = "db_read_url"
+CONF_DB_MAX_READ_QUERIES = "db_max_read_queries"
 CONF_PURGE_KEEP_DAYS = "purge_keep_days"
 CONF_PURGE_INTERVAL = "purge_interval"
 CONF_EVENT_TYPES = "event_types"
@@ -104,6 +107,10 @@ CONFIG_SCHEMA = vol.Schema(
                 vol.Optional(
                     CONF_DB_RETRY_WAIT, default=DEFAULT_DB_RETRY_WAIT
                 ): cv.positive_int,
+                vol.Optional(CONF_DB_READ_URL): cv.string,
+                vol.Optional(
+                    CONF_DB_MAX_READ_QUERIES, default=DEFAULT_DB_MAX_READ_QUERIES
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
             }
         )
     },
@@ -122,7 +129,7 @@ def run_information(hass, point_in_time: Optional[datetime] = None):
     if point_in_time is None or point_in_time > ins.recording_start:
         return ins.run_info
 
-    with session_scope(hass=hass) as session:
+    with read_session_scope(hass=hass) as session:
         res = (
             session.query(recorder_runs)
             .filter(
@@ -147,6 +154,8 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     db_url = conf.get(CONF_DB_URL, None)
     if not db_url:
         db_url = DEFAULT_URL.format(hass_config_path=hass.config.path(DEFAULT_DB_FILE))
+    db_read_url = conf.get(CONF_DB_READ_URL)
+    db_max_read_queries = conf[CONF_DB_MAX_READ_QUERIES]
 
     include = conf.get(CONF_INCLUDE, {})
     exclude = conf.get(CONF_EXCLUDE, {})
@@ -159,6 +168,8 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
         db_retry_wait=db_retry_wait,
         include=include,
         exclude=exclude,
+        read_uri=db_read_url,
+        max_read_queries=db_max_read_queries,
     )
     instance.async_initialize()
     instance.start()
@@ -177,6 +188,139 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 PurgeTask = namedtuple("PurgeTask", ["keep_days", "repack"])
 
 
+def _entity_row_ids(session, events, entity_row_ids):
+    """Make sure all entities changed by events have a row in entities.
+
+    Entity_row_ids maps entity ids to their row and is updated with the rows
+    that were looked up or inserted.
+    """
+    missing = {
+        event.data["entity_id"]
+        for event in events
+        if event.event_type == EVENT_STATE_CHANGED
+        and event.data["entity_id"] not in entity_row_ids
+    }
+    if not missing:
+        return []
+
+    for entity_id, entity_row_id in session.query(
+        Entities.entity_id, Entities.entity_row_id
+    ).filter(Entities.entity_id.in_(missing)):
+        entity_row_ids[entity_id] = entity_row_id
+        missing.discard(entity_id)
+
+    if not missing:
+        return []
+
+    entity_row_id = session.query(func.max(Entities.entity_row_id)).scalar() or 0
+    entity_rows = []
+    for entity_id in sorted(missing):
+        entity_row_id += 1
+        entity_rows.append({"entity_row_id": entity_row_id, "entity_id": entity_id})
+        entity_row_ids[entity_id] = entity_row_id
+    return entity_rows
+
+
+def insert_events(session, events, state_ids, entity_row_ids):
+    """Insert events and their states with one statement per table.
+
+    Primary keys are assigned here instead of by the database, so states can
+    refer to their event without flushing every row. The recorder is the only
+    writer, the highest ids are read within the transaction. PostgreSQL
+    sequences are moved past the assigned ids afterwards.
+
+    State_ids maps entity ids to their latest state row and is updated with
+    the inserted states. Entity_row_ids maps entity ids to their row in the
+    entities table and is updated with new entities.
+    """
+    entity_rows = _entity_row_ids(session, events, entity_row_ids)
+    event_id = session.query(func.max(Events.event_id)).scalar() or 0
+    state_id = session.query(func.max(States.state_id)).scalar() or 0
+    event_rows = []
+    state_rows = []
+
+    for event in events:
+        try:
+            event_row = Events.row_from_event(event)
+        except (TypeError, ValueError):
+            _LOGGER.warning("Event is not JSON serializable: %s", event)
+            continue
+
+        event_id += 1
+        event_row["event_id"] = event_id
+        event_rows.append(event_row)
+
+        if event.event_type != EVENT_STATE_CHANGED:
+            continue
+
+        entity_id = event.data["entity_id"]
+        old_state_id = None
+        if event.data.get("old_state") is not None:
+            old_state_id = state_ids.get(entity_id)
+        try:
+            state_row = States.row_from_event(
+                event, old_state_id, entity_row_ids[entity_id]
+            )
+        except (TypeError, ValueError):
+            _LOGGER.warning(
+                "State is not JSON serializable: %s", event.data.get("new_state"),
+            )
+            state_ids.pop(entity_id, None)
+            continue
+
+        state_id += 1
+        state_row["state_id"] = state_id
+        state_row["event_id"] = event_id
+        state_rows.append(state_row)
+
+        if event.data.get("new_state") is None:
+            state_ids.pop(entity_id, None)
+        else:
+            state_ids[entity_id] = state_id
+
+    if entity_rows:
+        session.execute(Entities.__table__.insert(), entity_rows)
+    if event_rows:
+        session.execute(Events.__table__.insert(), event_rows)
+    if state_rows:
+        session.execute(States.__table__.insert(), state_rows)
+
+    _sync_sequences(
+        session,
+        [
+            (
+                "entities",
+                "entity_row_id",
+                entity_rows and entity_rows[-1]["entity_row_id"],
+            ),
+            ("events", "event_id", event_rows and event_id),
+            ("states", "state_id", state_rows and state_id),
+        ],
+    )
+
+
+def _sync_sequences(session, last_ids):
+    """Move PostgreSQL sequences past the primary keys assigned by the recorder.
+
+    Inserts that rely on the column default, like those of older versions
+    after a downgrade, would otherwise get ids that are already taken. Other
+    databases derive the next id from the rows in the table.
+    """
+    if session.bind.dialect.name != "postgresql":
+        return
+
+    for table_name, column_name, last_id in last_ids:
+        if not last_id:
+            continue
+        session.execute(
+            text(
+                "SELECT setval(pg_get_serial_sequence(:table_name, :column_name), "
+                ":last_id)"
+            ),
+            {"table_name": table_name, "column_name": column_name, "last_id": last_id},
+        )
+
+
 class Recorder(threading.Thread):
     """A threaded recorder class."""
 
@@ -190,6 +334,8 @@ class Recorder(threading.Thread):
         db_retry_wait: int,
         include: Dict,
         exclude: Dict,
+        read_uri: Optional[str] = None,
+        max_read_queries: int = DEFAULT_DB_MAX_READ_QUERIES,
     ) -> None:
         """Initialize the recorder."""
         threading.Thread.__init__(self, name="Recorder")
@@ -204,7 +350,16 @@ class Recorder(threading.Thread):
         self.db_retry_wait = db_retry_wait
         self.async_db_ready = asyncio.Future()
         self.engine: Any = None
+        self.db_read_url = read_uri
+        self.read_engine: Any = None
+        # Caps the number of history and logbook queries running at once
+        self.read_semaphore = threading.BoundedSemaphore(max_read_queries)
+        self.max_read_queries = max_read_queries
         self.run_info: Any = None
+        # Latest state row of every entity, to link the next state to it
+        self._old_state_ids: Dict[str, int] = {}
+        # Row of every entity in the entities table, filled as entities change
+        self._entity_row_ids: Dict[str, int] = {}
 
         self.entity_filter = generate_filter(
             include.get(CONF_DOMAINS, []),
@@ -215,11 +370,12 @@ class Recorder(threading.Thread):
         self.exclude_t = exclude.get(CONF_EVENT_TYPES, [])
 
         self.get_session = None
+        self.get_read_session = None
 
     @callback
     def async_initialize(self):
         """Initialize the recorder."""
-        self.hass.bus.async_listen(MATCH_ALL, self.event_listener)
+        self.hass.bus.async_listen_batch(MATCH_ALL, self.event_batch_listener)
 
     def do_adhoc_purge(self, **kwargs):
         """Trigger an adhoc purge retaining keep_days worth of data."""
@@ -338,72 +494,79 @@ class Recorder(threading.Thread):
                 purge.purge_old_data(self, event.keep_days, event.repack)
                 self.queue.task_done()
                 continue
-            if event.event_type == EVENT_TIME_CHANGED:
-                self.queue.task_done()
-                continue
-            if event.event_type in self.exclude_t:
-                self.queue.task_done()
-                continue
+            if isinstance(event, list):
+                events = [item for item in event if self._should_record(item)]
+            elif self._should_record(event):
+                events = [event]
+            else:
+                events = []
 
-            entity_id = event.data.get(ATTR_ENTITY_ID)
-            if entity_id is not None:
-                if not self.entity_filter(entity_id):
-                    self.queue.task_done()
-                    continue
+            if events:
+                self._save_events(events)
 
-            tries = 1
-            updated = False
-            while not updated and tries <= self.db_max_retries:
-                if tries != 1:
-                    time.sleep(self.db_retry_wait)
-                try:
-                    with session_scope(session=self.get_session()) as session:
-                        try:
-                            dbevent = Events.from_event(event)
-                            session.add(dbevent)
-                            session.flush()
-                        except (TypeError, ValueError):
-                            _LOGGER.warning("Event is not JSON serializable: %s", event)
-
-                        if event.event_type == EVENT_STATE_CHANGED:
-                            try:
-                                dbstate = States.from_event(event)
-                                dbstate.event_id = dbevent.event_id
-                                session.add(dbstate)
-                            except (TypeError, ValueError):
-                                _LOGGER.warning(
-                                    "State is not JSON serializable: %s",
-                                    event.data.get("new_state"),
-                                )
-
-                    updated = True
-
-                except exc.OperationalError as err:
-                    _LOGGER.error(
-                        "Error in database connectivity: %s. "
-                        "(retrying in %s seconds)",
-                        err,
-                        self.db_retry_wait,
-                    )
-                    tries += 1
+            self.queue.task_done()
 
-                except exc.SQLAlchemyError:
-                    updated = True
-                    _LOGGER.exception("Error saving event: %s", event)
+    def _should_record(self, event):
+        """Return if an event should be written to the database."""
+        if event.event_type == EVENT_TIME_CHANGED:
+            return False
+        if event.event_type in self.exclude_t:
+            return False
 
-            if not updated:
+        entity_id = event.data.get(ATTR_ENTITY_ID)
+        return entity_id is None or self.entity_filter(entity_id)
+
+    def _save_events(self, events):
+        """Write events to the database in a single transaction.
+
+        When a batch cannot be written for other reasons than connectivity,
+        its events are written one by one so only the failing ones are lost.
+        """
+        tries = 1
+        updated = False
+        while not updated and tries <= self.db_max_retries:
+            if tries != 1:
+                time.sleep(self.db_retry_wait)
+            try:
+                state_ids = dict(self._old_state_ids)
+                entity_row_ids = dict(self._entity_row_ids)
+                with session_scope(session=self.get_session()) as session:
+                    insert_events(session, events, state_ids, entity_row_ids)
+
+                self._old_state_ids = state_ids
+                self._entity_row_ids = entity_row_ids
+                updated = True
+
+            except exc.OperationalError as err:
                 _LOGGER.error(
-                    "Error in database update. Could not save "
-                    "after %d tries. Giving up",
-                    tries,
+                    "Error in database connectivity: %s. (retrying in %s seconds)",
+                    err,
+                    self.db_retry_wait,
                 )
+                tries += 1
 
-            self.queue.task_done()
+            except exc.SQLAlchemyError:
+                updated = True
+                if len(events) == 1:
+                    _LOGGER.exception("Error saving event: %s", events[0])
+                    continue
+                _LOGGER.warning(
+                    "Error saving a batch of %d events, saving them one by one",
+                    len(events),
+                )
+                for event in events:
+                    self._save_events([event])
+
+        if not updated:
+            _LOGGER.error(
+                "Error in database update. Could not save after %d tries. Giving up",
+                tries,
+            )
 
     @callback
-    def event_listener(self, event):
-        """Listen for new events and put them in the process queue."""
-        self.queue.put(event)
+    def event_batch_listener(self, events):
+        """Listen for batches of new events and queue them as one item."""
+        self.queue.put(events)
 
     def block_till_done(self):
         """Block till all events processed."""
@@ -433,17 +596,61 @@ class Recorder(threading.Thread):
             kwargs["echo"] = False
 
         if self.engine is not None:
-            self.engine.dispose()
+            self._close_connection()
 
         self.engine = create_engine(self.db_url, **kwargs)
         Base.metadata.create_all(self.engine)
         self.get_session = scoped_session(sessionmaker(bind=self.engine))
 
+        self.read_engine = self._create_read_engine()
+        self.get_read_session = scoped_session(sessionmaker(bind=self.read_engine))
+
+    def _create_read_engine(self):
+        """Create the engine used by history and logbook queries.
+
+        A configured read url, like a replica, gets its own engine. File based
+        SQLite databases get a pool of read only connections, WAL lets them
+        read while the recorder writes. Other databases share the engine of
+        the recorder, its pool already hands out a connection per thread.
+        """
+        if self.db_read_url:
+            return create_engine(
+                self.db_read_url, echo=False, pool_size=self.max_read_queries
+            )
+
+        if (
+            not self.db_url.startswith("sqlite")
+            or self.db_url == "sqlite://"
+            or ":memory:" in self.db_url
+        ):
+            return self.engine
+
+        read_engine = create_engine(
+            self.db_url,
+            connect_args={"check_same_thread": False},
+            poolclass=QueuePool,
+            pool_size=self.max_read_queries,
+            max_overflow=0,
+        )
+
+        @listens_for(read_engine, "connect")
+        def set_sqlite_query_only(dbapi_connection, connection_record):
+            """Make sure read connections never write."""
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA query_only=ON")
+            cursor.close()
+
+        return read_engine
+
     def _close_connection(self):
         """Close the connection."""
+        if self.read_engine is not self.engine:
+            self.read_engine.dispose()
         self.engine.dispose()
         self.engine = None
+        self.read_engine = None
         self.get_session = None
+        self.get_read_session = None
 
     def _setup_run(self):
         """Log the start of the current run."""
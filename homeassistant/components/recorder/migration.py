@@ -2,15 +2,18 @@
 import logging
 import os
 
-from sqlalchemy import Table, text
+from sqlalchemy import DateTime, Integer, String, Table, bindparam, select, text
 from sqlalchemy.engine import reflection
 from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.sql import column, table
 
-from .models import SCHEMA_VERSION, Base, SchemaChanges
+from .models import SCHEMA_VERSION, Base, SchemaChanges, UnixTimestamp
 from .util import session_scope
 
 _LOGGER = logging.getLogger(__name__)
 PROGRESS_FILE = ".migration_progress"
+# Number of states migrated per transaction
+MIGRATION_BATCH_SIZE = 10000
 
 
 def migrate_schema(instance):
@@ -199,6 +202,152 @@ def _add_columns(engine, table_name, columns_def):
             )
 
 
+def _link_old_states(engine):
+    """Link states to their previous state and slim their events.
+
+    The state payloads duplicated in the data of state changed events are
+    dropped, they are rebuilt from the linked states. Runs in batches to
+    keep transactions small on large databases.
+    """
+    _LOGGER.info(
+        "Linking states and removing duplicated state data from events. "
+        "Note: this can take several minutes on large databases and slow "
+        "computers. Please be patient!"
+    )
+    select_states = text(
+        "SELECT states.state_id, states.entity_id, states.state, "
+        "states.event_id, events.event_data FROM states "
+        "LEFT OUTER JOIN events ON states.event_id = events.event_id "
+        "WHERE states.state_id > :last_state_id "
+        "ORDER BY states.state_id LIMIT :limit"
+    )
+    update_states = text(
+        "UPDATE states SET old_state_id = :old_state_id WHERE state_id = :state_id"
+    )
+    update_events = text(
+        "UPDATE events SET event_data = '{}' WHERE event_id IN :event_ids"
+    ).bindparams(bindparam("event_ids", expanding=True))
+
+    latest_state_ids = {}
+    last_state_id = -1
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(
+                select_states, last_state_id=last_state_id, limit=MIGRATION_BATCH_SIZE
+            ).fetchall()
+            if not rows:
+                break
+
+            links = []
+            event_ids = []
+            for state_id, entity_id, state, event_id, event_data in rows:
+                old_state_id = latest_state_ids.get(entity_id)
+                # Events of new entities have no old state
+                if old_state_id is not None and (
+                    event_data is None or '"old_state": null' not in event_data
+                ):
+                    links.append({"state_id": state_id, "old_state_id": old_state_id})
+
+                if state:
+                    latest_state_ids[entity_id] = state_id
+                else:
+                    # Entity was removed
+                    latest_state_ids.pop(entity_id, None)
+
+                if event_data is not None and event_data != "{}":
+                    event_ids.append(event_id)
+
+            if links:
+                connection.execute(update_states, links)
+            if event_ids:
+                connection.execute(update_events, event_ids=event_ids)
+
+            last_state_id = rows[-1][0]
+            _LOGGER.debug("Migrated states up to %s", last_state_id)
+
+
+def _intern_entities_and_timestamps(engine):
+    """Move states to interned entity ids and epoch timestamps.
+
+    The legacy columns are cleared so their space can be reclaimed, they are
+    not dropped as SQLite does not support dropping columns. Runs in batches
+    to keep transactions small on large databases.
+    """
+    _LOGGER.info(
+        "Moving states to the entities table and epoch timestamps. "
+        "Note: this can take several minutes on large databases and slow "
+        "computers. Please be patient!"
+    )
+    engine.execute(
+        text(
+            "INSERT INTO entities (entity_id) SELECT DISTINCT entity_id FROM states "
+            "WHERE entity_id IS NOT NULL AND entity_id NOT IN "
+            "(SELECT entity_id FROM entities)"
+        )
+    )
+    entity_row_ids = {
+        entity_id: entity_row_id
+        for entity_id, entity_row_id in engine.execute(
+            text("SELECT entity_id, entity_row_id FROM entities")
+        )
+    }
+
+    legacy_states = table(
+        "states",
+        column("state_id", Integer),
+        column("entity_id", String),
+        column("last_changed", DateTime(timezone=True)),
+        column("last_updated", DateTime(timezone=True)),
+    )
+    select_states = (
+        select(list(legacy_states.c))
+        .where(legacy_states.c.state_id > bindparam("last_state_id"))
+        .where(legacy_states.c.entity_id.isnot(None))
+        .order_by(legacy_states.c.state_id)
+        .limit(MIGRATION_BATCH_SIZE)
+    )
+    update_states = text(
+        "UPDATE states SET entity_row_id = :entity_row_id, "
+        "last_changed_ts = :last_changed_ts, last_updated_ts = :last_updated_ts, "
+        "entity_id = NULL, last_changed = NULL, last_updated = NULL, "
+        "created = NULL WHERE state_id = :row_state_id"
+    )
+    timestamp = UnixTimestamp()
+
+    last_state_id = -1
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(
+                select_states, last_state_id=last_state_id
+            ).fetchall()
+            if not rows:
+                break
+
+            updates = []
+            for state_id, entity_id, last_changed, last_updated in rows:
+                last_updated_ts = timestamp.process_bind_param(last_updated, None)
+                last_changed_ts = timestamp.process_bind_param(last_changed, None)
+                updates.append(
+                    {
+                        "row_state_id": state_id,
+                        "entity_row_id": entity_row_ids[entity_id],
+                        "last_updated_ts": last_updated_ts,
+                        "last_changed_ts": (
+                            None
+                            if last_changed_ts == last_updated_ts
+                            else last_changed_ts
+                        ),
+                    }
+                )
+            connection.execute(update_states, updates)
+
+            last_state_id = rows[-1][0]
+            _LOGGER.debug("Migrated states up to %s", last_state_id)
+
+    # States without an entity id cannot be linked to an entity
+    engine.execute(text("DELETE FROM states WHERE entity_row_id IS NULL"))
+
+
 def _apply_update(engine, new_version, old_version):
     """Perform operations to bring schema up to date."""
     if new_version == 1:
@@ -206,8 +355,7 @@ def _apply_update(engine, new_version, old_version):
     elif new_version == 2:
         # Create compound start/end index for recorder_runs
         _create_index(engine, "recorder_runs", "ix_recorder_runs_start_end")
-        # Create indexes for states
-        _create_index(engine, "states", "ix_states_last_updated")
+        # The states index that was added here is replaced in version 9
     elif new_version == 3:
         # There used to be a new index here, but it was removed in version 4.
         pass
@@ -227,7 +375,7 @@ def _apply_update(engine, new_version, old_version):
         _drop_index(engine, "states", "states__significant_changes")
         _drop_index(engine, "states", "ix_states_entity_id_created")
 
-        _create_index(engine, "states", "ix_states_entity_id_last_updated")
+        # The states index that was added here is replaced in version 9
     elif new_version == 5:
         # Create supporting index for States.event_id foreign key
         _create_index(engine, "states", "ix_states_event_id")
@@ -247,8 +395,30 @@ def _apply_update(engine, new_version, old_version):
         _create_index(engine, "states", "ix_states_context_id")
         _create_index(engine, "states", "ix_states_context_user_id")
     elif new_version == 7:
-        _create_index(engine, "states", "ix_states_entity_id")
+        # The states index that was added here is replaced in version 9
+        pass
     elif new_version == 8:
+        _add_columns(engine, "states", ["old_state_id INTEGER"])
+        _create_index(engine, "states", "ix_states_old_state_id")
+        _link_old_states(engine)
+    elif new_version == 9:
+        # Indexes on the legacy columns slow down clearing them
+        _drop_index(engine, "states", "ix_states_entity_id_last_updated")
+        _drop_index(engine, "states", "ix_states_last_updated")
+        _drop_index(engine, "states", "ix_states_entity_id")
+        _add_columns(
+            engine,
+            "states",
+            [
+                "entity_row_id INTEGER REFERENCES entities(entity_row_id)",
+                "last_changed_ts DOUBLE PRECISION",
+                "last_updated_ts DOUBLE PRECISION",
+            ],
+        )
+        _intern_entities_and_timestamps(engine)
+        _create_index(engine, "states", "ix_states_last_updated_ts")
+        _create_index(engine, "states", "ix_states_entity_row_id_last_updated_ts")
+    elif new_version == 10:
         # Pending migration, want to group a few.
         pass
         # _add_columns(engine, "events", [
@@ -2,21 +2,27 @@
 from datetime import datetime
 import json
 import logging
+from types import MappingProxyType
 
 from sqlalchemy import (
     Boolean,
     Column,
     DateTime,
+    Float,
     ForeignKey,
     Index,
     Integer,
     String,
     Text,
     distinct,
+    select,
 )
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import relationship
 from sqlalchemy.orm.session import Session
+from sqlalchemy.types import TypeDecorator
 
+from homeassistant.const import EVENT_STATE_CHANGED
 from homeassistant.core import Context, Event, EventOrigin, State, split_entity_id
 from homeassistant.helpers.json import JSONEncoder
 import homeassistant.util.dt as dt_util
@@ -25,11 +31,32 @@ import homeassistant.util.dt as dt_util
 # pylint: disable=invalid-name
 Base = declarative_base()
 
-SCHEMA_VERSION = 7
+SCHEMA_VERSION = 9
 
 _LOGGER = logging.getLogger(__name__)
 
 
+class UnixTimestamp(TypeDecorator):
+    """A datetime stored as seconds since the epoch in a double precision float.
+
+    Naive datetimes are taken to be UTC, like the rest of the database.
+    """
+
+    impl = Float(precision=53)
+
+    def process_bind_param(self, value, dialect):
+        """Convert a datetime to a timestamp."""
+        if isinstance(value, datetime):
+            return _process_timestamp(value).timestamp()
+        return value
+
+    def process_result_value(self, value, dialect):
+        """Convert a timestamp to a naive UTC datetime, like other columns."""
+        if value is None:
+            return None
+        return datetime.utcfromtimestamp(value)
+
+
 class Events(Base):  # type: ignore
     """Event history data."""
 
@@ -47,15 +74,28 @@ class Events(Base):  # type: ignore
     @staticmethod
     def from_event(event):
         """Create an event database object from a native event."""
-        return Events(
-            event_type=event.event_type,
-            event_data=json.dumps(event.data, cls=JSONEncoder),
-            origin=str(event.origin),
-            time_fired=event.time_fired,
-            context_id=event.context.id,
-            context_user_id=event.context.user_id,
-            # context_parent_id=event.context.parent_id,
-        )
+        return Events(**Events.row_from_event(event))
+
+    @staticmethod
+    def row_from_event(event):
+        """Return the column values of a native event, for bulk inserts.
+
+        The data of state changed events is not stored, their states are
+        stored in the states table.
+        """
+        if event.event_type == EVENT_STATE_CHANGED:
+            event_data = "{}"
+        else:
+            event_data = json.dumps(event.data, cls=JSONEncoder)
+        return {
+            "event_type": event.event_type,
+            "event_data": event_data,
+            "origin": str(event.origin),
+            "time_fired": event.time_fired,
+            "context_id": event.context.id,
+            "context_user_id": event.context.user_id,
+            # "context_parent_id": event.context.parent_id,
+        }
 
     def to_native(self):
         """Convert to a natve HA Event."""
@@ -74,57 +114,102 @@ class Events(Base):  # type: ignore
             return None
 
 
+class Entities(Base):  # type: ignore
+    """Entity ids, stored once and referenced by their states."""
+
+    __tablename__ = "entities"
+    entity_row_id = Column(Integer, primary_key=True)
+    entity_id = Column(String(255), unique=True)
+
+
 class States(Base):  # type: ignore
-    """State change history."""
+    """State change history.
+
+    Timestamps are stored as epoch seconds, last_changed only when it differs
+    from last_updated.
+    """
 
     __tablename__ = "states"
     state_id = Column(Integer, primary_key=True)
     domain = Column(String(64))
-    entity_id = Column(String(255), index=True)
+    entity_row_id = Column(Integer, ForeignKey("entities.entity_row_id"))
     state = Column(String(255))
     attributes = Column(Text)
     event_id = Column(Integer, ForeignKey("events.event_id"), index=True)
-    last_changed = Column(DateTime(timezone=True), default=datetime.utcnow)
-    last_updated = Column(DateTime(timezone=True), default=datetime.utcnow, index=True)
-    created = Column(DateTime(timezone=True), default=datetime.utcnow)
+    last_changed = Column("last_changed_ts", UnixTimestamp, key="last_changed")
+    last_updated = Column(
+        "last_updated_ts", UnixTimestamp, key="last_updated", index=True
+    )
     context_id = Column(String(36), index=True)
     context_user_id = Column(String(36), index=True)
     # context_parent_id = Column(String(36), index=True)
+    # Not a foreign key, purged old states do not need to be unlinked
+    old_state_id = Column(Integer, index=True)
+
+    entity = relationship(Entities, lazy="joined", innerjoin=True)
 
     __table_args__ = (
         # Used for fetching the state of entities at a specific time
         # (get_states in history.py)
-        Index("ix_states_entity_id_last_updated", "entity_id", "last_updated"),
+        Index(
+            "ix_states_entity_row_id_last_updated_ts", "entity_row_id", "last_updated"
+        ),
     )
 
+    @property
+    def entity_id(self):
+        """Return the entity id of the state."""
+        if self.entity is None:
+            return None
+        return self.entity.entity_id
+
     @staticmethod
-    def from_event(event):
+    def entity_id_in(entity_ids):
+        """Return a filter matching the states of entity ids."""
+        return States.entity_row_id.in_(
+            select([Entities.entity_row_id]).where(Entities.entity_id.in_(entity_ids))
+        )
+
+    @staticmethod
+    def from_event(event, old_state_id=None, entity=None):
         """Create object from a state_changed event."""
+        row = States.row_from_event(event, old_state_id)
+        if entity is None:
+            entity = Entities(entity_id=event.data["entity_id"])
+        return States(entity=entity, **row)
+
+    @staticmethod
+    def row_from_event(event, old_state_id=None, entity_row_id=None):
+        """Return the column values of a state_changed event, for bulk inserts."""
         entity_id = event.data["entity_id"]
         state = event.data.get("new_state")
 
-        dbstate = States(
-            entity_id=entity_id,
-            context_id=event.context.id,
-            context_user_id=event.context.user_id,
-            # context_parent_id=event.context.parent_id,
-        )
+        row = {
+            "entity_row_id": entity_row_id,
+            "context_id": event.context.id,
+            "context_user_id": event.context.user_id,
+            # "context_parent_id": event.context.parent_id,
+            "old_state_id": old_state_id,
+        }
 
         # State got deleted
         if state is None:
-            dbstate.state = ""
-            dbstate.domain = split_entity_id(entity_id)[0]
-            dbstate.attributes = "{}"
-            dbstate.last_changed = event.time_fired
-            dbstate.last_updated = event.time_fired
+            row["state"] = ""
+            row["domain"] = split_entity_id(entity_id)[0]
+            row["attributes"] = "{}"
+            row["last_changed"] = None
+            row["last_updated"] = event.time_fired
         else:
-            dbstate.domain = state.domain
-            dbstate.state = state.state
-            dbstate.attributes = json.dumps(dict(state.attributes), cls=JSONEncoder)
-            dbstate.last_changed = state.last_changed
-            dbstate.last_updated = state.last_updated
+            row["domain"] = state.domain
+            row["state"] = state.state
+            row["attributes"] = json.dumps(dict(state.attributes), cls=JSONEncoder)
+            if state.last_changed == state.last_updated:
+                row["last_changed"] = None
+            else:
+                row["last_changed"] = state.last_changed
+            row["last_updated"] = state.last_updated
 
-        return dbstate
+        return row
 
     def to_native(self):
         """Convert to an HA state object."""
@@ -134,7 +219,7 @@ class States(Base):  # type: ignore
                 self.entity_id,
                 self.state,
                 json.loads(self.attributes),
-                _process_timestamp(self.last_changed),
+                _process_timestamp(self.last_changed or self.last_updated),
                 _process_timestamp(self.last_updated),
                 context=context,
                 # Temp, because database can still store invalid entity IDs
@@ -147,6 +232,223 @@ class States(Base):  # type: ignore
             return None
 
 
+class LazyEvent(Event):
+    """An event of a database row that only converts the fields it hands out.
+
+    Works with Events rows and with query rows that have the same column
+    names, the data is parsed, the time converted and the context created
+    on first access.
+    """
+
+    __slots__ = [
+        "_context",
+        "_context_id",
+        "_context_user_id",
+        "_data",
+        "_event_data_json",
+        "_origin",
+        "_origin_db",
+        "_time_fired",
+        "_time_fired_db",
+    ]
+
+    def __init__(self, row):  # pylint: disable=super-init-not-called
+        """Initialize from a row, copying the raw column values."""
+        self.event_type = row.event_type
+        self._event_data_json = row.event_data
+        self._data = None
+        self._origin_db = row.origin
+        self._origin = None
+        self._time_fired_db = row.time_fired
+        self._time_fired = None
+        self._context_id = row.context_id
+        self._context_user_id = row.context_user_id
+        self._context = None
+
+    @property  # type: ignore
+    def data(self):
+        """Event data, parsed on first access."""
+        if self._data is None:
+            try:
+                self._data = json.loads(self._event_data_json)
+            except ValueError:
+                # When json.loads fails
+                _LOGGER.exception("Error converting to event: %s", self.event_type)
+                self._data = {}
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        """Set the event data."""
+        self._data = value
+
+    @property  # type: ignore
+    def origin(self):
+        """Event origin, converted on first access."""
+        if self._origin is None:
+            self._origin = EventOrigin(self._origin_db)
+        return self._origin
+
+    @origin.setter
+    def origin(self, value):
+        """Set the event origin."""
+        self._origin = value
+
+    @property  # type: ignore
+    def time_fired(self):
+        """Time fired, converted on first access."""
+        if self._time_fired is None:
+            self._time_fired = _process_timestamp(self._time_fired_db)
+        return self._time_fired
+
+    @time_fired.setter
+    def time_fired(self, value):
+        """Set the time fired."""
+        self._time_fired = value
+
+    @property  # type: ignore
+    def context(self):
+        """Event context, created on first access."""
+        if self._context is None:
+            self._context = Context(id=self._context_id, user_id=self._context_user_id)
+        return self._context
+
+    @context.setter
+    def context(self, value):
+        """Set the event context."""
+        self._context = value
+
+    def __eq__(self, other):
+        """Return the comparison, treating native events as equal."""
+        return (
+            isinstance(other, Event)
+            and self.event_type == other.event_type
+            and self.data == other.data
+            and self.origin == other.origin
+            and self.time_fired == other.time_fired
+            and self.context == other.context
+        )
+
+
+class LazyState(State):
+    """A state of a database row that only converts the fields it hands out.
+
+    History and logbook queries return a lot of rows of which only a few
+    fields are read, so attributes are parsed, timestamps are converted and
+    the context is created on first access. Entity ids are not validated
+    again, they were valid when they were recorded.
+    """
+
+    __slots__ = [
+        "_attributes",
+        "_attributes_json",
+        "_context",
+        "_context_id",
+        "_context_user_id",
+        "_last_changed",
+        "_last_changed_db",
+        "_last_updated",
+        "_last_updated_db",
+    ]
+
+    def __init__(self, row):  # pylint: disable=super-init-not-called
+        """Initialize from a States row, copying the raw column values."""
+        self.entity_id = row.entity_id
+        self.state = row.state
+        self._attributes_json = row.attributes
+        self._attributes = None
+        self._last_changed_db = row.last_changed or row.last_updated
+        self._last_changed = None
+        self._last_updated_db = row.last_updated
+        self._last_updated = None
+        self._context_id = row.context_id
+        self._context_user_id = row.context_user_id
+        self._context = None
+
+    @property  # type: ignore
+    def attributes(self):
+        """State attributes, parsed on first access."""
+        if self._attributes is None:
+            try:
+                attributes = json.loads(self._attributes_json)
+            except ValueError:
+                # When json.loads fails
+                _LOGGER.exception("Error converting row to state: %s", self.entity_id)
+                attributes = {}
+            self._attributes = MappingProxyType(attributes)
+        return self._attributes
+
+    @attributes.setter
+    def attributes(self, value):
+        """Set the state attributes."""
+        self._attributes = value
+
+    def attributes_may_contain(self, text):
+        """Return if the attributes may contain text, without parsing them."""
+        if self._attributes is not None or self._attributes_json is None:
+            return True
+        return text in self._attributes_json
+
+    def shared_attributes(self, cache):
+        """Return the attributes, parsing identical raw attributes only once.
+
+        cache maps raw attributes to parsed attributes and is shared by the
+        states that should reuse each other's attributes.
+        """
+        if self._attributes is None and self._attributes_json is not None:
+            attributes = cache.get(self._attributes_json)
+            if attributes is None:
+                attributes = cache[self._attributes_json] = self.attributes
+            self._attributes = attributes
+        return self.attributes
+
+    @property  # type: ignore
+    def context(self):
+        """State context, created on first access."""
+        if self._context is None:
+            self._context = Context(id=self._context_id, user_id=self._context_user_id)
+        return self._context
+
+    @context.setter
+    def context(self, value):
+        """Set the state context."""
+        self._context = value
+
+    @property  # type: ignore
+    def last_changed(self):
+        """Last changed datetime, converted on first access."""
+        if self._last_changed is None:
+            self._last_changed = _process_timestamp(self._last_changed_db)
+        return self._last_changed
+
+    @last_changed.setter
+    def last_changed(self, value):
+        """Set last changed datetime."""
+        self._last_changed = value
+
+    @property  # type: ignore
+    def last_updated(self):
+        """Last updated datetime, converted on first access."""
+        if self._last_updated is None:
+            self._last_updated = _process_timestamp(self._last_updated_db)
+        return self._last_updated
+
+    @last_updated.setter
+    def last_updated(self, value):
+        """Set last updated datetime."""
+        self._last_updated = value
+
+    def __eq__(self, other):
+        """Return the comparison, treating native states as equal."""
+        return (
+            isinstance(other, State)
+            and self.entity_id == other.entity_id
+            and self.state == other.state
+            and self.attributes == other.attributes
+            and self.context == other.context
+        )
+
+
 class RecorderRuns(Base):  # type: ignore
     """Representation of recorder run."""
 
@@ -169,8 +471,10 @@ class RecorderRuns(Base):  # type: ignore
 
         assert session is not None, "RecorderRuns need to be persisted"
 
-        query = session.query(distinct(States.entity_id)).filter(
-            States.last_updated >= self.start
+        query = (
+            session.query(distinct(Entities.entity_id))
+            .join(States, States.entity_row_id == Entities.entity_row_id)
+            .filter(States.last_updated >= self.start)
         )
 
         if point_in_time is not None:
@@ -0,0 +1,196 @@
+"""Preload recorded states of many entities with a single query."""
+import logging
+import time
+
+from sqlalchemy import literal, select, union_all
+from sqlalchemy.orm import join
+
+from homeassistant.loader import bind_hass
+
+from .models import Entities, LazyState, States
+from .util import read_session_scope
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_PRELOADER = "recorder_preloader"
+
+# SQLite allows at most 500 selects in a compound statement
+MAX_SELECTS_PER_QUERY = 200
+
+
+@bind_hass
+async def async_preload_states(
+    hass, entity_id, limit=None, start_time=None, changes_only=False
+):
+    """Return recorded states of an entity, oldest first.
+
+    Returns the `limit` most recent states, all states since `start_time` and
+    the state the entity had at `start_time`. With changes_only, states that
+    only changed attributes are left out.
+
+    Requests made in the same iteration of the event loop are read with a
+    single query, entities that are requested more than once are read once.
+    """
+    preloader = hass.data.get(DATA_PRELOADER)
+    if preloader is None:
+        preloader = hass.data[DATA_PRELOADER] = HistoryPreloader(hass)
+    states = await preloader.async_get_states(
+        entity_id.lower(), changes_only, limit, start_time
+    )
+    return _select_states(states, limit, start_time)
+
+
+class HistoryPreloader:
+    """Collect preload requests and read them from the database in bulk."""
+
+    def __init__(self, hass):
+        """Initialize the preloader."""
+        self.hass = hass
+        self._requests = {}
+
+    async def async_get_states(self, entity_id, changes_only, limit, start_time):
+        """Queue a request and wait for the states of its batch."""
+        key = (entity_id, changes_only)
+        request = self._requests.get(key)
+        if request is None:
+            if not self._requests:
+                self.hass.async_create_task(self._async_load())
+            request = self._requests[key] = [
+                limit,
+                start_time,
+                self.hass.loop.create_future(),
+            ]
+        else:
+            # Widen the shared request to cover this one too
+            if limit is not None and (request[0] is None or limit > request[0]):
+                request[0] = limit
+            if start_time is not None and (
+                request[1] is None or start_time < request[1]
+            ):
+                request[1] = start_time
+
+        return await request[2]
+
+    async def _async_load(self):
+        """Read the states of all queued requests."""
+        requests = self._requests
+        self._requests = {}
+
+        try:
+            states = await self.hass.async_add_executor_job(
+                _load_states, self.hass, {key: req[:2] for key, req in requests.items()}
+            )
+        except Exception as err:  # pylint: disable=broad-except
+            for _, _, future in requests.values():
+                if not future.done():
+                    future.set_exception(err)
+            return
+
+        for key, (_, _, future) in requests.items():
+            if not future.done():
+                future.set_result(states.get(key, []))
+
+
+def _states_select(entity_id, changes_only, index):
+    """Return a select of the states of an entity."""
+    query = (
+        select(
+            [
+                States.state_id,
+                Entities.entity_id,
+                States.state,
+                States.attributes,
+                States.last_changed,
+                States.last_updated,
+                States.context_id,
+                States.context_user_id,
+                literal(index).label("request"),
+            ]
+        )
+        .select_from(join(States, Entities))
+        .where(Entities.entity_id == entity_id)
+    )
+    if changes_only:
+        query = query.where(States.last_changed.is_(None))
+    return query
+
+
+def _request_selects(entity_id, changes_only, limit, start_time, index):
+    """Return the selects that together read the states of a request."""
+    selects = []
+    if limit is not None:
+        selects.append(
+            _states_select(entity_id, changes_only, index)
+            .order_by(States.last_updated.desc())
+            .limit(limit)
+        )
+    if start_time is not None:
+        selects.append(
+            _states_select(entity_id, changes_only, index).where(
+                States.last_updated >= start_time
+            )
+        )
+        selects.append(
+            _states_select(entity_id, changes_only, index)
+            .where(States.last_updated < start_time)
+            .order_by(States.last_updated.desc())
+            .limit(1)
+        )
+    return selects
+
+
+def _load_states(hass, requests):
+    """Read the states of the requests, keyed like the requests."""
+    timer_start = time.perf_counter()
+    keys = list(requests)
+    selects = []
+    for index, key in enumerate(keys):
+        limit, start_time = requests[key]
+        selects.extend(_request_selects(*key, limit, start_time, index))
+
+    rows = [{} for _ in keys]
+    with read_session_scope(hass=hass) as session:
+        for offset in range(0, len(selects), MAX_SELECTS_PER_QUERY):
+            # Every select has its own ORDER BY and LIMIT, so wrap them
+            query = union_all(
+                *(
+                    part.alias().select()
+                    for part in selects[offset : offset + MAX_SELECTS_PER_QUERY]
+                )
+            )
+            for row in session.execute(query):
+                rows[row.request][row.state_id] = row
+
+    result = {}
+    for key, key_rows in zip(keys, rows):
+        result[key] = [
+            LazyState(row)
+            for row in sorted(
+                key_rows.values(), key=lambda row: (row.last_updated, row.state_id)
+            )
+        ]
+
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        elapsed = time.perf_counter() - timer_start
+        _LOGGER.debug(
+            "preloading states of %d entities with %d selects took %fs",
+            len(keys),
+            len(selects),
+            elapsed,
+        )
+
+    return result
+
+
+def _select_states(states, limit, start_time):
+    """Return the states of a batch that a single request asked for."""
+    first = len(states)
+    if limit is not None:
+        first = max(first - limit, 0)
+    if start_time is not None:
+        since = len(states)
+        while since > 0 and states[since - 1].last_updated >= start_time:
+            since -= 1
+        # Include the state at start_time
+        first = min(first, max(since - 1, 0))
+    return states[first:]
@@ -6,6 +6,7 @@ import time
 from sqlalchemy.exc import OperationalError, SQLAlchemyError
 
 from .const import DATA_INSTANCE
+from .models import LazyState
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -37,6 +38,28 @@ def session_scope(*, hass=None, session=None):
         session.close()
 
 
+@contextmanager
+def read_session_scope(*, hass):
+    """Provide a scope for queries that only read from the database.
+
+    Sessions come from the read engine of the recorder and the number of
+    queries running at the same time is capped, so history and logbook
+    requests cannot starve the recorder of database time.
+    """
+    instance = hass.data[DATA_INSTANCE]
+    if instance.get_read_session is None:
+        raise RuntimeError("Session required")
+
+    with instance.read_semaphore:
+        timer_start = time.perf_counter()
+        try:
+            with session_scope(session=instance.get_read_session()) as session:
+                yield session
+        finally:
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug("read query took %fs", time.perf_counter() - timer_start)
+
+
 def commit(session, work):
     """Commit & retry work: Either a model or in a function."""
     for _ in range(0, RETRIES):
@@ -54,17 +77,23 @@ def commit(session, work):
     return False
 
 
-def execute(qry):
+def execute(qry, lazy=False):
     """Query the database and convert the objects to HA native form.
 
+    With lazy, rows of the states table are wrapped in a LazyState instead,
+    which only converts the fields that are used.
+
     This method also retries a few times in the case of stale connections.
     """
     for tryno in range(0, RETRIES):
         try:
             timer_start = time.perf_counter()
-            result = [
-                row for row in (row.to_native() for row in qry) if row is not None
-            ]
+            if lazy:
+                result = [LazyState(row) for row in qry]
+            else:
+                result = [
+                    row for row in (row.to_native() for row in qry) if row is not None
+                ]
 
             if _LOGGER.isEnabledFor(logging.DEBUG):
                 elapsed = time.perf_counter() - timer_start
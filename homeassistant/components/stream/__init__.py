@@ -2,6 +2,7 @@
 import logging
 import secrets
 import threading
+from timeit import default_timer as timer
 
 import voluptuous as vol
 
@@ -13,19 +14,53 @@ from homeassistant.loader import bind_hass
 
 from .const import (
     ATTR_ENDPOINTS,
+    ATTR_SETTINGS,
     ATTR_STREAMS,
     CONF_DURATION,
+    CONF_LL_HLS,
     CONF_LOOKBACK,
+    CONF_PART_DURATION,
+    CONF_SEGMENT_BUFFER,
     CONF_STREAM_SOURCE,
+    DEFAULT_PART_DURATION,
+    DEFAULT_SEGMENT_BUFFER,
     DOMAIN,
+    MAX_PART_DURATION,
+    MAX_SEGMENT_BUFFER,
+    MIN_PART_DURATION,
+    MIN_SEGMENT_BUFFER,
     SERVICE_RECORD,
+    STREAM_RESTART_BACKOFF_MAX,
+    STREAM_RESTART_BACKOFF_MIN,
+    STREAM_RESTART_RESET_TIME,
 )
 from .core import PROVIDERS
 from .hls import async_setup_hls
 
 _LOGGER = logging.getLogger(__name__)
 
-CONFIG_SCHEMA = vol.Schema({DOMAIN: vol.Schema({})}, extra=vol.ALLOW_EXTRA)
+CONFIG_SCHEMA = vol.Schema(
+    {
+        DOMAIN: vol.Schema(
+            {
+                vol.Optional(CONF_LL_HLS, default=False): cv.boolean,
+                vol.Optional(
+                    CONF_PART_DURATION, default=DEFAULT_PART_DURATION
+                ): vol.All(
+                    vol.Coerce(float),
+                    vol.Range(min=MIN_PART_DURATION, max=MAX_PART_DURATION),
+                ),
+                vol.Optional(
+                    CONF_SEGMENT_BUFFER, default=DEFAULT_SEGMENT_BUFFER
+                ): vol.All(
+                    vol.Coerce(int),
+                    vol.Range(min=MIN_SEGMENT_BUFFER, max=MAX_SEGMENT_BUFFER),
+                ),
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
 
 STREAM_SERVICE_SCHEMA = vol.Schema({vol.Required(CONF_STREAM_SOURCE): cv.string})
 
@@ -85,9 +120,16 @@ async def async_setup(hass, config):
     # pylint: disable=import-outside-toplevel
     from .recorder import async_setup_recorder
 
+    conf = config.get(DOMAIN) or {}
+
     hass.data[DOMAIN] = {}
     hass.data[DOMAIN][ATTR_ENDPOINTS] = {}
     hass.data[DOMAIN][ATTR_STREAMS] = {}
+    hass.data[DOMAIN][ATTR_SETTINGS] = {
+        CONF_LL_HLS: conf.get(CONF_LL_HLS, False),
+        CONF_PART_DURATION: conf.get(CONF_PART_DURATION, DEFAULT_PART_DURATION),
+        CONF_SEGMENT_BUFFER: conf.get(CONF_SEGMENT_BUFFER, DEFAULT_SEGMENT_BUFFER),
+    }
 
     # Setup HLS
     hls_endpoint = async_setup_hls(hass)
@@ -127,6 +169,8 @@ class Stream:
         self.options = options
         self.keepalive = keepalive
         self.access_token = None
+        # Sequence of the last segment completed by the worker
+        self.sequence = 0
         self._thread = None
         self._thread_quit = None
         self._outputs = {}
@@ -162,20 +206,42 @@ class Stream:
 
     def start(self):
         """Start a stream."""
-        # Keep import here so that we can import stream integration without installing reqs
-        # pylint: disable=import-outside-toplevel
-        from .worker import stream_worker
-
         if self._thread is None or not self._thread.isAlive():
             self._thread_quit = threading.Event()
             self._thread = threading.Thread(
                 name="stream_worker",
-                target=stream_worker,
-                args=(self.hass, self, self._thread_quit),
+                target=self._run_worker,
+                args=(self._thread_quit,),
             )
             self._thread.start()
             _LOGGER.info("Started stream: %s", self.source)
 
+    def _run_worker(self, quit_event):
+        """Run the worker, reconnecting with backoff while kept alive."""
+        # Keep import here so that we can import stream integration without installing reqs
+        # pylint: disable=import-outside-toplevel
+        from .worker import stream_worker
+
+        backoff = STREAM_RESTART_BACKOFF_MIN
+        while not quit_event.is_set():
+            start_time = timer()
+            stream_worker(self.hass, self, quit_event)
+            if quit_event.is_set() or not self.keepalive:
+                break
+
+            if timer() - start_time > STREAM_RESTART_RESET_TIME:
+                backoff = STREAM_RESTART_BACKOFF_MIN
+            _LOGGER.warning(
+                "Stream %s ended, reconnecting in %s seconds", self.source, backoff
+            )
+            quit_event.wait(backoff)
+            backoff = min(backoff * 2, STREAM_RESTART_BACKOFF_MAX)
+
+        if not quit_event.is_set():
+            # Stream ended for good, clear listeners
+            for output in list(self._outputs.values()):
+                self.hass.loop.call_soon_threadsafe(output.put, None)
+
     def stop(self):
         """Remove outputs and access token."""
         self._outputs = {}
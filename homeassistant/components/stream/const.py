@@ -4,10 +4,14 @@ DOMAIN = "stream"
 CONF_STREAM_SOURCE = "stream_source"
 CONF_LOOKBACK = "lookback"
 CONF_DURATION = "duration"
+CONF_LL_HLS = "ll_hls"
+CONF_PART_DURATION = "part_duration"
+CONF_SEGMENT_BUFFER = "segment_buffer"
 
 ATTR_ENDPOINTS = "endpoints"
 ATTR_STREAMS = "streams"
 ATTR_KEEPALIVE = "keepalive"
+ATTR_SETTINGS = "settings"
 
 SERVICE_RECORD = "record"
 
@@ -16,3 +20,15 @@ OUTPUT_FORMATS = ["hls"]
 FORMAT_CONTENT_TYPE = {"hls": "application/vnd.apple.mpegurl"}
 
 AUDIO_SAMPLE_RATE = 44100
+
+DEFAULT_PART_DURATION = 1.0  # seconds
+MIN_PART_DURATION = 0.2  # seconds
+MAX_PART_DURATION = 5.0  # seconds
+
+DEFAULT_SEGMENT_BUFFER = 3
+MIN_SEGMENT_BUFFER = 3
+MAX_SEGMENT_BUFFER = 30
+
+STREAM_RESTART_BACKOFF_MIN = 1  # seconds
+STREAM_RESTART_BACKOFF_MAX = 60  # seconds
+STREAM_RESTART_RESET_TIME = 300  # seconds
@@ -2,7 +2,7 @@
 import asyncio
 from collections import deque
 import io
-from typing import Any, List
+from typing import Any, Dict, List, Optional
 
 from aiohttp import web
 import attr
@@ -17,16 +17,75 @@ from .const import ATTR_STREAMS, DOMAIN
 PROVIDERS = Registry()
 
 
+class FragmentBuffer:
+    """Writable file collecting fragmented MP4 output from the muxer.
+
+    Complete boxes are split off the front of the buffer as they arrive: the
+    ftyp and moov boxes form the init segment, a moof box and its mdat form
+    a fragment. Boxes are only split off once they are complete, a moof
+    stays in the buffer until its mdat was written. The buffer is not
+    seekable so the muxer never rewrites data that was already handed out.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the buffer."""
+        self._data = bytearray()
+        self.init: Optional[bytes] = None
+
+    def write(self, data: bytes) -> int:
+        """Append muxer output."""
+        self._data.extend(data)
+        return len(data)
+
+    def pop_fragments(self) -> List[bytes]:
+        """Return the fragments completed since the last call."""
+        data = self._data
+        fragments = []
+        start = pos = 0
+
+        while len(data) - pos >= 8:
+            size = int.from_bytes(data[pos : pos + 4], "big")
+            if size == 1:
+                if len(data) - pos < 16:
+                    break
+                size = int.from_bytes(data[pos + 8 : pos + 16], "big")
+            if size < 8 or len(data) - pos < size:
+                break
+
+            box_type = bytes(data[pos + 4 : pos + 8])
+            pos += size
+            if box_type == b"moov":
+                self.init = bytes(data[start:pos])
+                start = pos
+            elif box_type == b"mdat":
+                fragments.append(bytes(data[start:pos]))
+                start = pos
+            elif box_type == b"mfra":
+                start = pos
+
+        del data[:start]
+        return fragments
+
+
 @attr.s
 class StreamBuffer:
     """Represent a segment."""
 
-    segment = attr.ib(type=io.BytesIO)
+    segment = attr.ib()  # type=io.BytesIO or FragmentBuffer
     output = attr.ib()  # type=av.OutputContainer
     vstream = attr.ib()  # type=av.VideoStream
     astream = attr.ib(default=None)  # type=av.AudioStream
 
 
+@attr.s
+class Part:
+    """Represent a part of a fragmented MP4 segment."""
+
+    duration = attr.ib(type=float)
+    independent = attr.ib(type=bool)
+    data = attr.ib(type=bytes)
+
+
 @attr.s
 class Segment:
     """Represent a segment."""
@@ -34,6 +93,17 @@ class Segment:
     sequence = attr.ib(type=int)
     segment = attr.ib(type=io.BytesIO)
     duration = attr.ib(type=float)
+    init = attr.ib(type=bytes, default=None)
+    # Identifies the init segment of a fragmented MP4 segment
+    generation = attr.ib(type=int, default=0)
+    parts = attr.ib(type=list, factory=list)
+    discontinuity = attr.ib(type=bool, default=False)
+
+    def get_bytes(self) -> bytes:
+        """Return the media data of the segment."""
+        if self.segment is not None:
+            return self.segment.getvalue()
+        return b"".join(part.data for part in self.parts)
 
 
 class StreamOutput:
@@ -50,6 +120,11 @@ class StreamOutput:
         self._event = asyncio.Event()
         self._segments = deque(maxlen=self.num_segments)
         self._unsub = None
+        self._ended = False
+        self._inits: Dict[int, bytes] = {}
+        self._part_sequence = None
+        self._parts: List[Part] = []
+        self._part_event = asyncio.Event()
 
     @property
     def name(self) -> str:
@@ -71,6 +146,11 @@ class StreamOutput:
         """Return desired video codec."""
         return None
 
+    @property
+    def part_duration(self) -> Optional[float]:
+        """Return the target duration of partial segments, if enabled."""
+        return None
+
     @property
     def segments(self) -> List[int]:
         """Return current sequence from segments."""
@@ -78,9 +158,58 @@ class StreamOutput:
 
     @property
     def target_duration(self) -> int:
-        """Return the average duration of the segments in seconds."""
-        durations = [s.duration for s in self._segments]
-        return round(sum(durations) // len(self._segments)) or 1
+        """Return the longest rounded duration of the segments in seconds."""
+        return max((round(s.duration) for s in self._segments), default=0) or 1
+
+    def get_init(self, generation: int) -> Optional[bytes]:
+        """Return an init segment of a fragmented MP4 output."""
+        return self._inits.get(generation)
+
+    @property
+    def part_generation(self) -> Optional[int]:
+        """Return the init segment generation of the latest parts."""
+        return max(self._inits, default=None)
+
+    @property
+    def part_sequence(self) -> Optional[int]:
+        """Return the sequence of the segment that is being written."""
+        return self._part_sequence
+
+    @property
+    def parts(self) -> List[Part]:
+        """Return the parts of the segment that is being written."""
+        return self._parts
+
+    def get_part(self, sequence: int, index: int) -> Optional[Part]:
+        """Retrieve a part of a finished or in progress segment."""
+        if sequence == self._part_sequence:
+            parts = self._parts
+        else:
+            segment = self.get_segment(sequence)
+            if segment is None:
+                return None
+            parts = segment.parts
+
+        if index < len(parts):
+            return parts[index]
+        return None
+
+    def has_part(self, sequence: int, index: Optional[int] = None) -> bool:
+        """Return if a segment, or a part of it, is available."""
+        if max(self.segments, default=0) >= sequence:
+            return True
+        if index is None or self._part_sequence is None:
+            return False
+        if self._part_sequence > sequence:
+            return True
+        return self._part_sequence == sequence and len(self._parts) > index
+
+    async def async_wait_for_part(
+        self, sequence: int, index: Optional[int] = None
+    ) -> None:
+        """Wait until a segment, or a part of it, is available."""
+        while not self._ended and not self.has_part(sequence, index):
+            await self._part_event.wait()
 
     def get_segment(self, sequence: int = None) -> Any:
         """Retrieve a specific segment, or the whole list."""
@@ -121,7 +250,9 @@ class StreamOutput:
             )
 
         if segment is None:
+            self._ended = True
             self._event.set()
+            self._part_event.set()
             # Cleanup provider
             if self._unsub is not None:
                 self._unsub()
@@ -129,8 +260,32 @@ class StreamOutput:
             return
 
         self._segments.append(segment)
+        # Drop init segments no segment refers to anymore
+        for generation in list(self._inits):
+            if generation < self._segments[0].generation:
+                del self._inits[generation]
+        if segment.sequence == self._part_sequence:
+            self._part_sequence = None
+            self._parts = []
         self._event.set()
         self._event.clear()
+        self._part_event.set()
+        self._part_event.clear()
+
+    @callback
+    def put_init(self, generation: int, init: bytes) -> None:
+        """Store the init segment of the segments of a generation."""
+        self._inits[generation] = init
+
+    @callback
+    def put_part(self, sequence: int, part: Part) -> None:
+        """Store a part of the segment that is being written."""
+        if sequence != self._part_sequence:
+            self._part_sequence = sequence
+            self._parts = []
+        self._parts.append(part)
+        self._part_event.set()
+        self._part_event.clear()
 
     @callback
     def _timeout(self, _now=None):
@@ -145,6 +300,7 @@ class StreamOutput:
     def cleanup(self):
         """Handle cleanup."""
         self._segments = deque(maxlen=self.num_segments)
+        self._inits = {}
         self._stream.remove_provider(self)
 
 
@@ -159,7 +315,7 @@ class StreamView(HomeAssistantView):
     requires_auth = False
     platform = None
 
-    async def get(self, request, token, sequence=None):
+    async def get(self, request, token, sequence=None, part_num=None):
         """Start a GET request."""
         hass = request.app["hass"]
 
@@ -178,8 +334,8 @@ class StreamView(HomeAssistantView):
         # Start worker if not already started
         stream.start()
 
-        return await self.handle(request, stream, sequence)
+        return await self.handle(request, stream, sequence, part_num)
 
-    async def handle(self, request, stream, sequence):
+    async def handle(self, request, stream, sequence, part_num=None):
         """Handle the stream request."""
         raise NotImplementedError()
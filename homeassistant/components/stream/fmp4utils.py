@@ -0,0 +1,159 @@
+"""Utilities to help convert mp4s to fmp4s."""
+from typing import Iterator, NamedTuple, Optional, Tuple
+
+# Sample flag marking a sample that is not a sync sample (keyframe)
+SAMPLE_IS_NON_SYNC = 0x10000
+
+
+class VideoTrack(NamedTuple):
+    """Video track of a fragmented MP4 init segment."""
+
+    track_id: int
+    timescale: int
+    default_sample_duration: int = 0
+    default_sample_flags: int = 0
+
+
+class FragmentTiming(NamedTuple):
+    """Timing of the video samples in a moof/mdat fragment."""
+
+    start: float
+    duration: float
+    keyframe: bool
+
+
+def iter_boxes(
+    data: bytes, start: int = 0, end: Optional[int] = None
+) -> Iterator[Tuple[bytes, int, int]]:
+    """Yield type, payload start and end of the complete boxes in data."""
+    end = len(data) if end is None else end
+    pos = start
+    while end - pos >= 8:
+        size = int.from_bytes(data[pos : pos + 4], "big")
+        header = 8
+        if size == 1:
+            if end - pos < 16:
+                return
+            size = int.from_bytes(data[pos + 8 : pos + 16], "big")
+            header = 16
+        elif size == 0:
+            # Box extends to the end of the data
+            size = end - pos
+        if size < header or end - pos < size:
+            return
+        yield bytes(data[pos + 4 : pos + 8]), pos + header, pos + size
+        pos += size
+
+
+def find_box(
+    data: bytes, path: Tuple[bytes, ...], start: int = 0, end: Optional[int] = None
+) -> Iterator[Tuple[int, int]]:
+    """Yield payload start and end of the boxes at path, ie (b"moov", b"trak")."""
+    for box_type, payload, box_end in iter_boxes(data, start, end):
+        if box_type != path[0]:
+            continue
+        if len(path) == 1:
+            yield payload, box_end
+        else:
+            yield from find_box(data, path[1:], payload, box_end)
+
+
+def _uint(data: bytes, pos: int, size: int = 4) -> int:
+    """Read a big endian unsigned integer."""
+    return int.from_bytes(data[pos : pos + size], "big")
+
+
+def get_video_track(init: bytes) -> Optional[VideoTrack]:
+    """Return the video track described by an init segment."""
+    for trak, trak_end in find_box(init, (b"moov", b"trak")):
+        handler = next(find_box(init, (b"mdia", b"hdlr"), trak, trak_end), None)
+        # Full box header, pre_defined, handler_type
+        if handler is None or init[handler[0] + 8 : handler[0] + 12] != b"vide":
+            continue
+
+        tkhd = next(find_box(init, (b"tkhd",), trak, trak_end), None)
+        mdhd = next(find_box(init, (b"mdia", b"mdhd"), trak, trak_end), None)
+        if tkhd is None or mdhd is None:
+            return None
+        # Creation and modification times are 64 bit in version 1
+        times = 16 if init[tkhd[0]] == 1 else 8
+        track_id = _uint(init, tkhd[0] + 4 + times)
+        times = 16 if init[mdhd[0]] == 1 else 8
+        timescale = _uint(init, mdhd[0] + 4 + times)
+
+        for trex, _ in find_box(init, (b"moov", b"mvex", b"trex")):
+            if _uint(init, trex + 4) == track_id:
+                return VideoTrack(
+                    track_id, timescale, _uint(init, trex + 12), _uint(init, trex + 20)
+                )
+        return VideoTrack(track_id, timescale)
+
+    return None
+
+
+def get_fragment_timing(fragment: bytes, track: VideoTrack) -> Optional[FragmentTiming]:
+    """Return the timing of the video samples in a fragment.
+
+    Returns None if the fragment has no samples of the video track.
+    """
+    for traf, traf_end in find_box(fragment, (b"moof", b"traf")):
+        tfhd = next(find_box(fragment, (b"tfhd",), traf, traf_end), None)
+        if tfhd is None or _uint(fragment, tfhd[0] + 4) != track.track_id:
+            continue
+
+        tf_flags = _uint(fragment, tfhd[0] + 1, 3)
+        pos = tfhd[0] + 8
+        # Skip base data offset and sample description index
+        pos += 8 if tf_flags & 0x1 else 0
+        pos += 4 if tf_flags & 0x2 else 0
+        default_duration = track.default_sample_duration
+        if tf_flags & 0x8:
+            default_duration = _uint(fragment, pos)
+            pos += 4
+        pos += 4 if tf_flags & 0x10 else 0
+        default_flags = track.default_sample_flags
+        if tf_flags & 0x20:
+            default_flags = _uint(fragment, pos)
+
+        base_time = 0
+        tfdt = next(find_box(fragment, (b"tfdt",), traf, traf_end), None)
+        if tfdt is not None:
+            base_time = _uint(fragment, tfdt[0] + 4, 8 if fragment[tfdt[0]] else 4)
+
+        duration = 0
+        keyframe = None
+        for trun, _ in find_box(fragment, (b"trun",), traf, traf_end):
+            tr_flags = _uint(fragment, trun + 1, 3)
+            count = _uint(fragment, trun + 4)
+            pos = trun + 8
+            pos += 4 if tr_flags & 0x1 else 0
+            first_flags = None
+            if tr_flags & 0x4:
+                first_flags = _uint(fragment, pos)
+                pos += 4
+            sample_size = 4 * bin(tr_flags & 0xF00).count("1")
+
+            for index in range(count):
+                sample_duration = default_duration
+                sample_flags = default_flags
+                field = pos
+                if tr_flags & 0x100:
+                    sample_duration = _uint(fragment, field)
+                    field += 4
+                field += 4 if tr_flags & 0x200 else 0
+                if tr_flags & 0x400:
+                    sample_flags = _uint(fragment, field)
+                if index == 0 and first_flags is not None:
+                    sample_flags = first_flags
+                if keyframe is None:
+                    keyframe = not sample_flags & SAMPLE_IS_NON_SYNC
+                duration += sample_duration
+                pos += sample_size
+
+        if keyframe is None:
+            return None
+        return FragmentTiming(
+            base_time / track.timescale, duration / track.timescale, keyframe
+        )
+
+    return None
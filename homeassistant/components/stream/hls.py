@@ -1,18 +1,33 @@
 """Provide functionality to stream HLS."""
+import asyncio
+from contextlib import suppress
+
 from aiohttp import web
 
 from homeassistant.core import callback
 from homeassistant.util.dt import utcnow
 
-from .const import FORMAT_CONTENT_TYPE
+from .const import (
+    ATTR_SETTINGS,
+    CONF_LL_HLS,
+    CONF_PART_DURATION,
+    CONF_SEGMENT_BUFFER,
+    DOMAIN,
+    FORMAT_CONTENT_TYPE,
+)
 from .core import PROVIDERS, StreamOutput, StreamView
 
+MEDIA_CONTENT_TYPE = {"mpegts": "video/mp2t", "mp4": "video/mp4"}
+
 
 @callback
 def async_setup_hls(hass):
     """Set up api endpoints."""
     hass.http.register_view(HlsPlaylistView())
+    hass.http.register_view(HlsInitView())
     hass.http.register_view(HlsSegmentView())
+    hass.http.register_view(HlsFragmentedSegmentView())
+    hass.http.register_view(HlsPartView())
     return "/api/hls/{}/playlist.m3u8"
 
 
@@ -23,7 +38,7 @@ class HlsPlaylistView(StreamView):
     name = "api:stream:hls:playlist"
     cors_allowed = True
 
-    async def handle(self, request, stream, sequence):
+    async def handle(self, request, stream, sequence, part_num=None):
         """Return m3u8 playlist."""
         renderer = M3U8Renderer(stream)
         track = stream.add_provider("hls")
@@ -31,27 +46,93 @@ class HlsPlaylistView(StreamView):
         # Wait for a segment to be ready
         if not track.segments:
             await track.recv()
+
+        # Blocking playlist reload of low latency HLS
+        msn = request.query.get("_HLS_msn")
+        if msn is not None and track.part_duration:
+            try:
+                msn = int(msn)
+                part = request.query.get("_HLS_part")
+                if part is not None:
+                    part = int(part)
+            except ValueError:
+                raise web.HTTPBadRequest()
+
+            if msn > max(track.segments, default=0) + 2:
+                raise web.HTTPBadRequest()
+
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    track.async_wait_for_part(msn, part),
+                    timeout=3 * track.target_duration,
+                )
+
         headers = {"Content-Type": FORMAT_CONTENT_TYPE["hls"]}
         return web.Response(
             body=renderer.render(track, utcnow()).encode("utf-8"), headers=headers
         )
 
 
+class HlsInitView(StreamView):
+    """Stream view to serve a fragmented MP4 init segment."""
+
+    url = r"/api/hls/{token:[a-f0-9]+}/init/{sequence:\d+}.mp4"
+    name = "api:stream:hls:init"
+    cors_allowed = True
+
+    async def handle(self, request, stream, sequence, part_num=None):
+        """Return init segment of a generation."""
+        track = stream.add_provider("hls")
+        init = track.get_init(int(sequence))
+        if init is None:
+            return web.HTTPNotFound()
+        headers = {"Content-Type": MEDIA_CONTENT_TYPE["mp4"]}
+        return web.Response(body=init, headers=headers)
+
+
 class HlsSegmentView(StreamView):
     """Stream view to serve a MPEG2TS segment."""
 
     url = r"/api/hls/{token:[a-f0-9]+}/segment/{sequence:\d+}.ts"
     name = "api:stream:hls:segment"
     cors_allowed = True
+    format = "mpegts"
 
-    async def handle(self, request, stream, sequence):
-        """Return mpegts segment."""
+    async def handle(self, request, stream, sequence, part_num=None):
+        """Return segment."""
         track = stream.add_provider("hls")
+        if track.format != self.format:
+            return web.HTTPNotFound()
         segment = track.get_segment(int(sequence))
         if not segment:
             return web.HTTPNotFound()
-        headers = {"Content-Type": "video/mp2t"}
-        return web.Response(body=segment.segment.getvalue(), headers=headers)
+        headers = {"Content-Type": MEDIA_CONTENT_TYPE[self.format]}
+        return web.Response(body=segment.get_bytes(), headers=headers)
+
+
+class HlsFragmentedSegmentView(HlsSegmentView):
+    """Stream view to serve a fragmented MP4 segment."""
+
+    url = r"/api/hls/{token:[a-f0-9]+}/segment/{sequence:\d+}.m4s"
+    name = "api:stream:hls:fragmented_segment"
+    format = "mp4"
+
+
+class HlsPartView(StreamView):
+    """Stream view to serve a part of a fragmented MP4 segment."""
+
+    url = r"/api/hls/{token:[a-f0-9]+}/segment/{sequence:\d+}.{part_num:\d+}.m4s"
+    name = "api:stream:hls:part"
+    cors_allowed = True
+
+    async def handle(self, request, stream, sequence, part_num=None):
+        """Return fragmented MP4 part."""
+        track = stream.add_provider("hls")
+        part = track.get_part(int(sequence), int(part_num))
+        if not part:
+            return web.HTTPNotFound()
+        headers = {"Content-Type": MEDIA_CONTENT_TYPE["mp4"]}
+        return web.Response(body=part.data, headers=headers)
 
 
 class M3U8Renderer:
@@ -64,7 +145,46 @@ class M3U8Renderer:
     @staticmethod
     def render_preamble(track):
         """Render preamble."""
-        return ["#EXT-X-VERSION:3", f"#EXT-X-TARGETDURATION:{track.target_duration}"]
+        if not track.part_duration:
+            return [
+                "#EXT-X-VERSION:3",
+                f"#EXT-X-TARGETDURATION:{track.target_duration}",
+            ]
+
+        part_target = max(
+            [track.part_duration]
+            + [part.duration for part in track.parts]
+            + [
+                part.duration
+                for segment in track.get_segment()
+                for part in segment.parts
+            ]
+        )
+        return [
+            "#EXT-X-VERSION:9",
+            f"#EXT-X-TARGETDURATION:{track.target_duration}",
+            "#EXT-X-SERVER-CONTROL:CAN-BLOCK-RELOAD=YES,"
+            "PART-HOLD-BACK={:.03f}".format(3 * part_target),
+            "#EXT-X-PART-INF:PART-TARGET={:.03f}".format(part_target),
+        ]
+
+    @staticmethod
+    def render_parts(sequence, parts):
+        """Render the partial segments of a segment."""
+        return [
+            '#EXT-X-PART:DURATION={:.03f},URI="./segment/{}.{}.m4s"{}'.format(
+                part.duration,
+                sequence,
+                index,
+                ",INDEPENDENT=YES" if part.independent else "",
+            )
+            for index, part in enumerate(parts)
+        ]
+
+    @staticmethod
+    def render_map(generation):
+        """Render the init segment of the following segments."""
+        return f'#EXT-X-MAP:URI="./init/{generation}.mp4"'
 
     @staticmethod
     def render_playlist(track, start_time):
@@ -74,17 +194,35 @@ class M3U8Renderer:
         if not segments:
             return []
 
+        fragmented = track.format == "mp4"
+        extension = "m4s" if fragmented else "ts"
         playlist = ["#EXT-X-MEDIA-SEQUENCE:{}".format(segments[0])]
+        generation = None
 
         for sequence in segments:
             segment = track.get_segment(sequence)
+            if segment.discontinuity:
+                playlist.append("#EXT-X-DISCONTINUITY")
+            if fragmented and segment.generation != generation:
+                generation = segment.generation
+                playlist.append(M3U8Renderer.render_map(generation))
+            if track.part_duration:
+                playlist.extend(M3U8Renderer.render_parts(sequence, segment.parts))
             playlist.extend(
                 [
                     "#EXTINF:{:.04f},".format(float(segment.duration)),
-                    f"./segment/{segment.sequence}.ts",
+                    f"./segment/{segment.sequence}.{extension}",
                 ]
             )
 
+        # Parts of a new init segment are listed once their segment is done
+        if (
+            track.part_duration
+            and track.part_sequence is not None
+            and track.part_generation == generation
+        ):
+            playlist.extend(M3U8Renderer.render_parts(track.part_sequence, track.parts))
+
         return playlist
 
     def render(self, track, start_time):
@@ -101,6 +239,13 @@ class M3U8Renderer:
 class HlsStreamOutput(StreamOutput):
     """Represents HLS Output formats."""
 
+    def __init__(self, stream, timeout: int = 300) -> None:
+        """Initialize HLS output."""
+        self._settings = stream.hass.data[DOMAIN].get(ATTR_SETTINGS, {})
+        # Segments kept around so new clients can start playback right away
+        self.num_segments = self._settings.get(CONF_SEGMENT_BUFFER, self.num_segments)
+        super().__init__(stream, timeout)
+
     @property
     def name(self) -> str:
         """Return provider name."""
@@ -108,7 +253,12 @@ class HlsStreamOutput(StreamOutput):
 
     @property
     def format(self) -> str:
-        """Return container format."""
+        """Return container format.
+
+        Low latency HLS needs parts, so it uses fragmented MP4.
+        """
+        if self._settings.get(CONF_LL_HLS):
+            return "mp4"
         return "mpegts"
 
     @property
@@ -120,3 +270,10 @@ class HlsStreamOutput(StreamOutput):
     def video_codec(self) -> str:
         """Return desired video codec."""
         return "h264"
+
+    @property
+    def part_duration(self) -> float:
+        """Return the target duration of partial segments, if enabled."""
+        if not self._settings.get(CONF_LL_HLS):
+            return None
+        return self._settings[CONF_PART_DURATION]
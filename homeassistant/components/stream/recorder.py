@@ -1,5 +1,5 @@
 """Provide functionality to record stream."""
-
+import io
 import threading
 from typing import List
 
@@ -21,9 +21,15 @@ def recorder_save_worker(file_out: str, segments: List[Segment]):
     output_v = None
 
     for segment in segments:
-        # Seek to beginning and open segment
-        segment.segment.seek(0)
-        source = av.open(segment.segment, "r", format="mpegts")
+        if segment.segment is None:
+            # Fragmented MP4 segment, e.g. looked back from the HLS output
+            source = av.open(
+                io.BytesIO(segment.init + segment.get_bytes()), "r", format="mp4"
+            )
+        else:
+            # Seek to beginning and open segment
+            segment.segment.seek(0)
+            source = av.open(segment.segment, "r", format="mpegts")
         source_v = source.streams.video[0]
 
         # Add output streams
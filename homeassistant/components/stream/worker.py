@@ -6,7 +6,8 @@ import logging
 import av
 
 from .const import AUDIO_SAMPLE_RATE
-from .core import Segment, StreamBuffer
+from .core import FragmentBuffer, Part, Segment, StreamBuffer
+from .fmp4utils import get_fragment_timing, get_video_track
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -28,8 +29,19 @@ def create_stream_buffer(stream_output, video_stream, audio_frame):
     """Create a new StreamBuffer."""
 
     a_packet = None
-    segment = io.BytesIO()
-    output = av.open(segment, mode="w", format=stream_output.format)
+    if stream_output.format == "mp4":
+        # A single fragmented MP4 output is kept for the whole stream
+        segment = FragmentBuffer()
+        options = {
+            "movflags": "empty_moov+default_base_moof+frag_keyframe",
+            "flush_packets": "1",
+        }
+        if stream_output.part_duration:
+            options["frag_duration"] = str(int(stream_output.part_duration * 1e6))
+    else:
+        segment = io.BytesIO()
+        options = {}
+    output = av.open(segment, mode="w", format=stream_output.format, options=options)
     vstream = output.add_stream(template=video_stream)
     # Check if audio is requested
     astream = None
@@ -43,10 +55,99 @@ def create_stream_buffer(stream_output, video_stream, audio_frame):
     return (a_packet, StreamBuffer(segment, output, vstream, astream))
 
 
+class FragmentedOutput:
+    """Split the fragments of a fragmented MP4 output into segments and parts."""
+
+    def __init__(self, hass, stream_output, buffer, sequence, discontinuity=False):
+        """Initialize the fragmented output."""
+        self._hass = hass
+        self.stream_output = stream_output
+        self.buffer = buffer
+        self.started = False
+        self.sequence = sequence
+        # The segments of this output share an init segment, numbered by
+        # the first segment so each reconnect gets a new generation
+        self._generation = sequence
+        self._track = None
+        self._parts = []
+        self._discontinuity = discontinuity
+
+    def publish(self):
+        """Hand the fragments completed by the muxer to the stream output.
+
+        Packets are interleaved before they are written, so fragments can
+        come out several packets after they ended. Their boundaries are
+        therefore read from the fragments themselves: every fragment is a
+        part and a fragment starting with a keyframe starts a new segment.
+        """
+        buffer = self.buffer.segment
+        fragments = buffer.pop_fragments()
+        if not fragments:
+            return
+
+        if self._track is None:
+            self._track = get_video_track(buffer.init)
+            self._hass.loop.call_soon_threadsafe(
+                self.stream_output.put_init, self._generation, buffer.init
+            )
+
+        for fragment in fragments:
+            timing = None
+            if self._track is not None:
+                timing = get_fragment_timing(fragment, self._track)
+
+            if timing is None:
+                # No video samples, only audio
+                part = Part(duration=0.0, independent=False, data=fragment)
+            else:
+                if timing.keyframe and self._parts:
+                    self._put_segment()
+                part = Part(
+                    duration=timing.duration,
+                    independent=timing.keyframe,
+                    data=fragment,
+                )
+
+            self._parts.append(part)
+            self._hass.loop.call_soon_threadsafe(
+                self.stream_output.put_part, self.sequence, part
+            )
+
+    def close(self):
+        """Close the muxer and hand out the last segment."""
+        self.buffer.output.close()
+        self.publish()
+        if self._parts:
+            self._put_segment()
+
+    def _put_segment(self):
+        """Hand the parts collected so far to the stream output as a segment."""
+        self._hass.loop.call_soon_threadsafe(
+            self.stream_output.put,
+            Segment(
+                self.sequence,
+                None,
+                sum(part.duration for part in self._parts),
+                init=self.buffer.segment.init,
+                generation=self._generation,
+                parts=self._parts,
+                discontinuity=self._discontinuity,
+            ),
+        )
+        self._parts = []
+        self._discontinuity = False
+        self.sequence += 1
+
+
 def stream_worker(hass, stream, quit_event):
     """Handle consuming streams."""
 
-    container = av.open(stream.source, options=stream.options)
+    try:
+        container = av.open(stream.source, options=stream.options)
+    except av.AVError as ex:
+        _LOGGER.error("Error opening stream %s: %s", stream.source, str(ex))
+        return
+
     try:
         video_stream = container.streams.video[0]
     except (KeyError, IndexError):
@@ -58,8 +159,14 @@ def stream_worker(hass, stream, quit_event):
     first_packet = True
     # Holds the buffers for each stream provider
     outputs = {}
-    # Keep track of the number of segments we've processed
-    sequence = 1
+    # Holds the fragmented MP4 outputs, they are kept across segments
+    fragmented = {}
+    # Keep track of the number of segments we've processed, continuing the
+    # numbering of a previous connection so playlists stay valid
+    sequence = stream.sequence + 1
+    # Timestamps start over when reconnecting
+    discontinuity = stream.sequence > 0
+    first_sequence = sequence
     # Holds the generated silence that needs to be muxed into the output
     audio_packets = {}
     # The presentation timestamp of the first video packet we receive
@@ -76,9 +183,7 @@ def stream_worker(hass, stream, quit_event):
                 # If we get a "flushing" packet, the stream is done
                 raise StopIteration("No dts in packet")
         except (av.AVError, StopIteration) as ex:
-            # End of stream, clear listeners and stop thread
-            for fmt, _ in outputs.items():
-                hass.loop.call_soon_threadsafe(stream.outputs[fmt].put, None)
+            # End of stream, the caller decides whether to reconnect
             _LOGGER.error("Error demuxing stream: %s", str(ex))
             break
 
@@ -97,7 +202,9 @@ def stream_worker(hass, stream, quit_event):
             # timestamp by the time base, which gets us total seconds.
             # By then dividing by the sequence, we can calculate how long
             # each segment is, assuming the stream starts from 0.
-            segment_duration = (packet.pts * packet.time_base) / sequence
+            segment_duration = (packet.pts * packet.time_base) / (
+                sequence - first_sequence + 1
+            )
             # Save segment to outputs
             for fmt, buffer in outputs.items():
                 buffer.output.close()
@@ -105,24 +212,48 @@ def stream_worker(hass, stream, quit_event):
                 if stream.outputs.get(fmt):
                     hass.loop.call_soon_threadsafe(
                         stream.outputs[fmt].put,
-                        Segment(sequence, buffer.segment, segment_duration),
+                        Segment(
+                            sequence,
+                            buffer.segment,
+                            segment_duration,
+                            discontinuity=discontinuity and sequence == first_sequence,
+                        ),
                     )
 
             # Clear outputs and increment sequence
             outputs = {}
             if not first_packet:
+                stream.sequence = sequence
                 sequence += 1
 
+            # Drop fragmented outputs of providers that went away
+            for fmt in list(fragmented):
+                if stream.outputs.get(fmt) is not fragmented[fmt].stream_output:
+                    buffer = fragmented.pop(fmt).buffer
+                    buffer.output.close()
+                    audio_packets.pop(buffer.astream, None)
+
             # Initialize outputs
             for stream_output in stream.outputs.values():
                 if video_stream.name != stream_output.video_codec:
                     continue
+                if stream_output.name in fragmented:
+                    continue
 
                 a_packet, buffer = create_stream_buffer(
                     stream_output, video_stream, audio_frame
                 )
                 audio_packets[buffer.astream] = a_packet
-                outputs[stream_output.name] = buffer
+                if stream_output.format == "mp4":
+                    fragmented[stream_output.name] = FragmentedOutput(
+                        hass,
+                        stream_output,
+                        buffer,
+                        sequence,
+                        discontinuity and sequence == first_sequence,
+                    )
+                else:
+                    outputs[stream_output.name] = buffer
 
         # First video packet tends to have a weird dts/pts
         if first_packet:
@@ -137,7 +268,13 @@ def stream_worker(hass, stream, quit_event):
             first_packet = False
 
         # Store packets on each output
-        for buffer in outputs.values():
+        buffers = [(buffer, packet.is_keyframe) for buffer in outputs.values()]
+        for output in fragmented.values():
+            # Fragmented outputs only sync audio on their first packet
+            buffers.append((output.buffer, not output.started))
+            output.started = True
+
+        for buffer, sync_audio in buffers:
             # Check if the format requires audio
             if audio_packets.get(buffer.astream):
                 a_packet = audio_packets[buffer.astream]
@@ -147,7 +284,7 @@ def stream_worker(hass, stream, quit_event):
                 video_start = packet.pts * packet.time_base
                 video_duration = packet.duration * packet.time_base
 
-                if packet.is_keyframe:
+                if sync_audio:
                     # Set first audio packet in sequence to equal video pts
                     a_packet.pts = int(video_start / a_time_base)
                     a_packet.dts = int(video_start / a_time_base)
@@ -164,3 +301,12 @@ def stream_worker(hass, stream, quit_event):
             # Assign the video packet to the new stream & mux
             packet.stream = buffer.vstream
             buffer.output.mux(packet)
+
+        # Hand completed fragments to the fragmented outputs
+        for output in fragmented.values():
+            output.publish()
+
+    # Flush the segments still being written by the fragmented outputs
+    for output in fragmented.values():
+        output.close()
+        stream.sequence = max(stream.sequence, output.sequence - 1)
@@ -19,12 +19,15 @@ def async_register_commands(hass, async_reg):
     """Register commands."""
     async_reg(hass, handle_subscribe_events)
     async_reg(hass, handle_unsubscribe_events)
+    async_reg(hass, handle_subscribe_entities)
+    async_reg(hass, handle_update_entities_subscription)
     async_reg(hass, handle_call_service)
     async_reg(hass, handle_get_states)
     async_reg(hass, handle_get_services)
     async_reg(hass, handle_get_config)
     async_reg(hass, handle_ping)
     async_reg(hass, handle_render_template)
+    async_reg(hass, handle_supported_features)
 
 
 def pong_message(iden):
@@ -73,7 +76,7 @@ def handle_subscribe_events(hass, connection, msg):
             if event.event_type == EVENT_TIME_CHANGED:
                 return
 
-            connection.send_message(messages.event_message(msg["id"], event.as_dict()))
+            connection.send_message(messages.event_message(msg["id"], event))
 
     connection.subscriptions[msg["id"]] = hass.bus.async_listen(
         event_type, forward_events
@@ -107,6 +110,162 @@ def handle_unsubscribe_events(hass, connection, msg):
         )
 
 
+class EntitiesSubscription:
+    """Forward compact state changes of entities to a websocket connection.
+
+    Calling the subscription unsubscribes it, so it can be stored in the
+    subscriptions of the connection.
+    """
+
+    def __init__(self, hass, connection, iden, entity_ids):
+        """Initialize the subscription."""
+        self.hass = hass
+        self.connection = connection
+        self.iden = iden
+        self.entity_ids = entity_ids
+        self._unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, self._forward)
+
+    def __call__(self):
+        """Stop forwarding state changes."""
+        self._unsub()
+
+    @callback
+    def async_states(self, entity_ids=None):
+        """Return the visible states of the given or all subscribed entities."""
+        if entity_ids is None:
+            entity_ids = self.entity_ids
+
+        if entity_ids is None:
+            states = self.hass.states.async_all()
+        else:
+            states = filter(None, map(self.hass.states.get, entity_ids))
+
+        if not self.connection.user.permissions.access_all_entities(POLICY_READ):
+            entity_perm = self.connection.user.permissions.check_entity
+            states = [
+                state for state in states if entity_perm(state.entity_id, POLICY_READ)
+            ]
+
+        return {
+            state.entity_id: messages.compressed_state_dict(state) for state in states
+        }
+
+    @callback
+    def _forward(self, event):
+        """Forward a state change as a compact diff."""
+        entity_id = event.data["entity_id"]
+        if self.entity_ids is not None and entity_id not in self.entity_ids:
+            return
+
+        if not self.connection.user.permissions.check_entity(entity_id, POLICY_READ):
+            return
+
+        old_state = event.data["old_state"]
+        new_state = event.data["new_state"]
+        if new_state is None:
+            change = {const.ENTITY_EVENT_REMOVE: [entity_id]}
+        elif old_state is None:
+            change = {
+                const.ENTITY_EVENT_ADD: {
+                    entity_id: messages.compressed_state_dict(new_state)
+                }
+            }
+        else:
+            change = {
+                const.ENTITY_EVENT_CHANGE: {
+                    entity_id: messages.compressed_state_diff(old_state, new_state)
+                }
+            }
+
+        self.connection.send_message(messages.event_message(self.iden, change))
+
+
+@callback
+@decorators.websocket_command(
+    {
+        vol.Required("type"): "subscribe_entities",
+        vol.Optional("entity_ids"): cv.entity_ids,
+    }
+)
+def handle_subscribe_entities(hass, connection, msg):
+    """Handle subscribe entities command.
+
+    Sends a compact snapshot of the entities followed by per entity diffs.
+
+    Async friendly.
+    """
+    entity_ids = msg.get("entity_ids")
+    subscription = EntitiesSubscription(
+        hass, connection, msg["id"], None if entity_ids is None else set(entity_ids)
+    )
+    connection.subscriptions[msg["id"]] = subscription
+
+    connection.send_result(msg["id"])
+    connection.send_message(
+        messages.event_message(
+            msg["id"], {const.ENTITY_EVENT_ADD: subscription.async_states()}
+        )
+    )
+
+
+@callback
+@decorators.websocket_command(
+    {
+        vol.Required("type"): "update_entities_subscription",
+        vol.Required("subscription"): cv.positive_int,
+        vol.Optional("entity_ids"): cv.entity_ids,
+    }
+)
+def handle_update_entities_subscription(hass, connection, msg):
+    """Handle changing the entities of an entities subscription.
+
+    Entities that are no longer subscribed are reported as removed and newly
+    subscribed entities are sent in full.
+
+    Async friendly.
+    """
+    subscription = connection.subscriptions.get(msg["subscription"])
+
+    if not isinstance(subscription, EntitiesSubscription):
+        connection.send_message(
+            messages.error_message(
+                msg["id"], const.ERR_NOT_FOUND, "Subscription not found."
+            )
+        )
+        return
+
+    all_entity_ids = set(hass.states.async_entity_ids())
+    old_entity_ids = subscription.entity_ids
+    if old_entity_ids is None:
+        old_entity_ids = all_entity_ids
+
+    entity_ids = msg.get("entity_ids")
+    if entity_ids is not None:
+        entity_ids = set(entity_ids)
+    subscription.entity_ids = entity_ids
+    if entity_ids is None:
+        entity_ids = all_entity_ids
+
+    added = entity_ids - old_entity_ids
+    entity_perm = connection.user.permissions.check_entity
+    removed = sorted(
+        entity_id
+        for entity_id in old_entity_ids - entity_ids
+        if entity_perm(entity_id, POLICY_READ)
+    )
+
+    connection.send_result(msg["id"])
+
+    change = {}
+    states = subscription.async_states(added)
+    if states:
+        change[const.ENTITY_EVENT_ADD] = states
+    if removed:
+        change[const.ENTITY_EVENT_REMOVE] = removed
+    if change:
+        connection.send_message(messages.event_message(subscription.iden, change))
+
+
 @decorators.websocket_command(
     {
         vol.Required("type"): "call_service",
@@ -252,3 +411,16 @@ def handle_render_template(hass, connection, msg):
 
     connection.send_result(msg["id"])
     state_listener()
+
+
+@callback
+@decorators.websocket_command(
+    {vol.Required("type"): "supported_features", vol.Required("features"): {str: int}}
+)
+def handle_supported_features(hass, connection, msg):
+    """Handle setting the features supported by the client.
+
+    Async friendly.
+    """
+    connection.supported_features = msg["features"]
+    connection.send_result(msg["id"])
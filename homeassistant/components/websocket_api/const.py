@@ -19,7 +19,13 @@ WebSocketCommandHandler = Callable[
 
 DOMAIN = "websocket_api"
 URL = "/api/websocket"
-MAX_PENDING_MSG = 512
+# Size of the outgoing backlog at which a client is disconnected
+MAX_PENDING_SIZE = 4 * 1024 * 1024
+# Size of the outgoing backlog above which a client is considered behind and
+# pending state changes are coalesced
+COALESCE_PENDING_SIZE = 256 * 1024
+# Size up to which pending messages are combined into one frame
+MAX_FRAME_SIZE = 64 * 1024
 
 ERR_ID_REUSE = "id_reuse"
 ERR_INVALID_FORMAT = "invalid_format"
@@ -32,6 +38,23 @@ ERR_TIMEOUT = "timeout"
 
 TYPE_RESULT = "result"
 
+# Features a client can enable with the supported_features command
+FEATURE_COALESCE_MESSAGES = "coalesce_messages"
+
+# Keys of the compact state representation of subscribe_entities
+COMPRESSED_STATE_STATE = "s"
+COMPRESSED_STATE_ATTRIBUTES = "a"
+COMPRESSED_STATE_CONTEXT = "c"
+COMPRESSED_STATE_LAST_CHANGED = "lc"
+COMPRESSED_STATE_LAST_UPDATED = "lu"
+
+# Keys of subscribe_entities event messages
+ENTITY_EVENT_ADD = "a"
+ENTITY_EVENT_CHANGE = "c"
+ENTITY_EVENT_REMOVE = "r"
+DIFF_ADDITIONS = "+"
+DIFF_REMOVALS = "-"
+
 # Define the possible errors that occur when connections are cancelled.
 # Originally, this was just asyncio.CancelledError, but issue #9546 showed
 # that futures.CancelledErrors can also occur in some situations.
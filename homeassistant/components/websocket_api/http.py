@@ -1,33 +1,165 @@
 """View to accept incoming websocket connection."""
 import asyncio
+from collections import deque
 from contextlib import suppress
 import logging
-from typing import Optional
+from typing import Any, Deque, Dict, Hashable, List, Optional
 
 from aiohttp import WSMsgType, web
 import async_timeout
+import attr
 
 from homeassistant.components.http import HomeAssistantView
-from homeassistant.const import EVENT_HOMEASSISTANT_STOP
-from homeassistant.core import callback
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, EVENT_STATE_CHANGED
+from homeassistant.core import Event, callback
 
 from .auth import AuthPhase, auth_required_message
 from .const import (
     CANCELLATION_ERRORS,
+    COALESCE_PENDING_SIZE,
     DATA_CONNECTIONS,
     ERR_UNKNOWN_ERROR,
+    FEATURE_COALESCE_MESSAGES,
     JSON_DUMP,
-    MAX_PENDING_MSG,
+    MAX_FRAME_SIZE,
+    MAX_PENDING_SIZE,
     SIGNAL_WEBSOCKET_CONNECTED,
     SIGNAL_WEBSOCKET_DISCONNECTED,
     URL,
 )
 from .error import Disconnect
-from .messages import error_message
+from .messages import error_message, event_message
 
 # mypy: allow-untyped-calls, allow-untyped-defs, no-check-untyped-defs
 
 
+@attr.s(slots=True)
+class PendingMessage:
+    """Represent a serialized message waiting to be sent."""
+
+    text = attr.ib(type=str)
+    key = attr.ib(type=Optional[Hashable], default=None)
+    old_state = attr.ib(type=Any, default=None)
+
+
+def _coalesce_key(message):
+    """Return the key of messages that supersede each other, if any."""
+    if not isinstance(message, dict):
+        return None
+    event = message.get("event")
+    if isinstance(event, Event) and event.event_type == EVENT_STATE_CHANGED:
+        return (message["id"], event.data["entity_id"])
+    return None
+
+
+class OutboundQueue:
+    """Buffer the messages waiting to be sent to a client.
+
+    Once the backlog exceeds coalesce_size, or if the client enabled
+    coalescing, a state changed event replaces a pending state changed event
+    of the same entity and subscription, so a client that falls behind only
+    receives the latest state. A client that keeps up receives every state
+    change. The backlog is limited by its size instead of the number of
+    messages.
+    """
+
+    def __init__(self, max_size: int, coalesce_size: int) -> None:
+        """Initialize the queue."""
+        self.max_size = max_size
+        self.coalesce_size = coalesce_size
+        self._messages: Deque[PendingMessage] = deque()
+        self._keyed: Dict[Hashable, PendingMessage] = {}
+        self._ready = asyncio.Event()
+        self.closing = False
+        # Backlog metrics
+        self.size = 0
+        self.peak_size = 0
+        self.coalesced = 0
+        self.sent = 0
+        self.frames = 0
+
+    def __len__(self) -> int:
+        """Return the number of pending messages."""
+        return len(self._messages)
+
+    @callback
+    def put(self, message, coalesce: bool = False) -> bool:
+        """Queue a message, return False if the backlog exceeds its size.
+
+        With coalesce, the message replaces a pending message it supersedes
+        even if the client is not behind.
+
+        Raises ValueError or TypeError if the message cannot be serialized.
+        """
+        key = _coalesce_key(message)
+        pending = None
+        if key is not None and (coalesce or self.size > self.coalesce_size):
+            pending = self._keyed.get(key)
+
+        if pending is None:
+            text = message if isinstance(message, str) else JSON_DUMP(message)
+            pending = PendingMessage(text, key)
+            if key is not None:
+                # Later messages can only replace the latest pending one
+                pending.old_state = message["event"].data["old_state"]
+                self._keyed[key] = pending
+            self._messages.append(pending)
+            self.size += len(text)
+        else:
+            event = message["event"]
+            text = JSON_DUMP(
+                event_message(
+                    message["id"],
+                    Event(
+                        event.event_type,
+                        {**event.data, "old_state": pending.old_state},
+                        event.origin,
+                        event.time_fired,
+                        event.context,
+                    ),
+                )
+            )
+            self.size += len(text) - len(pending.text)
+            pending.text = text
+            self.coalesced += 1
+
+        self.peak_size = max(self.peak_size, self.size)
+        self._ready.set()
+        return self.size <= self.max_size
+
+    @callback
+    def close(self) -> None:
+        """Stop the writer once the pending messages are sent."""
+        self.closing = True
+        self._ready.set()
+
+    async def async_get(self, batch: bool) -> List[str]:
+        """Wait for and return pending messages, an empty list when closed.
+
+        With batch multiple messages are returned, up to the maximum size of
+        a frame.
+        """
+        while not self._messages:
+            if self.closing:
+                return []
+            self._ready.clear()
+            await self._ready.wait()
+
+        texts = []
+        frame_size = 0
+        while self._messages and (not texts or (batch and frame_size < MAX_FRAME_SIZE)):
+            pending = self._messages.popleft()
+            if pending.key is not None and self._keyed.get(pending.key) is pending:
+                del self._keyed[pending.key]
+            texts.append(pending.text)
+            frame_size += len(pending.text)
+
+        self.size -= frame_size
+        self.sent += len(texts)
+        self.frames += 1
+        return texts
+
+
 class WebsocketAPIView(HomeAssistantView):
     """View to serve a websockets endpoint."""
 
@@ -48,9 +180,10 @@ class WebSocketHandler:
         self.hass = hass
         self.request = request
         self.wsock: Optional[web.WebSocketResponse] = None
-        self._to_write: asyncio.Queue = asyncio.Queue(maxsize=MAX_PENDING_MSG)
+        self._to_write = OutboundQueue(MAX_PENDING_SIZE, COALESCE_PENDING_SIZE)
         self._handle_task = None
         self._writer_task = None
+        self._connection = None
         self._logger = logging.getLogger("{}.connection.{}".format(__name__, id(self)))
 
     async def _writer(self):
@@ -58,44 +191,47 @@ class WebSocketHandler:
         # Exceptions if Socket disconnected or cancelled by connection handler
         with suppress(RuntimeError, ConnectionResetError, *CANCELLATION_ERRORS):
             while not self.wsock.closed:
-                message = await self._to_write.get()
-                if message is None:
+                texts = await self._to_write.async_get(self._coalesce_messages)
+                if not texts:
                     break
 
-                self._logger.debug("Sending %s", message)
+                self._logger.debug("Sending %s", texts)
 
-                if isinstance(message, str):
-                    await self.wsock.send_str(message)
-                    continue
+                if len(texts) == 1:
+                    await self.wsock.send_str(texts[0])
+                else:
+                    await self.wsock.send_str("[" + ",".join(texts) + "]")
 
-                try:
-                    dumped = JSON_DUMP(message)
-                except (ValueError, TypeError) as err:
-                    self._logger.error(
-                        "Unable to serialize to JSON: %s\n%s", err, message
-                    )
-                    await self.wsock.send_json(
-                        error_message(
-                            message["id"], ERR_UNKNOWN_ERROR, "Invalid JSON in response"
-                        )
-                    )
-                    continue
-
-                await self.wsock.send_str(dumped)
+    @property
+    def _coalesce_messages(self):
+        """Return if the client enabled coalescing pending messages."""
+        return self._connection is not None and bool(
+            self._connection.supported_features.get(FEATURE_COALESCE_MESSAGES)
+        )
 
     @callback
     def _send_message(self, message):
         """Send a message to the client.
 
-        Closes connection if the client is not reading the messages.
+        Closes connection if the backlog of the client grows too large.
 
         Async friendly.
         """
         try:
-            self._to_write.put_nowait(message)
-        except asyncio.QueueFull:
+            within_budget = self._to_write.put(message, self._coalesce_messages)
+        except (ValueError, TypeError) as err:
+            self._logger.error("Unable to serialize to JSON: %s\n%s", err, message)
+            within_budget = self._to_write.put(
+                error_message(
+                    message["id"], ERR_UNKNOWN_ERROR, "Invalid JSON in response"
+                )
+            )
+
+        if not within_budget:
             self._logger.error(
-                "Client exceeded max pending messages [2]: %s", MAX_PENDING_MSG
+                "Client exceeded max pending size of %s bytes with %s messages",
+                MAX_PENDING_SIZE,
+                len(self._to_write),
             )
             self._cancel()
 
@@ -159,7 +295,7 @@ class WebSocketHandler:
                 raise Disconnect
 
             self._logger.debug("Received %s", msg_data)
-            connection = await auth.async_handle(msg_data)
+            connection = self._connection = await auth.async_handle(msg_data)
             self.hass.data[DATA_CONNECTIONS] = (
                 self.hass.data.get(DATA_CONNECTIONS, 0) + 1
             )
@@ -202,15 +338,23 @@ class WebSocketHandler:
             if connection is not None:
                 connection.async_close()
 
-            try:
-                self._to_write.put_nowait(None)
+            if self._to_write.size > self._to_write.max_size:
+                self._writer_task.cancel()
+            else:
+                self._to_write.close()
                 # Make sure all error messages are written before closing
                 await self._writer_task
-            except asyncio.QueueFull:
-                self._writer_task.cancel()
 
             await wsock.close()
 
+            self._logger.debug(
+                "Sent %s messages in %s frames, coalesced %s, peak backlog %s bytes",
+                self._to_write.sent,
+                self._to_write.frames,
+                self._to_write.coalesced,
+                self._to_write.peak_size,
+            )
+
             if disconnect_warn is None:
                 self._logger.debug("Disconnected")
             else:
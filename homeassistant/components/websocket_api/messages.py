@@ -36,3 +36,51 @@ def error_message(iden, code, message):
 def event_message(iden, event):
     """Return an event message."""
     return {"id": iden, "type": "event", "event": event}
+
+
+def compressed_state_dict(state):
+    """Return a compact representation of a state.
+
+    Timestamps are epoch floats and last_updated is only sent when it
+    differs from last_changed.
+    """
+    compressed = {
+        const.COMPRESSED_STATE_STATE: state.state,
+        const.COMPRESSED_STATE_ATTRIBUTES: dict(state.attributes),
+        const.COMPRESSED_STATE_CONTEXT: state.context.id,
+        const.COMPRESSED_STATE_LAST_CHANGED: state.last_changed.timestamp(),
+    }
+    if state.last_updated != state.last_changed:
+        compressed[const.COMPRESSED_STATE_LAST_UPDATED] = state.last_updated.timestamp()
+    return compressed
+
+
+def compressed_state_diff(old_state, new_state):
+    """Return the difference between two states in compact form."""
+    additions = {
+        const.COMPRESSED_STATE_CONTEXT: new_state.context.id,
+        const.COMPRESSED_STATE_LAST_UPDATED: new_state.last_updated.timestamp(),
+    }
+    diff = {const.DIFF_ADDITIONS: additions}
+
+    if old_state.state != new_state.state:
+        additions[const.COMPRESSED_STATE_STATE] = new_state.state
+    if old_state.last_changed != new_state.last_changed:
+        additions[
+            const.COMPRESSED_STATE_LAST_CHANGED
+        ] = new_state.last_changed.timestamp()
+
+    old_attributes = old_state.attributes
+    new_attributes = new_state.attributes
+    changed = {
+        key: value
+        for key, value in new_attributes.items()
+        if key not in old_attributes or old_attributes[key] != value
+    }
+    if changed:
+        additions[const.COMPRESSED_STATE_ATTRIBUTES] = changed
+    removed = [key for key in old_attributes if key not in new_attributes]
+    if removed:
+        diff[const.DIFF_REMOVALS] = {const.COMPRESSED_STATE_ATTRIBUTES: removed}
+
+    return diff
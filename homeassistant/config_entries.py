@@ -2,6 +2,7 @@
 import asyncio
 import functools
 import logging
+from timeit import default_timer as timer
 from typing import Any, Callable, Dict, List, Optional, Set, Union, cast
 import uuid
 import weakref
@@ -9,6 +10,7 @@ import weakref
 import attr
 
 from homeassistant import data_entry_flow, loader
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError
 from homeassistant.helpers import entity_registry
@@ -45,8 +47,14 @@ PATH_CONFIG = ".config_entries.json"
 
 SAVE_DELAY = 1
 
+# How long setting up a domain waits for its config entries, slower entries
+# continue to set up in the background
+ENTRY_SETUP_TIMEOUT = 30  # seconds
+
 # The config entry has been set up successfully
 ENTRY_STATE_LOADED = "loaded"
+# The config entry is being set up
+ENTRY_STATE_SETUP_IN_PROGRESS = "setup_in_progress"
 # There was an error while trying to set up this config entry
 ENTRY_STATE_SETUP_ERROR = "setup_error"
 # There was an error while trying to migrate the config entry to a new version
@@ -179,6 +187,9 @@ class ConfigEntry:
         if integration is None:
             integration = await loader.async_get_integration(hass, self.domain)
 
+        if self.domain == integration.domain:
+            self.state = ENTRY_STATE_SETUP_IN_PROGRESS
+
         try:
             component = integration.get_component()
         except ImportError as err:
@@ -192,6 +203,8 @@ class ConfigEntry:
                 self.state = ENTRY_STATE_SETUP_ERROR
             return
 
+        start = timer()
+
         if self.domain == integration.domain:
             try:
                 integration.get_platform("config_flow")
@@ -239,12 +252,21 @@ class ConfigEntry:
                 wait_time, setup_again
             )
             return
+        except asyncio.CancelledError:
+            raise
         except Exception:  # pylint: disable=broad-except
             _LOGGER.exception(
                 "Error setting up entry %s for %s", self.title, integration.domain
             )
             result = False
 
+        _LOGGER.info(
+            "Setup of config entry %s for %s took %.2f seconds",
+            self.title,
+            integration.domain,
+            timer() - start,
+        )
+
         # Only store setup result as state if it was not forwarded.
         if self.domain != integration.domain:
             return
@@ -553,8 +575,12 @@ class ConfigEntries:
         self.options = OptionsFlowManager(hass)
         self._hass_config = hass_config
         self._entries: List[ConfigEntry] = []
+        self._setup_tasks: Dict[str, asyncio.Task] = {}
         self._store = hass.helpers.storage.Store(STORAGE_VERSION, STORAGE_KEY)
         EntityRegistryDisabledHandler(hass).async_setup()
+        hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, self._async_cancel_setup_tasks
+        )
 
     @callback
     def async_domains(self) -> List[str]:
@@ -584,6 +610,81 @@ class ConfigEntries:
             return list(self._entries)
         return [entry for entry in self._entries if entry.domain == domain]
 
+    async def async_setup_domain_entries(
+        self, domain: str, integration: loader.Integration
+    ) -> None:
+        """Set up all config entries of a domain concurrently.
+
+        Returns when all entries are done or after ENTRY_SETUP_TIMEOUT, so a
+        slow entry does not hold up the setup of the rest of Home Assistant.
+        Entries that are not done yet continue to set up in the background,
+        use async_wait_domain_entries to wait for them.
+        """
+        entries = self.async_entries(domain)
+
+        if not entries:
+            return
+
+        tasks = {
+            self._async_create_setup_task(entry, integration): entry
+            for entry in entries
+        }
+        _, pending = await asyncio.wait(list(tasks), timeout=ENTRY_SETUP_TIMEOUT)
+
+        for task in pending:
+            entry = tasks[task]
+            _LOGGER.warning(
+                "Setup of config entry %s for %s is taking over %s seconds, "
+                "continuing in the background",
+                entry.title,
+                entry.domain,
+                ENTRY_SETUP_TIMEOUT,
+            )
+
+    async def async_wait_domain_entries(self, domain: str) -> None:
+        """Wait for the config entries of a domain that are still setting up."""
+        tasks = [
+            self._setup_tasks[entry.entry_id]
+            for entry in self.async_entries(domain)
+            if entry.entry_id in self._setup_tasks
+        ]
+        if tasks:
+            await asyncio.wait(tasks)
+
+    @callback
+    def _async_create_setup_task(
+        self, entry: ConfigEntry, integration: Optional[loader.Integration] = None
+    ) -> asyncio.Task:
+        """Set up an entry in a task that is cancelled when Home Assistant stops."""
+        task = self.hass.async_create_task(self._async_setup_entry(entry, integration))
+        self._setup_tasks[entry.entry_id] = task
+
+        @callback
+        def setup_done(_: asyncio.Future) -> None:
+            """Stop tracking the setup task."""
+            if self._setup_tasks.get(entry.entry_id) is task:
+                del self._setup_tasks[entry.entry_id]
+
+        task.add_done_callback(setup_done)
+        return task
+
+    async def _async_setup_entry(
+        self, entry: ConfigEntry, integration: Optional[loader.Integration]
+    ) -> None:
+        """Set up an entry, it is not loaded if the setup is cancelled."""
+        try:
+            await entry.async_setup(self.hass, integration=integration)
+        except asyncio.CancelledError:
+            if entry.state == ENTRY_STATE_SETUP_IN_PROGRESS:
+                entry.state = ENTRY_STATE_NOT_LOADED
+            raise
+
+    @callback
+    def _async_cancel_setup_tasks(self, _: Event) -> None:
+        """Cancel config entries that are still setting up."""
+        for task in list(self._setup_tasks.values()):
+            task.cancel()
+
     async def async_add(self, entry: ConfigEntry) -> None:
         """Add and setup an entry."""
         self._entries.append(entry)
@@ -673,12 +774,17 @@ class ConfigEntries:
         if entry is None:
             raise UnknownEntry
 
+        setup_task = self._setup_tasks.get(entry_id)
+        if setup_task is not None:
+            await asyncio.wait([setup_task])
+            return entry.state == ENTRY_STATE_LOADED
+
         if entry.state != ENTRY_STATE_NOT_LOADED:
             raise OperationNotAllowed
 
         # Setup Component if not set up yet
         if entry.domain in self.hass.config.components:
-            await entry.async_setup(self.hass)
+            await self._async_create_setup_task(entry)
         else:
             # Setting up the component will set up all its config entries
             result = await async_setup_component(
@@ -688,6 +794,10 @@ class ConfigEntries:
             if not result:
                 return result
 
+            setup_task = self._setup_tasks.get(entry_id)
+            if setup_task is not None:
+                await asyncio.wait([setup_task])
+
         return entry.state == ENTRY_STATE_LOADED
 
     async def async_unload(self, entry_id: str) -> bool:
@@ -700,6 +810,11 @@ class ConfigEntries:
         if entry.state in UNRECOVERABLE_STATES:
             raise OperationNotAllowed
 
+        setup_task = self._setup_tasks.get(entry_id)
+        if setup_task is not None:
+            # Let the setup finish, so it does not load the entry afterwards
+            await asyncio.wait([setup_task])
+
         return await entry.async_unload(self.hass)
 
     async def async_reload(self, entry_id: str) -> bool:
@@ -5,7 +5,9 @@ Home Assistant is a Home Automation framework for observing the state
 of entities and react to changes.
 """
 import asyncio
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import datetime
 import enum
 import functools
@@ -22,10 +24,13 @@ from typing import (
     Callable,
     Coroutine,
     Dict,
+    Iterable,
+    Iterator,
     List,
     Mapping,
     Optional,
     Set,
+    Tuple,
     TypeVar,
 )
 import uuid
@@ -87,6 +92,9 @@ DOMAIN = "homeassistant"
 # How long we wait for the result of a service call
 SERVICE_CALL_LIMIT = 10  # seconds
 
+# How many validated payloads are remembered per service
+SERVICE_SCHEMA_CACHE_SIZE = 128
+
 # Source of core configuration
 SOURCE_DISCOVERED = "discovered"
 SOURCE_STORAGE = "storage"
@@ -103,6 +111,7 @@ def split_entity_id(entity_id: str) -> List[str]:
     return entity_id.split(".", 1)
 
 
+@functools.lru_cache(maxsize=4096)
 def valid_entity_id(entity_id: str) -> bool:
     """Test if an entity ID is a valid format.
 
@@ -510,12 +519,27 @@ class Event:
         )
 
 
+def _match_listeners(
+    listeners: Dict[str, List[Callable]], event_type: str
+) -> List[Callable]:
+    """Return the listeners that should receive an event type."""
+    matched = listeners.get(event_type, [])
+
+    # EVENT_HOMEASSISTANT_CLOSE should go only to his listeners
+    match_all_listeners = listeners.get(MATCH_ALL)
+    if match_all_listeners is not None and event_type != EVENT_HOMEASSISTANT_CLOSE:
+        matched = match_all_listeners + matched
+
+    return matched
+
+
 class EventBus:
     """Allow the firing of and listening for events."""
 
     def __init__(self, hass: HomeAssistant) -> None:
         """Initialize a new event bus."""
         self._listeners: Dict[str, List[Callable]] = {}
+        self._batch_listeners: Dict[str, List[Callable]] = {}
         self._hass = hass
 
     @callback
@@ -524,7 +548,10 @@ class EventBus:
 
         This method must be run in the event loop.
         """
-        return {key: len(self._listeners[key]) for key in self._listeners}
+        counts = {key: len(self._listeners[key]) for key in self._listeners}
+        for key, listeners in self._batch_listeners.items():
+            counts[key] = counts.get(key, 0) + len(listeners)
+        return counts
 
     @property
     def listeners(self) -> Dict[str, int]:
@@ -557,24 +584,58 @@ class EventBus:
 
         This method must be run in the event loop.
         """
-        listeners = self._listeners.get(event_type, [])
-
-        # EVENT_HOMEASSISTANT_CLOSE should go only to his listeners
-        match_all_listeners = self._listeners.get(MATCH_ALL)
-        if match_all_listeners is not None and event_type != EVENT_HOMEASSISTANT_CLOSE:
-            listeners = match_all_listeners + listeners
+        listeners = _match_listeners(self._listeners, event_type)
 
         event = Event(event_type, event_data, origin, None, context)
 
         if event_type != EVENT_TIME_CHANGED:
             _LOGGER.debug("Bus:Handling %s", event)
 
+        if self._batch_listeners:
+            for func in _match_listeners(self._batch_listeners, event_type):
+                self._hass.async_add_job(func, [event])
+
         if not listeners:
             return
 
         for func in listeners:
             self._hass.async_add_job(func, event)
 
+    @callback
+    def async_fire_batch(
+        self,
+        event_type: str,
+        batch: Iterable[Tuple[Optional[Dict], Optional[Context]]],
+        origin: EventOrigin = EventOrigin.local,
+    ) -> None:
+        """Fire a batch of events of the same type.
+
+        The batch is an iterable of (event_data, context) tuples. All events
+        share the same time fired. Regular listeners are called once per
+        event, batch listeners once with the list of events.
+
+        This method must be run in the event loop.
+        """
+        time_fired = dt_util.utcnow()
+        events = [
+            Event(event_type, event_data, origin, time_fired, context)
+            for event_data, context in batch
+        ]
+
+        if not events:
+            return
+
+        if event_type != EVENT_TIME_CHANGED:
+            for event in events:
+                _LOGGER.debug("Bus:Handling %s", event)
+
+        for func in _match_listeners(self._batch_listeners, event_type):
+            self._hass.async_add_job(func, events)
+
+        for func in _match_listeners(self._listeners, event_type):
+            for event in events:
+                self._hass.async_add_job(func, event)
+
     def listen(self, event_type: str, listener: Callable) -> CALLBACK_TYPE:
         """Listen for all events or events of a specific type.
 
@@ -611,6 +672,26 @@ class EventBus:
 
         return remove_listener
 
+    @callback
+    def async_listen_batch(self, event_type: str, listener: Callable) -> CALLBACK_TYPE:
+        """Listen for events, receiving events fired together as one list.
+
+        The listener is called with a list of events. Events fired on their
+        own are delivered as a list with a single event.
+
+        To listen to all events specify the constant ``MATCH_ALL``
+        as event_type.
+
+        This method must be run in the event loop.
+        """
+        self._batch_listeners.setdefault(event_type, []).append(listener)
+
+        def remove_listener() -> None:
+            """Remove the listener."""
+            self._async_remove_listener(event_type, listener, self._batch_listeners)
+
+        return remove_listener
+
     def listen_once(self, event_type: str, listener: Callable) -> CALLBACK_TYPE:
         """Listen once for event of a specific type.
 
@@ -658,17 +739,25 @@ class EventBus:
         return self.async_listen(event_type, onetime_listener)
 
     @callback
-    def _async_remove_listener(self, event_type: str, listener: Callable) -> None:
+    def _async_remove_listener(
+        self,
+        event_type: str,
+        listener: Callable,
+        listeners: Optional[Dict[str, List[Callable]]] = None,
+    ) -> None:
         """Remove a listener of a specific event_type.
 
         This method must be run in the event loop.
         """
+        if listeners is None:
+            listeners = self._listeners
+
         try:
-            self._listeners[event_type].remove(listener)
+            listeners[event_type].remove(listener)
 
             # delete event_type list if empty
-            if not self._listeners[event_type]:
-                self._listeners.pop(event_type)
+            if not listeners[event_type]:
+                listeners.pop(event_type)
         except (KeyError, ValueError):
             # KeyError is key event_type listener did not exist
             # ValueError if listener did not exist within event_type
@@ -829,6 +918,18 @@ class StateMachine:
         self._states: Dict[str, State] = {}
         self._bus = bus
         self._loop = loop
+        self._batch: Optional[List[Tuple[Dict, Optional[Context]]]] = None
+        # Task that opened the batch, None if it was opened by a callback
+        self._batch_task: Optional[asyncio.Task] = None
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        """Return a counter that increases with every state change.
+
+        Async friendly.
+        """
+        return self._generation
 
     def entity_ids(self, domain_filter: Optional[str] = None) -> List[str]:
         """List of entity ids that are being tracked."""
@@ -906,9 +1007,8 @@ class StateMachine:
         if old_state is None:
             return False
 
-        self._bus.async_fire(
-            EVENT_STATE_CHANGED,
-            {"entity_id": entity_id, "old_state": old_state, "new_state": None},
+        self._async_fire_state_changed(
+            {"entity_id": entity_id, "old_state": old_state, "new_state": None}, None
         )
         return True
 
@@ -976,24 +1076,129 @@ class StateMachine:
 
         state = State(entity_id, new_state, attributes, last_changed, None, context)
         self._states[entity_id] = state
-        self._bus.async_fire(
-            EVENT_STATE_CHANGED,
+        self._async_fire_state_changed(
             {"entity_id": entity_id, "old_state": old_state, "new_state": state},
-            EventOrigin.local,
             context,
         )
 
+    @callback
+    def async_set_many(
+        self,
+        states: Iterable[Tuple[str, str, Optional[Dict]]],
+        force_update: bool = False,
+        context: Optional[Context] = None,
+    ) -> None:
+        """Set the state of multiple entities at once.
+
+        States is an iterable of (entity_id, new_state, attributes) tuples.
+        All states are written before any state_changed event is fired.
+
+        This method must be run in the event loop.
+        """
+        with self.async_batch():
+            for entity_id, new_state, attributes in states:
+                self.async_set(entity_id, new_state, attributes, force_update, context)
+
+    @contextmanager
+    def async_batch(self) -> Iterator[None]:
+        """Collect state changes and fire their events as one batch.
+
+        States are written immediately. The state_changed events are fired
+        together when the outermost batch exits. Do not await inside it, state
+        changes of other tasks that run meanwhile are logged as an error and
+        fired on their own.
+
+        This method must be run in the event loop.
+        """
+        if self._batch is not None:
+            yield
+            return
+
+        self._batch = []
+        self._batch_task = asyncio.current_task(self._loop)
+        try:
+            yield
+        finally:
+            batch = self._batch
+            self._batch = None
+            self._batch_task = None
+            self._bus.async_fire_batch(EVENT_STATE_CHANGED, batch)
+
+    @callback
+    def _async_fire_state_changed(self, data: Dict, context: Optional[Context]) -> None:
+        """Fire a state changed event or add it to the current batch."""
+        self._generation += 1
+        if self._batch is not None:
+            if asyncio.current_task(self._loop) is self._batch_task:
+                self._batch.append((data, context))
+                return
+            _LOGGER.error(
+                "State of %s changed while a state change batch of another task "
+                "is open, the batch awaited",
+                data["entity_id"],
+            )
+
+        self._bus.async_fire(EVENT_STATE_CHANGED, data, EventOrigin.local, context)
+
+
+_PLAIN_TYPES = (str, int, float, bool, type(None))
+_IMMUTABLE_TYPES = _PLAIN_TYPES + (
+    datetime.datetime,
+    datetime.date,
+    datetime.time,
+    datetime.timedelta,
+)
+
+
+def _freeze_service_data(value: Any) -> Any:
+    """Return a hashable key for plain service data.
+
+    Raises TypeError if the data contains anything but plain JSON types.
+    """
+    value_type = type(value)
+    if value_type in _PLAIN_TYPES:
+        # Include the type so that True, 1 and 1.0 do not share a key
+        return (value_type, value)
+    if value_type is dict:
+        items = []
+        for key, item in value.items():
+            if type(key) is not str:  # pylint: disable=unidiomatic-typecheck
+                raise TypeError(f"Unsupported key {key!r}")
+            items.append((key, _freeze_service_data(item)))
+        return (dict, frozenset(items))
+    if value_type in (list, tuple):
+        return (value_type, tuple(_freeze_service_data(item) for item in value))
+    raise TypeError(f"Unsupported type {value_type}")
+
+
+def _copy_service_data(value: Any) -> Any:
+    """Return a copy of validated data that shares no mutable containers.
+
+    Raises TypeError if the data contains objects we can't safely share.
+    """
+    value_type = type(value)
+    if value_type in _IMMUTABLE_TYPES:
+        return value
+    if value_type is dict:
+        return {key: _copy_service_data(item) for key, item in value.items()}
+    if value_type is list:
+        return [_copy_service_data(item) for item in value]
+    if value_type is tuple:
+        return tuple(_copy_service_data(item) for item in value)
+    raise TypeError(f"Unsupported type {value_type}")
+
 
 class Service:
     """Representation of a callable service."""
 
-    __slots__ = ["func", "schema", "is_callback", "is_coroutinefunction"]
+    __slots__ = ["func", "schema", "is_callback", "is_coroutinefunction", "_validated"]
 
     def __init__(
         self,
         func: Callable,
         schema: Optional[vol.Schema],
         context: Optional[Context] = None,
+        cache_schema: bool = False,
     ) -> None:
         """Initialize a service."""
         self.func = func
@@ -1003,6 +1208,46 @@ class Service:
             func = func.func
         self.is_callback = is_callback(func)
         self.is_coroutinefunction = asyncio.iscoroutinefunction(func)
+        self._validated: "Optional[OrderedDict[Any, Any]]" = (
+            OrderedDict() if cache_schema else None
+        )
+
+    def validate(self, service_data: Dict) -> Dict:
+        """Validate service data against the schema.
+
+        If the service was registered with cache_schema, results for plain
+        (JSON-like) payloads are remembered, so repeated calls with the same
+        data skip the schema. Callers always receive a fresh copy they are
+        free to mutate.
+        """
+        if not self.schema:
+            return service_data
+
+        if self._validated is None:
+            return self.schema(service_data)  # type: ignore
+
+        try:
+            key = _freeze_service_data(service_data)
+        except TypeError:
+            return self.schema(service_data)  # type: ignore
+
+        cached = self._validated.get(key)
+        if cached is not None:
+            self._validated.move_to_end(key)
+            return _copy_service_data(cached)  # type: ignore
+
+        processed = self.schema(service_data)
+
+        try:
+            self._validated[key] = _copy_service_data(processed)
+        except TypeError:
+            # Schema produced objects (ie templates) that can't be shared
+            return processed  # type: ignore
+
+        if len(self._validated) > SERVICE_SCHEMA_CACHE_SIZE:
+            self._validated.popitem(last=False)
+
+        return processed  # type: ignore
 
 
 class ServiceCall:
@@ -1069,14 +1314,22 @@ class ServiceRegistry:
         service: str,
         service_func: Callable,
         schema: Optional[vol.Schema] = None,
+        cache_schema: bool = False,
     ) -> None:
         """
         Register a service.
 
-        Schema is called to coerce and validate the service data.
+        Schema is called to coerce and validate the service data. With
+        cache_schema, its results are reused for identical service data.
         """
         run_callback_threadsafe(
-            self._hass.loop, self.async_register, domain, service, service_func, schema
+            self._hass.loop,
+            self.async_register,
+            domain,
+            service,
+            service_func,
+            schema,
+            cache_schema,
         ).result()
 
     @callback
@@ -1086,17 +1339,21 @@ class ServiceRegistry:
         service: str,
         service_func: Callable,
         schema: Optional[vol.Schema] = None,
+        cache_schema: bool = False,
     ) -> None:
         """
         Register a service.
 
-        Schema is called to coerce and validate the service data.
+        Schema is called to coerce and validate the service data. With
+        cache_schema, its results are reused for identical service data. Only
+        use it for schemas that always return the same result for the same
+        data.
 
         This method must be run in the event loop.
         """
         domain = domain.lower()
         service = service.lower()
-        service_obj = Service(service_func, schema)
+        service_obj = Service(service_func, schema, cache_schema=cache_schema)
 
         if domain in self._services:
             self._services[domain][service] = service_obj
@@ -1200,10 +1457,7 @@ class ServiceRegistry:
         except KeyError:
             raise ServiceNotFound(domain, service) from None
 
-        if handler.schema:
-            processed_data = handler.schema(service_data)
-        else:
-            processed_data = service_data
+        processed_data = handler.validate(service_data)
 
         service_call = ServiceCall(domain, service, processed_data, context)
 
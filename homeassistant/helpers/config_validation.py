@@ -232,9 +232,18 @@ def entity_ids(value: Union[str, List]) -> List[str]:
     return [entity_id(ent_id) for ent_id in value]
 
 
-comp_entity_ids = vol.Any(
-    vol.All(vol.Lower, vol.Any(ENTITY_MATCH_ALL, ENTITY_MATCH_NONE)), entity_ids
-)
+def comp_entity_ids(value: Union[str, List]) -> Union[str, List[str]]:
+    """Validate Entity IDs or one of the all/none keywords.
+
+    Written out instead of a vol.Any so service calls don't pay for a
+    failed validation attempt on every plain list of entity IDs.
+    """
+    if isinstance(value, str):
+        lower_value = value.lower()
+        if lower_value in (ENTITY_MATCH_ALL, ENTITY_MATCH_NONE):
+            return lower_value
+
+    return entity_ids(value)
 
 
 def entity_domain(domain: str) -> Callable[[Any], str]:
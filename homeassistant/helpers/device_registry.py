@@ -1,8 +1,8 @@
 """Provide a way to connect entities belonging to one device."""
 from asyncio import Event
-from collections import OrderedDict
+from collections import UserDict
 import logging
-from typing import Any, Dict, List, Optional, cast
+from typing import Any, Dict, List, Mapping, Optional, Tuple, cast
 import uuid
 
 import attr
@@ -67,16 +67,80 @@ def format_mac(mac: str) -> str:
     return mac
 
 
+class DeviceRegistryItems(UserDict):
+    """Container for device registry items, maps device id -> entry.
+
+    Maintains indexes on identifiers and connections so lookups don't have
+    to scan all devices. The indexes keep every device id registered for a
+    value in insertion order, so removing a device reveals the next one.
+    """
+
+    def __init__(self, devices: Optional[Mapping[str, DeviceEntry]] = None) -> None:
+        """Initialize the container."""
+        self._identifiers_index: Dict[Tuple[str, ...], Dict[str, None]] = {}
+        self._connections_index: Dict[Tuple[str, ...], Dict[str, None]] = {}
+        super().__init__(devices or {})
+
+    def __setitem__(self, key: str, entry: DeviceEntry) -> None:
+        """Add an item."""
+        if key in self.data:
+            self._unindex_entry(key)
+        super().__setitem__(key, entry)
+        for identifier in entry.identifiers:
+            self._identifiers_index.setdefault(identifier, {})[key] = None
+        for connection in entry.connections:
+            self._connections_index.setdefault(connection, {})[key] = None
+
+    def __delitem__(self, key: str) -> None:
+        """Remove an item."""
+        self._unindex_entry(key)
+        super().__delitem__(key)
+
+    def _unindex_entry(self, key: str) -> None:
+        """Remove an entry from the indexes."""
+        entry = self.data[key]
+        for index, values in (
+            (self._identifiers_index, entry.identifiers),
+            (self._connections_index, entry.connections),
+        ):
+            for value in values:
+                device_ids = index[value]
+                del device_ids[key]
+                if not device_ids:
+                    del index[value]
+
+    def get_device_id(self, identifiers: set, connections: set) -> Optional[str]:
+        """Get device id from identifiers or connections."""
+        for identifier in identifiers:
+            if identifier in self._identifiers_index:
+                return next(iter(self._identifiers_index[identifier]))
+        for connection in connections:
+            if connection in self._connections_index:
+                return next(iter(self._connections_index[connection]))
+        return None
+
+
 class DeviceRegistry:
     """Class to hold a registry of devices."""
 
-    devices: Dict[str, DeviceEntry]
-
     def __init__(self, hass: HomeAssistantType) -> None:
         """Initialize the device registry."""
         self.hass = hass
+        self._devices = DeviceRegistryItems()
         self._store = hass.helpers.storage.Store(STORAGE_VERSION, STORAGE_KEY)
 
+    @property
+    def devices(self) -> DeviceRegistryItems:
+        """Return the registered devices, keyed by device id."""
+        return self._devices
+
+    @devices.setter
+    def devices(self, devices: Mapping[str, DeviceEntry]) -> None:
+        """Replace the registered devices."""
+        if not isinstance(devices, DeviceRegistryItems):
+            devices = DeviceRegistryItems(devices)
+        self._devices = devices
+
     @callback
     def async_get(self, device_id: str) -> Optional[DeviceEntry]:
         """Get device."""
@@ -87,12 +151,10 @@ class DeviceRegistry:
         self, identifiers: set, connections: set
     ) -> Optional[DeviceEntry]:
         """Check if device is registered."""
-        for device in self.devices.values():
-            if any(iden in device.identifiers for iden in identifiers) or any(
-                conn in device.connections for conn in connections
-            ):
-                return device
-        return None
+        device_id = self.devices.get_device_id(identifiers, connections)
+        if device_id is None:
+            return None
+        return self.devices[device_id]
 
     @callback
     def async_get_or_create(
@@ -273,7 +335,7 @@ class DeviceRegistry:
         """Load the device registry."""
         data = await self._store.async_load()
 
-        devices = OrderedDict()
+        devices = DeviceRegistryItems()
 
         if data is not None:
             for device in data["devices"]:
@@ -187,7 +187,9 @@ class EntityComponent:
         )
 
     @callback
-    def async_register_entity_service(self, name, schema, func, required_features=None):
+    def async_register_entity_service(
+        self, name, schema, func, required_features=None, cache_schema=False
+    ):
         """Register an entity service."""
         if isinstance(schema, dict):
             schema = cv.make_entity_service_schema(schema)
@@ -198,7 +200,9 @@ class EntityComponent:
                 self._platforms.values(), func, call, required_features
             )
 
-        self.hass.services.async_register(self.domain, name, handle_service, schema)
+        self.hass.services.async_register(
+            self.domain, name, handle_service, schema, cache_schema
+        )
 
     async def async_setup_platform(
         self, platform_type, platform_config, discovery_info=None
@@ -474,7 +474,9 @@ class EntityPlatform:
         )
 
     @callback
-    def async_register_entity_service(self, name, schema, func, required_features=None):
+    def async_register_entity_service(
+        self, name, schema, func, required_features=None, cache_schema=False
+    ):
         """Register an entity service."""
         if isinstance(schema, dict):
             schema = cv.make_entity_service_schema(schema)
@@ -486,7 +488,7 @@ class EntityPlatform:
             )
 
         self.hass.services.async_register(
-            self.platform_name, name, handle_service, schema
+            self.platform_name, name, handle_service, schema, cache_schema
         )
 
     async def _update_entity_states(self, now: datetime) -> None:
@@ -8,10 +8,20 @@ registered. Registering a new entity while a timer is in progress resets the
 timer.
 """
 import asyncio
-from collections import OrderedDict
+from collections import UserDict
 from itertools import chain
 import logging
-from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, cast
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    cast,
+)
 
 import attr
 
@@ -92,18 +102,100 @@ class RegistryEntry:
         return self.disabled_by is not None
 
 
+class EntityRegistryItems(UserDict):
+    """Container for entity registry items, maps entity_id -> entry.
+
+    Maintains indexes on (domain, platform, unique_id), device_id and
+    config_entry_id so lookups don't have to scan all entries. The unique id
+    index keeps every entity_id registered for a key in insertion order, so
+    the oldest one is found like a scan would and removing it reveals the
+    next one.
+    """
+
+    def __init__(self, entries: Optional[Mapping[str, RegistryEntry]] = None) -> None:
+        """Initialize the container."""
+        self._entity_id_index: Dict[Tuple[str, str, str], Dict[str, None]] = {}
+        self._device_id_index: Dict[str, Dict[str, RegistryEntry]] = {}
+        self._config_entry_id_index: Dict[str, Dict[str, RegistryEntry]] = {}
+        super().__init__(entries or {})
+
+    def __setitem__(self, key: str, entry: RegistryEntry) -> None:
+        """Add an item."""
+        if key in self.data:
+            self._unindex_entry(key)
+        super().__setitem__(key, entry)
+        self._entity_id_index.setdefault(
+            (entry.domain, entry.platform, entry.unique_id), {}
+        )[key] = None
+        if entry.device_id is not None:
+            self._device_id_index.setdefault(entry.device_id, {})[key] = entry
+        if entry.config_entry_id is not None:
+            self._config_entry_id_index.setdefault(entry.config_entry_id, {})[
+                key
+            ] = entry
+
+    def __delitem__(self, key: str) -> None:
+        """Remove an item."""
+        self._unindex_entry(key)
+        super().__delitem__(key)
+
+    def _unindex_entry(self, key: str) -> None:
+        """Remove an entry from the indexes."""
+        entry = self.data[key]
+        for index, value in (
+            (self._entity_id_index, (entry.domain, entry.platform, entry.unique_id)),
+            (self._device_id_index, entry.device_id),
+            (self._config_entry_id_index, entry.config_entry_id),
+        ):
+            if value is None:
+                continue
+            entries = index[value]
+            del entries[key]
+            if not entries:
+                del index[value]
+
+    def get_entity_id(self, key: Tuple[str, str, str]) -> Optional[str]:
+        """Get entity_id from (domain, platform, unique_id)."""
+        entity_ids = self._entity_id_index.get(key)
+        if not entity_ids:
+            return None
+        return next(iter(entity_ids))
+
+    def get_entries_for_device_id(self, device_id: str) -> List[RegistryEntry]:
+        """Get entries for device."""
+        return list(self._device_id_index.get(device_id, {}).values())
+
+    def get_entries_for_config_entry_id(
+        self, config_entry_id: str
+    ) -> List[RegistryEntry]:
+        """Get entries for config entry."""
+        return list(self._config_entry_id_index.get(config_entry_id, {}).values())
+
+
 class EntityRegistry:
     """Class to hold a registry of entities."""
 
     def __init__(self, hass: HomeAssistantType):
         """Initialize the registry."""
         self.hass = hass
-        self.entities: Dict[str, RegistryEntry]
+        self._entities = EntityRegistryItems()
         self._store = hass.helpers.storage.Store(STORAGE_VERSION, STORAGE_KEY)
         self.hass.bus.async_listen(
             EVENT_DEVICE_REGISTRY_UPDATED, self.async_device_removed
         )
 
+    @property
+    def entities(self) -> EntityRegistryItems:
+        """Return the registered entities, keyed by entity_id."""
+        return self._entities
+
+    @entities.setter
+    def entities(self, entities: Mapping[str, RegistryEntry]) -> None:
+        """Replace the registered entities."""
+        if not isinstance(entities, EntityRegistryItems):
+            entities = EntityRegistryItems(entities)
+        self._entities = entities
+
     @callback
     def async_is_registered(self, entity_id: str) -> bool:
         """Check if an entity_id is currently registered."""
@@ -119,14 +211,7 @@ class EntityRegistry:
         self, domain: str, platform: str, unique_id: str
     ) -> Optional[str]:
         """Check if an entity_id is currently registered."""
-        for entity in self.entities.values():
-            if (
-                entity.domain == domain
-                and entity.platform == platform
-                and entity.unique_id == unique_id
-            ):
-                return entity.entity_id
-        return None
+        return self.entities.get_entity_id((domain, platform, unique_id))
 
     @callback
     def async_generate_entity_id(
@@ -318,20 +403,13 @@ class EntityRegistry:
             entity_id = changes["entity_id"] = new_entity_id
 
         if new_unique_id is not _UNDEF:
-            conflict = next(
-                (
-                    entity
-                    for entity in self.entities.values()
-                    if entity.unique_id == new_unique_id
-                    and entity.domain == old.domain
-                    and entity.platform == old.platform
-                ),
-                None,
+            conflict_entity_id = self.async_get_entity_id(
+                old.domain, old.platform, new_unique_id
             )
-            if conflict:
+            if conflict_entity_id:
                 raise ValueError(
                     f"Unique id '{new_unique_id}' is already in use by "
-                    f"'{conflict.entity_id}'"
+                    f"'{conflict_entity_id}'"
                 )
             changes["unique_id"] = new_unique_id
 
@@ -361,7 +439,7 @@ class EntityRegistry:
             old_conf_load_func=load_yaml,
             old_conf_migrate_func=_async_migrate,
         )
-        entities: Dict[str, RegistryEntry] = OrderedDict()
+        entities = EntityRegistryItems()
 
         if data is not None:
             for entity in data["entities"]:
@@ -413,12 +491,8 @@ class EntityRegistry:
     @callback
     def async_clear_config_entry(self, config_entry: str) -> None:
         """Clear config entry from registry entries."""
-        for entity_id in [
-            entity_id
-            for entity_id, entry in self.entities.items()
-            if config_entry == entry.config_entry_id
-        ]:
-            self.async_remove(entity_id)
+        for entry in self.entities.get_entries_for_config_entry_id(config_entry):
+            self.async_remove(entry.entity_id)
 
 
 @bind_hass
@@ -449,9 +523,7 @@ def async_entries_for_device(
     registry: EntityRegistry, device_id: str
 ) -> List[RegistryEntry]:
     """Return entries that match a device."""
-    return [
-        entry for entry in registry.entities.values() if entry.device_id == device_id
-    ]
+    return registry.entities.get_entries_for_device_id(device_id)
 
 
 @callback
@@ -459,11 +531,7 @@ def async_entries_for_config_entry(
     registry: EntityRegistry, config_entry_id: str
 ) -> List[RegistryEntry]:
     """Return entries that match a config entry."""
-    return [
-        entry
-        for entry in registry.entities.values()
-        if entry.config_entry_id == config_entry_id
-    ]
+    return registry.entities.get_entries_for_config_entry_id(config_entry_id)
 
 
 async def _async_migrate(entities: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
@@ -138,5 +138,8 @@ class DataUpdateCoordinator:
             )
             self._schedule_refresh()
 
-        for update_callback in self._listeners:
-            update_callback()
+        # Entities write their state from the listeners. Batch the resulting
+        # state changed events so they are fired and recorded together.
+        with self.hass.states.async_batch():
+            for update_callback in self._listeners:
+                update_callback()
@@ -2,13 +2,24 @@
 import argparse
 import asyncio
 from contextlib import suppress
-from datetime import datetime
+from datetime import datetime, timedelta
+import json
 import logging
+import platform
+from tempfile import TemporaryDirectory
 from timeit import default_timer as timer
-from typing import Callable, Dict
+from typing import Callable, Dict, List
+
+import voluptuous as vol
 
 from homeassistant import core
-from homeassistant.const import ATTR_NOW, EVENT_STATE_CHANGED, EVENT_TIME_CHANGED
+from homeassistant.const import (
+    ATTR_NOW,
+    EVENT_HOMEASSISTANT_START,
+    EVENT_STATE_CHANGED,
+    EVENT_TIME_CHANGED,
+    __version__,
+)
 from homeassistant.util import dt as dt_util
 
 # mypy: allow-untyped-calls, allow-untyped-defs, no-check-untyped-defs
@@ -16,33 +27,103 @@ from homeassistant.util import dt as dt_util
 
 BENCHMARKS: Dict[str, Callable] = {}
 
+RECORDER_STATE_CHANGES = 10 ** 3
+RECORDER_BATCH_SIZE = 100
+HISTORY_ENTITIES = 100
+HISTORY_DAYS = 7
+LOGBOOK_STATE_CHANGES = 2 * 10 ** 4
+TEMPLATE_ENTITIES = 1000
+TEMPLATE_RENDERS = 10 ** 3
+WEBSOCKET_CLIENTS = 50
+WEBSOCKET_EVENTS = 10 ** 3
+MQTT_SUBSCRIPTIONS = 1000
+MQTT_MESSAGES = 10 ** 4
+REGISTRY_ENTRIES = 10 ** 4
+BOOTSTRAP_ENTITIES = 200
+
 
 def run(args):
     """Handle benchmark commandline script."""
     # Disable logging
-    logging.getLogger("homeassistant.core").setLevel(logging.CRITICAL)
+    logging.getLogger("homeassistant").setLevel(logging.CRITICAL)
 
     parser = argparse.ArgumentParser(description=("Run a Home Assistant benchmark."))
-    parser.add_argument("name", choices=BENCHMARKS)
+    parser.add_argument("name", choices=["all", *BENCHMARKS])
     parser.add_argument("--script", choices=["benchmark"])
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=0,
+        help="Number of runs per benchmark. Defaults to running until "
+        "interrupted, or once per benchmark when running all.",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Print the results as JSON when done"
+    )
 
     args = parser.parse_args()
 
-    bench = BENCHMARKS[args.name]
+    if args.name == "all":
+        names = list(BENCHMARKS)
+        runs = args.runs or 1
+    else:
+        names = [args.name]
+        runs = args.runs or None
+
+    if not args.json:
+        print("Using event loop:", asyncio.get_event_loop_policy().__module__)
 
-    print("Using event loop:", asyncio.get_event_loop_policy().__module__)
+    results: Dict[str, List[float]] = {}
 
     with suppress(KeyboardInterrupt):
-        while True:
-            loop = asyncio.new_event_loop()
-            hass = core.HomeAssistant(loop)
-            hass.async_stop_track_tasks()
-            runtime = loop.run_until_complete(bench(hass))
-            print(f"Benchmark {bench.__name__} done in {runtime}s")
-            loop.run_until_complete(hass.async_stop())
+        for name in names:
+            bench = BENCHMARKS[name]
+            results[name] = runtimes = []
+
+            while runs is None or len(runtimes) < runs:
+                runtime = _run_benchmark(bench)
+                runtimes.append(runtime)
+                if not args.json:
+                    print(f"Benchmark {name} done in {runtime}s")
+
+    if args.json:
+        print(json.dumps(_summarize(results), indent=2))
+
+
+def _run_benchmark(bench):
+    """Run a benchmark once on a fresh instance and return its runtime."""
+    loop = asyncio.new_event_loop()
+    hass = core.HomeAssistant(loop)
+    hass.async_stop_track_tasks()
+
+    with TemporaryDirectory() as config_dir:
+        hass.config.config_dir = config_dir
+        hass.config.skip_pip = True
+        try:
+            return loop.run_until_complete(bench(hass))
+        finally:
+            loop.run_until_complete(hass.async_stop(force=True))
             loop.close()
 
 
+def _summarize(results):
+    """Create a JSON serializable summary of the benchmark results."""
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "event_loop": asyncio.get_event_loop_policy().__module__,
+        "benchmarks": {
+            name: {
+                "runs": runtimes,
+                "min": min(runtimes),
+                "mean": sum(runtimes) / len(runtimes),
+            }
+            for name, runtimes in results.items()
+            if runtimes
+        },
+    }
+
+
 def benchmark(func):
     """Decorate to mark a benchmark."""
     BENCHMARKS[func.__name__] = func
@@ -138,6 +219,47 @@ async def async_million_state_changed_helper(hass):
     return timer() - start
 
 
+@benchmark
+async def async_service_calls(hass):
+    """Run 100k service calls through an entity service schema."""
+    from homeassistant.helpers import config_validation as cv
+
+    count = 0
+    event = asyncio.Event()
+
+    @core.callback
+    def handle_service(_):
+        """Handle service call."""
+        nonlocal count
+        count += 1
+
+        if count == 10 ** 5:
+            event.set()
+
+    hass.services.async_register(
+        "light",
+        "turn_on",
+        handle_service,
+        cv.make_entity_service_schema(
+            {vol.Optional("brightness"): vol.All(vol.Coerce(int), vol.Range(0, 255))}
+        ),
+        cache_schema=True,
+    )
+    service_data = {
+        "entity_id": ["light.kitchen", "light.living_room"],
+        "brightness": "128",
+    }
+
+    start = timer()
+
+    for _ in range(10 ** 5):
+        await hass.services.async_call("light", "turn_on", service_data)
+
+    await event.wait()
+
+    return timer() - start
+
+
 @benchmark
 @asyncio.coroutine
 def logbook_filtering_state(hass):
@@ -152,7 +274,6 @@ def logbook_filtering_attributes(hass):
     return _logbook_filtering(hass, 1, 2)
 
 
-@benchmark
 @asyncio.coroutine
 def _logbook_filtering(hass, last_changed, last_updated):
     from homeassistant.components import logbook
@@ -185,3 +306,458 @@ def _logbook_filtering(hass, last_changed, last_updated):
     list(logbook.humanify(None, yield_events(event)))
 
     return timer() - start
+
+
+async def _async_setup_recorder(hass):
+    """Set up the recorder with a SQLite database in the config dir."""
+    from homeassistant.components import recorder
+    from homeassistant.setup import async_setup_component
+
+    db_url = "sqlite:///{}".format(hass.config.path("benchmark.db"))
+    await async_setup_component(
+        hass, recorder.DOMAIN, {recorder.DOMAIN: {recorder.CONF_DB_URL: db_url}}
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_START)
+    await hass.async_block_till_done()
+    return hass.data[recorder.DATA_INSTANCE]
+
+
+@benchmark
+async def recorder_write_states(hass):
+    """Write state changes to a SQLite database."""
+    instance = await _async_setup_recorder(hass)
+
+    start = timer()
+
+    for idx in range(RECORDER_STATE_CHANGES):
+        hass.states.async_set(
+            f"sensor.benchmark_{idx % 100}", idx, {"unit_of_measurement": "W"}
+        )
+
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(instance.block_till_done)
+
+    return timer() - start
+
+
+def _recorder_state_changed_events(domain="sensor", count=RECORDER_STATE_CHANGES):
+    """Create state changed events of a set of entities."""
+    events = []
+    old_states = {}
+    for idx in range(count):
+        entity_id = f"{domain}.benchmark_{idx % 100}"
+        new_state = core.State(entity_id, str(idx), {"unit_of_measurement": "W"})
+        events.append(
+            core.Event(
+                EVENT_STATE_CHANGED,
+                {
+                    "entity_id": entity_id,
+                    "old_state": old_states.get(entity_id),
+                    "new_state": new_state,
+                },
+            )
+        )
+        old_states[entity_id] = new_state
+    return events
+
+
+async def _recorder_insert(hass, insert):
+    """Insert state changed events in batches with an insert function."""
+    from homeassistant.components.recorder.util import session_scope
+
+    instance = await _async_setup_recorder(hass)
+    await hass.async_add_executor_job(instance.block_till_done)
+    events = _recorder_state_changed_events()
+
+    def write():
+        """Write all events like the recorder thread does."""
+        state_ids = {}
+        entity_row_ids = {}
+        for offset in range(0, len(events), RECORDER_BATCH_SIZE):
+            with session_scope(session=instance.get_session()) as session:
+                insert(
+                    session,
+                    events[offset : offset + RECORDER_BATCH_SIZE],
+                    state_ids,
+                    entity_row_ids,
+                )
+
+    start = timer()
+
+    await hass.async_add_executor_job(write)
+
+    return timer() - start
+
+
+@benchmark
+async def recorder_insert_orm(hass):
+    """Insert state changes with the ORM, flushing every row for its id."""
+    from homeassistant.components.recorder.models import Entities, Events, States
+
+    def insert(session, events, state_ids, entity_row_ids):
+        """Add every event and state to the session."""
+        for event in events:
+            dbevent = Events.from_event(event)
+            session.add(dbevent)
+            session.flush()
+
+            entity_id = event.data["entity_id"]
+            if entity_id not in entity_row_ids:
+                entity = Entities(entity_id=entity_id)
+                session.add(entity)
+                session.flush()
+                entity_row_ids[entity_id] = entity.entity_row_id
+            dbstate = States(
+                **States.row_from_event(
+                    event, state_ids.get(entity_id), entity_row_ids[entity_id]
+                )
+            )
+            dbstate.event_id = dbevent.event_id
+            session.add(dbstate)
+            session.flush()
+            state_ids[entity_id] = dbstate.state_id
+
+    return await _recorder_insert(hass, insert)
+
+
+@benchmark
+async def recorder_insert_core(hass):
+    """Insert state changes with bulk inserts, as the recorder does."""
+    from homeassistant.components.recorder import insert_events
+
+    return await _recorder_insert(hass, insert_events)
+
+
+async def _async_populate_history(hass):
+    """Insert an hourly state change for many entities, return the period."""
+    from homeassistant.components.recorder.models import (
+        Entities,
+        RecorderRuns,
+        States,
+    )
+    from homeassistant.components.recorder.util import session_scope
+
+    instance = await _async_setup_recorder(hass)
+    end = dt_util.utcnow()
+    begin = end - timedelta(days=HISTORY_DAYS)
+
+    def populate():
+        """Insert an hourly state change for every entity."""
+        with session_scope(session=instance.get_session()) as session:
+            session.add(RecorderRuns(start=begin, end=end, created=begin))
+            session.bulk_save_objects(
+                [
+                    Entities(entity_row_id=idx + 1, entity_id=f"sensor.benchmark_{idx}")
+                    for idx in range(HISTORY_ENTITIES)
+                ]
+            )
+            for hour in range(HISTORY_DAYS * 24):
+                point = begin + timedelta(hours=hour)
+                session.bulk_save_objects(
+                    [
+                        States(
+                            entity_row_id=idx + 1,
+                            domain="sensor",
+                            state=str(hour),
+                            attributes='{"unit_of_measurement": "W"}',
+                            last_updated=point,
+                        )
+                        for idx in range(HISTORY_ENTITIES)
+                    ]
+                )
+
+    await hass.async_add_executor_job(populate)
+    return begin, end
+
+
+@benchmark
+async def history_significant_states(hass):
+    """Query the history of many entities over several days."""
+    from homeassistant.components import history
+
+    begin, end = await _async_populate_history(hass)
+
+    start = timer()
+
+    await hass.async_add_executor_job(
+        history.get_significant_states, hass, begin + timedelta(minutes=30), end
+    )
+
+    return timer() - start
+
+
+@benchmark
+async def history_minimal_response(hass):
+    """Query and serialize the history of many entities with minimal_response."""
+    from homeassistant.components import history
+    from homeassistant.helpers.json import JSONEncoder
+
+    begin, end = await _async_populate_history(hass)
+
+    def fetch():
+        """Fetch the history and encode it like the API does."""
+        result = history.get_significant_states(
+            hass, begin + timedelta(minutes=30), end, minimal_response=True
+        )
+        return json.dumps(list(result.values()), cls=JSONEncoder)
+
+    start = timer()
+
+    await hass.async_add_executor_job(fetch)
+
+    return timer() - start
+
+
+@benchmark
+async def logbook_get_events(hass):
+    """Query a day of logbook entries from the database."""
+    from homeassistant.components import logbook
+    from homeassistant.components.recorder import insert_events
+    from homeassistant.components.recorder.util import session_scope
+
+    instance = await _async_setup_recorder(hass)
+    await hass.async_add_executor_job(instance.block_till_done)
+    # Sensor changes are dropped from the logbook, switch changes are shown
+    events = _recorder_state_changed_events(
+        "sensor", LOGBOOK_STATE_CHANGES // 2
+    ) + _recorder_state_changed_events("switch", LOGBOOK_STATE_CHANGES // 2)
+
+    def populate():
+        """Insert all events."""
+        state_ids = {}
+        with session_scope(session=instance.get_session()) as session:
+            insert_events(session, events, state_ids, {})
+
+    await hass.async_add_executor_job(populate)
+    end = dt_util.utcnow() + timedelta(minutes=1)
+
+    start = timer()
+
+    # pylint: disable=protected-access
+    await hass.async_add_executor_job(
+        logbook._get_events, hass, {}, end - timedelta(days=1), end
+    )
+
+    return timer() - start
+
+
+def _async_add_template_states(hass):
+    """Add states used by the template benchmarks."""
+    for idx in range(TEMPLATE_ENTITIES):
+        domain = "sensor" if idx % 2 else "light"
+        hass.states.async_set(f"{domain}.benchmark_{idx}", idx % 3)
+
+    hass.states.async_set(
+        "group.benchmark",
+        "on",
+        {"entity_id": [f"sensor.benchmark_{idx}" for idx in range(1, 201, 2)]},
+    )
+
+
+async def _async_render_template(hass, template_str):
+    """Render a template repeatedly."""
+    from homeassistant.helpers.template import Template
+
+    _async_add_template_states(hass)
+    template = Template(template_str, hass)
+
+    start = timer()
+
+    for _ in range(TEMPLATE_RENDERS):
+        template.async_render()
+
+    return timer() - start
+
+
+@benchmark
+async def template_render_simple(hass):
+    """Render a template reading a single state."""
+    return await _async_render_template(hass, "{{ states('sensor.benchmark_1') }}")
+
+
+@benchmark
+async def template_render_states_domain(hass):
+    """Render a template iterating all states of a domain."""
+    return await _async_render_template(
+        hass, "{{ states.sensor | selectattr('state', 'eq', '1') | list | count }}"
+    )
+
+
+@benchmark
+async def template_render_expand(hass):
+    """Render a template expanding a group."""
+    return await _async_render_template(
+        hass, "{{ expand('group.benchmark') | map(attribute='state') | list | count }}"
+    )
+
+
+@benchmark
+async def websocket_state_changed_fan_out(hass):
+    """Forward state changes to many websocket subscribers."""
+    from homeassistant.auth.models import User
+    from homeassistant.components import websocket_api
+    from homeassistant.components.websocket_api import commands, const
+
+    user = User(name="Benchmark", perm_lookup=None, is_owner=True, is_active=True)
+    count = 0
+    event = asyncio.Event()
+
+    def send_message(message):
+        """Serialize a message like the connection writer would."""
+        nonlocal count
+        if isinstance(message, dict):
+            const.JSON_DUMP(message)
+        count += 1
+
+        if count == WEBSOCKET_CLIENTS * (WEBSOCKET_EVENTS + 1):
+            event.set()
+
+    websocket_api.async_register_command(hass, commands.handle_subscribe_events)
+
+    for _ in range(WEBSOCKET_CLIENTS):
+        connection = websocket_api.ActiveConnection(
+            logging.getLogger(__name__), hass, send_message, user, None
+        )
+        connection.async_handle(
+            {"id": 1, "type": "subscribe_events", "event_type": EVENT_STATE_CHANGED}
+        )
+
+    start = timer()
+
+    for idx in range(WEBSOCKET_EVENTS):
+        hass.states.async_set(f"sensor.benchmark_{idx % 100}", idx)
+
+    await event.wait()
+
+    return timer() - start
+
+
+@benchmark
+async def mqtt_message_dispatch(hass):
+    """Dispatch MQTT messages to many subscriptions."""
+    # pylint: disable=protected-access
+    from paho.mqtt.client import MQTTMessage
+    from homeassistant.components import mqtt
+
+    client = mqtt.MQTT(
+        hass,
+        broker="localhost",
+        port=mqtt.DEFAULT_PORT,
+        client_id=None,
+        keepalive=mqtt.DEFAULT_KEEPALIVE,
+        username=None,
+        password=None,
+        certificate=None,
+        client_key=None,
+        client_cert=None,
+        tls_insecure=None,
+        protocol=mqtt.DEFAULT_PROTOCOL,
+        will_message=None,
+        birth_message=None,
+        tls_version=None,
+    )
+    count = 0
+    event = asyncio.Event()
+
+    @core.callback
+    def message_received(_):
+        """Handle a message."""
+        nonlocal count
+        count += 1
+
+        if count == MQTT_MESSAGES:
+            event.set()
+
+    # Subscriptions are added directly, there is no broker to talk to
+    for idx in range(MQTT_SUBSCRIPTIONS):
+        client.subscriptions.append(
+            mqtt.Subscription(f"benchmark/{idx}/state", message_received)
+        )
+
+    messages = []
+    for idx in range(MQTT_MESSAGES):
+        msg = MQTTMessage(topic=f"benchmark/{idx % MQTT_SUBSCRIPTIONS}/state".encode())
+        msg.payload = b"on"
+        messages.append(msg)
+
+    start = timer()
+
+    for msg in messages:
+        client._mqtt_handle_message(msg)
+
+    await event.wait()
+
+    return timer() - start
+
+
+@benchmark
+async def entity_registry_load(hass):
+    """Load a large entity registry and look up every entry."""
+    from homeassistant.helpers import entity_registry, storage
+
+    entries = [
+        {
+            "entity_id": f"sensor.benchmark_{idx}",
+            "config_entry_id": f"entry_{idx % 50}",
+            "device_id": f"device_{idx % 2000}",
+            "unique_id": f"unique_{idx}",
+            "platform": "benchmark",
+            "name": None,
+            "disabled_by": None,
+        }
+        for idx in range(REGISTRY_ENTRIES)
+    ]
+    store = storage.Store(
+        hass, entity_registry.STORAGE_VERSION, entity_registry.STORAGE_KEY
+    )
+    await store.async_save({"entities": entries})
+
+    start = timer()
+
+    registry = await entity_registry.async_get_registry(hass)
+    for idx in range(REGISTRY_ENTRIES):
+        registry.async_get_or_create("sensor", "benchmark", f"unique_{idx}")
+
+    return timer() - start
+
+
+@benchmark
+async def bootstrap_synthetic_config(hass):
+    """Set up Home Assistant from a synthetic configuration."""
+    from homeassistant import bootstrap
+
+    config = {
+        "homeassistant": {"name": "Benchmark"},
+        "input_boolean": {
+            f"benchmark_{idx}": {"name": f"Benchmark {idx}"}
+            for idx in range(BOOTSTRAP_ENTITIES)
+        },
+        "input_number": {
+            f"benchmark_{idx}": {"min": 0, "max": 100}
+            for idx in range(BOOTSTRAP_ENTITIES)
+        },
+        "sensor": [
+            {
+                "platform": "template",
+                "sensors": {
+                    f"benchmark_{idx}": {
+                        "value_template": f"{{{{ states('input_number.benchmark_{idx}') }}}}"
+                    }
+                    for idx in range(BOOTSTRAP_ENTITIES)
+                },
+            }
+        ],
+        "group": {
+            f"benchmark_{idx}": [
+                f"input_boolean.benchmark_{member}"
+                for member in range(idx, BOOTSTRAP_ENTITIES, 10)
+            ]
+            for idx in range(10)
+        },
+    }
+    start = timer()
+
+    await bootstrap.async_from_config_dict(config, hass)
+    await hass.async_block_till_done()
+
+    return timer() - start
@@ -197,8 +197,7 @@ async def _async_setup_component(
         return False
 
     if hass.config_entries:
-        for entry in hass.config_entries.async_entries(domain):
-            await entry.async_setup(hass, integration=integration)
+        await hass.config_entries.async_setup_domain_entries(domain, integration)
 
     hass.config.components.add(domain)
 
@@ -33,6 +33,52 @@ async def test_api_list_state_entities(hass, mock_api_client):
     assert remote_data == hass.states.async_all()
 
 
+async def test_api_list_states_filtered(hass, mock_api_client):
+    """Test fetching the states of a list of entities or a domain."""
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("light.bedroom", "off")
+    hass.states.async_set("switch.fan", "on")
+
+    resp = await mock_api_client.get(
+        const.URL_API_STATES, params={"entity_id": "light.kitchen,switch.fan,a.b"}
+    )
+    assert resp.status == 200
+    json = await resp.json()
+    assert [item["entity_id"] for item in json] == ["light.kitchen", "switch.fan"]
+
+    resp = await mock_api_client.get(const.URL_API_STATES, params={"domain": "light"})
+    assert resp.status == 200
+    json = await resp.json()
+    assert sorted(item["entity_id"] for item in json) == [
+        "light.bedroom",
+        "light.kitchen",
+    ]
+
+
+async def test_api_list_states_etag(hass, mock_api_client):
+    """Test the states are only sent again after they changed."""
+    hass.states.async_set("light.kitchen", "on")
+
+    resp = await mock_api_client.get(const.URL_API_STATES)
+    assert resp.status == 200
+    etag = resp.headers["ETag"]
+
+    resp = await mock_api_client.get(
+        const.URL_API_STATES, headers={"If-None-Match": etag}
+    )
+    assert resp.status == 304
+
+    hass.states.async_set("light.kitchen", "off")
+
+    resp = await mock_api_client.get(
+        const.URL_API_STATES, headers={"If-None-Match": etag}
+    )
+    assert resp.status == 200
+    assert resp.headers["ETag"] != etag
+    json = await resp.json()
+    assert json[0]["state"] == "off"
+
+
 async def test_api_get_state(hass, mock_api_client):
     """Test if the debug interface allows us to get a state."""
     hass.states.async_set("hello.world", "nice", {"attr": 1})
@@ -303,6 +349,56 @@ async def test_api_call_service_with_data(hass, mock_api_client):
     assert len(test_value) == 1
 
 
+async def test_api_call_services(hass, mock_api_client):
+    """Test calling a list of services in one request."""
+
+    @ha.callback
+    def listener(service_call):
+        """Set the state requested by the service call."""
+        hass.states.async_set("light.kitchen", service_call.data["state"])
+
+    hass.services.async_register("test_domain", "test_service", listener)
+
+    resp = await mock_api_client.post(
+        const.URL_API_SERVICES,
+        json=[
+            {
+                "domain": "test_domain",
+                "service": "test_service",
+                "service_data": {"state": "on"},
+            },
+            {"domain": "test_domain", "service": "unknown"},
+            {
+                "domain": "test_domain",
+                "service": "test_service",
+                "service_data": {"state": "off"},
+            },
+        ],
+    )
+    assert resp.status == 200
+    results = await resp.json()
+
+    assert len(results) == 3
+    assert results[0]["success"]
+    assert results[0]["changed_states"][0]["state"] == "on"
+    assert not results[1]["success"]
+    assert "unknown" in results[1]["error"]
+    assert results[2]["success"]
+    assert results[2]["changed_states"][0]["state"] == "off"
+    assert hass.states.get("light.kitchen").state == "off"
+
+
+async def test_api_call_services_invalid(hass, mock_api_client):
+    """Test calling a list of services with invalid data."""
+    resp = await mock_api_client.post(
+        const.URL_API_SERVICES, json={"domain": "test_domain"}
+    )
+    assert resp.status == 400
+
+    resp = await mock_api_client.post(const.URL_API_SERVICES, data="not json")
+    assert resp.status == 400
+
+
 async def test_api_template(hass, mock_api_client):
     """Test the template API."""
     hass.states.async_set("sensor.temperature", 10)
@@ -351,7 +447,8 @@ async def test_stream_with_restricted(hass, mock_api_client):
         "{}?restrict=test_event1,test_event3".format(const.URL_API_STREAM)
     )
     assert resp.status == 200
-    assert listen_count + 1 == _listen_count(hass)
+    # Listens to the requested event types and the stop event
+    assert listen_count + 3 == _listen_count(hass)
 
     hass.bus.async_fire("test_event1")
     data = await _stream_next_event(resp.content)
@@ -363,6 +460,45 @@ async def test_stream_with_restricted(hass, mock_api_client):
     assert data["event_type"] == "test_event3"
 
 
+async def test_stream_with_entity_id(hass, mock_api_client):
+    """Test the stream filtered on entities."""
+    resp = await mock_api_client.get(
+        "{}?restrict=state_changed&entity_id=light.Kitchen".format(const.URL_API_STREAM)
+    )
+    assert resp.status == 200
+
+    hass.states.async_set("light.bedroom", "on")
+    hass.bus.async_fire("test_event")
+    hass.states.async_set("light.kitchen", "on")
+    data = await _stream_next_event(resp.content)
+    assert data["event_type"] == "state_changed"
+    assert data["data"]["entity_id"] == "light.kitchen"
+
+
+async def test_stream_shares_listeners(hass, mock_api_client):
+    """Test streams share their listeners and serialize events once."""
+    listen_count = _listen_count(hass)
+
+    resp1 = await mock_api_client.get(const.URL_API_STREAM)
+    resp2 = await mock_api_client.get(const.URL_API_STREAM)
+    assert resp1.status == 200
+    assert resp2.status == 200
+    assert listen_count + 1 == _listen_count(hass)
+
+    with patch(
+        "homeassistant.components.api.json.dumps", side_effect=json.dumps
+    ) as mock_dumps:
+        hass.bus.async_fire("test_event")
+        data1 = await _stream_next_event(resp1.content)
+        data2 = await _stream_next_event(resp2.content)
+
+    assert data1["event_type"] == data2["event_type"] == "test_event"
+    encoded = [
+        call for call in mock_dumps.mock_calls if isinstance(call[1][0], ha.Event)
+    ]
+    assert len(encoded) == 1
+
+
 async def _stream_next_event(stream):
     """Read the stream for next event while ignoring ping."""
     while True:
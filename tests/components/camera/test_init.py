@@ -7,7 +7,13 @@ from unittest.mock import PropertyMock, mock_open, patch
 import pytest
 
 from homeassistant.components import camera
-from homeassistant.components.camera.const import DOMAIN, PREF_PRELOAD_STREAM
+from homeassistant.components.camera.const import (
+    DATA_MJPEG_HUBS,
+    DOMAIN,
+    PREF_IMAGE_CACHE_MAX_AGE,
+    PREF_PRELOAD_STREAM,
+)
+from homeassistant.components.camera.mjpeg_hub import MjpegStreamHub, encode_frame
 from homeassistant.components.camera.prefs import CameraEntityPreferences
 from homeassistant.components.websocket_api.const import TYPE_RESULT
 from homeassistant.const import ATTR_ENTITY_ID, EVENT_HOMEASSISTANT_START
@@ -95,6 +101,87 @@ async def test_get_image_fails(hass, image_mock_url):
         await camera.async_get_image(hass, "camera.demo_camera")
 
 
+async def test_get_image_single_flight(hass, image_mock_url):
+    """Test concurrent requests share a single fetch."""
+    release = asyncio.Event()
+    calls = []
+
+    async def mock_camera_image():
+        """Return an image once released."""
+        calls.append(1)
+        await release.wait()
+        return b"Test"
+
+    demo_camera = hass.data[DOMAIN].get_entity("camera.demo_camera")
+    with patch.object(demo_camera, "async_camera_image", mock_camera_image):
+        tasks = [
+            hass.async_create_task(camera.async_get_image(hass, "camera.demo_camera"))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        images = await asyncio.gather(*tasks)
+
+        assert [image.content for image in images] == [b"Test"] * 3
+        assert len(calls) == 1
+        assert demo_camera.image_cache.misses == 1
+        assert demo_camera.image_cache.hits == 2
+
+        # No max age configured, a new request fetches again
+        await camera.async_get_image(hass, "camera.demo_camera")
+        assert len(calls) == 2
+
+
+async def test_get_image_max_age(hass, image_mock_url):
+    """Test images are reused while younger than the configured max age."""
+    common.mock_camera_prefs(hass, "camera.demo_camera", {PREF_IMAGE_CACHE_MAX_AGE: 10})
+    demo_camera = hass.data[DOMAIN].get_entity("camera.demo_camera")
+
+    with patch(
+        "homeassistant.components.demo.camera.DemoCamera.camera_image",
+        return_value=b"Test",
+    ) as mock_camera:
+        await camera.async_get_image(hass, "camera.demo_camera")
+        image = await camera.async_get_image(hass, "camera.demo_camera")
+
+    assert image.content == b"Test"
+    assert len(mock_camera.mock_calls) == 1
+    assert demo_camera.image_cache.hits == 1
+    assert demo_camera.image_cache.misses == 1
+
+
+async def test_get_image_resized(hass, image_mock_url):
+    """Test fetching an image scaled to a width."""
+    with patch(
+        "homeassistant.components.demo.camera.DemoCamera.camera_image",
+        return_value=b"Test",
+    ), patch(
+        "homeassistant.components.camera.image_cache._resize_image",
+        return_value=b"Small",
+    ) as mock_resize:
+        image = await camera.async_get_image(hass, "camera.demo_camera", width=100)
+
+    assert image.content == b"Small"
+    assert mock_resize.mock_calls[0][1] == (b"Test", 100)
+
+
+async def test_camera_proxy_width(hass, hass_client, mock_camera):
+    """Test the camera proxy view passing the requested width."""
+    client = await hass_client()
+
+    with patch(
+        "homeassistant.components.camera.image_cache._resize_image",
+        return_value=b"Small",
+    ) as mock_resize:
+        resp = await client.get("/api/camera_proxy/camera.demo_camera?width=50")
+        assert resp.status == 200
+        assert await resp.read() == b"Small"
+        assert mock_resize.mock_calls[0][1] == (b"Test", 50)
+
+        resp = await client.get("/api/camera_proxy/camera.demo_camera?width=wide")
+        assert resp.status == 400
+
+
 async def test_snapshot_service(hass, mock_camera):
     """Test snapshot service."""
     mopen = mock_open()
@@ -218,6 +305,21 @@ async def test_websocket_update_prefs(
         == setup_camera_prefs[PREF_PRELOAD_STREAM]
     )
 
+    await client.send_json(
+        {
+            "id": 9,
+            "type": "camera/update_prefs",
+            "entity_id": "camera.demo_camera",
+            "image_cache_max_age": 5,
+        }
+    )
+    response = await client.receive_json()
+
+    assert response["success"]
+    assert response["result"][PREF_IMAGE_CACHE_MAX_AGE] == 5
+    demo_camera = hass.data[DOMAIN].get_entity("camera.demo_camera")
+    assert demo_camera.image_cache_max_age == 5
+
 
 async def test_play_stream_service_no_source(hass, mock_camera, mock_stream):
     """Test camera play_stream service."""
@@ -328,3 +430,87 @@ async def test_record_service(hass, mock_camera, mock_stream):
         # So long as we call stream.record, the rest should be covered
         # by those tests.
         assert mock_record_service.called
+
+
+async def test_mjpeg_hub_fan_out(hass):
+    """Test the MJPEG hub fetches once for all clients."""
+    images = iter([b"one", b"two", b"three"])
+    calls = []
+
+    async def image_cb():
+        """Return the next image."""
+        calls.append(1)
+        return next(images, None)
+
+    stopped = []
+    hub = MjpegStreamHub(hass, image_cb, "image/jpeg", 0, lambda: stopped.append(1))
+    fast = hub.async_subscribe()
+    slow = hub.async_subscribe()
+
+    assert await fast.get() == encode_frame("image/jpeg", b"one")
+    assert await fast.get() == encode_frame("image/jpeg", b"two")
+    assert await fast.get() == encode_frame("image/jpeg", b"three")
+    assert await fast.get() is None
+
+    # Slow reader only gets the end of the stream, older frames were dropped
+    assert slow.qsize() == 1
+    assert await slow.get() is None
+
+    assert len(calls) == 4
+    assert hub.client_count == 0
+    assert stopped == [1]
+
+    hub.async_unsubscribe(fast)
+    hub.async_unsubscribe(slow)
+    assert stopped == [1]
+
+
+async def test_mjpeg_hub_stops_without_clients(hass):
+    """Test the MJPEG hub stops polling when the last client leaves."""
+    calls = []
+
+    async def image_cb():
+        """Return an image."""
+        calls.append(1)
+        return b"image"
+
+    stopped = []
+    hub = MjpegStreamHub(hass, image_cb, "image/jpeg", 10, lambda: stopped.append(1))
+    first = hub.async_subscribe()
+    await first.get()
+
+    # Late joiners get the latest frame right away
+    second = hub.async_subscribe()
+    assert second.get_nowait() == encode_frame("image/jpeg", b"image")
+
+    hub.async_unsubscribe(first)
+    assert not stopped
+    hub.async_unsubscribe(second)
+    assert stopped == [1]
+    await asyncio.sleep(0)
+    assert len(calls) == 1
+
+
+async def test_still_stream_shared_between_clients(hass, hass_client, mock_camera):
+    """Test MJPEG clients of one camera share the image polling."""
+    client = await hass_client()
+    demo_camera = hass.data[DOMAIN].get_entity("camera.demo_camera")
+
+    with patch.object(
+        demo_camera, "async_camera_image", return_value=mock_coro(b"Test")
+    ) as mock_image:
+        resp_1 = await client.get(
+            "/api/camera_proxy_stream/camera.demo_camera?interval=10"
+        )
+        resp_2 = await client.get(
+            "/api/camera_proxy_stream/camera.demo_camera?interval=10"
+        )
+        frame = encode_frame("image/jpeg", b"Test")
+        assert await resp_1.content.readexactly(len(frame)) == frame
+        assert await resp_2.content.readexactly(len(frame)) == frame
+
+        assert mock_image.call_count == 1
+        assert len(hass.data[DATA_MJPEG_HUBS]) == 1
+
+        resp_1.close()
+        resp_2.close()
@@ -1,5 +1,6 @@
 """The test for the data filter sensor platform."""
 from datetime import timedelta
+import statistics
 import unittest
 from unittest.mock import patch
 
@@ -19,6 +20,7 @@ from tests.common import (
     assert_setup_component,
     get_test_home_assistant,
     init_recorder_component,
+    mock_coro,
 )
 
 
@@ -106,36 +108,34 @@ class TestFilterSensor(unittest.TestCase):
         t_2 = dt_util.utcnow() - timedelta(minutes=3)
 
         if missing:
-            fake_states = {}
+            fake_states = []
         else:
-            fake_states = {
-                "sensor.test_monitored": [
-                    ha.State("sensor.test_monitored", 18.0, last_changed=t_0),
-                    ha.State("sensor.test_monitored", 19.0, last_changed=t_1),
-                    ha.State("sensor.test_monitored", 18.2, last_changed=t_2),
-                ]
-            }
+            fake_states = [
+                ha.State("sensor.test_monitored", 18.0, last_changed=t_0),
+                ha.State("sensor.test_monitored", 19.0, last_changed=t_1),
+                ha.State("sensor.test_monitored", 18.2, last_changed=t_2),
+            ]
 
         with patch(
-            "homeassistant.components.history.state_changes_during_period",
-            return_value=fake_states,
-        ):
-            with patch(
-                "homeassistant.components.history.get_last_state_changes",
-                return_value=fake_states,
-            ):
-                with assert_setup_component(1, "sensor"):
-                    assert setup_component(self.hass, "sensor", config)
-
-                for value in self.values:
-                    self.hass.states.set(config["sensor"]["entity_id"], value.state)
-                    self.hass.block_till_done()
-
-                state = self.hass.states.get("sensor.test")
-                if missing:
-                    assert "18.05" == state.state
-                else:
-                    assert "17.05" == state.state
+            "homeassistant.components.filter.sensor.async_preload_states",
+            return_value=mock_coro(fake_states),
+        ) as mock_preload:
+            with assert_setup_component(1, "sensor"):
+                assert setup_component(self.hass, "sensor", config)
+
+            for value in self.values:
+                self.hass.states.set(config["sensor"]["entity_id"], value.state)
+                self.hass.block_till_done()
+
+            state = self.hass.states.get("sensor.test")
+            if missing:
+                assert "18.05" == state.state
+            else:
+                assert "17.05" == state.state
+
+        assert mock_preload.call_count == 1
+        assert mock_preload.call_args[1]["limit"] == 10
+        assert mock_preload.call_args[1]["start_time"] is None
 
     def test_chain_history_missing(self):
         """Test if filter chaining works when recorder is enabled but the source is not recorded."""
@@ -157,27 +157,24 @@ class TestFilterSensor(unittest.TestCase):
         t_1 = dt_util.utcnow() - timedelta(minutes=2)
         t_2 = dt_util.utcnow() - timedelta(minutes=3)
 
-        fake_states = {
-            "sensor.test_monitored": [
-                ha.State("sensor.test_monitored", 18.0, last_changed=t_0),
-                ha.State("sensor.test_monitored", 19.0, last_changed=t_1),
-                ha.State("sensor.test_monitored", 18.2, last_changed=t_2),
-            ]
-        }
+        fake_states = [
+            ha.State("sensor.test_monitored", 18.0, last_changed=t_0),
+            ha.State("sensor.test_monitored", 19.0, last_changed=t_1),
+            ha.State("sensor.test_monitored", 18.2, last_changed=t_2),
+        ]
         with patch(
-            "homeassistant.components.history.state_changes_during_period",
-            return_value=fake_states,
-        ):
-            with patch(
-                "homeassistant.components.history.get_last_state_changes",
-                return_value=fake_states,
-            ):
-                with assert_setup_component(1, "sensor"):
-                    assert setup_component(self.hass, "sensor", config)
+            "homeassistant.components.filter.sensor.async_preload_states",
+            return_value=mock_coro(fake_states),
+        ) as mock_preload:
+            with assert_setup_component(1, "sensor"):
+                assert setup_component(self.hass, "sensor", config)
 
-                self.hass.block_till_done()
-                state = self.hass.states.get("sensor.test")
-                assert "18.0" == state.state
+            self.hass.block_till_done()
+            state = self.hass.states.get("sensor.test")
+            assert "18.0" == state.state
+
+        assert mock_preload.call_args[1]["limit"] is None
+        assert mock_preload.call_args[1]["start_time"] is not None
 
     def test_outlier(self):
         """Test if outlier filter works."""
@@ -208,6 +205,19 @@ class TestFilterSensor(unittest.TestCase):
             filtered = filt.filter_state(state)
         assert 21 == filtered.state
 
+    def test_outlier_rolling_median(self):
+        """Test the outlier filter compares against the median of its window."""
+        filt = OutlierFilter(window_size=4, precision=2, entity=None, radius=3.0)
+        raw_values = [10, 12, 11, 30, 13, 9, 40, 12, 12, 11]
+        window = []
+        for value in raw_values:
+            expected = value
+            if len(window) == 4 and abs(value - statistics.median(window)) > 3.0:
+                expected = statistics.median(window)
+            filtered = filt.filter_state(ha.State("sensor.test_monitored", value))
+            assert expected == filtered.state
+            window = (window + [value])[-4:]
+
     def test_precision_zero(self):
         """Test if precision of zero returns an integer."""
         filt = LowPassFilter(window_size=10, precision=0, entity=None, time_constant=10)
@@ -278,6 +288,28 @@ class TestFilterSensor(unittest.TestCase):
                 filtered.append(new_state)
         assert [20, 18, 22] == [f.state for f in filtered]
 
+    def test_chain_replay(self):
+        """Test replaying history gives the same result as live updates."""
+        config = {
+            "sensor": {
+                "platform": "filter",
+                "name": "test",
+                "entity_id": "sensor.test_monitored",
+                "filters": [
+                    {"filter": "outlier", "window_size": 10, "radius": 4.0},
+                    {"filter": "lowpass", "time_constant": 10, "precision": 2},
+                    {"filter": "throttle", "window_size": 1},
+                ],
+            }
+        }
+        with assert_setup_component(1, "sensor"):
+            assert setup_component(self.hass, "sensor", config)
+        sensor = self.hass.data["sensor"].get_entity("sensor.test")
+
+        replayed = sensor._filter_states(self.values)
+        assert [state for state, _ in replayed] == self.values
+        assert "18.05" == str(replayed[-1][1].state)
+
     def test_time_sma(self):
         """Test if time_sma filter works."""
         filt = TimeSMAFilter(
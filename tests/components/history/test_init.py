@@ -1,10 +1,12 @@
 """The tests the History component."""
 # pylint: disable=protected-access,invalid-name
 from datetime import timedelta
+from functools import partial
 import unittest
 from unittest.mock import patch, sentinel
 
 from homeassistant.components import history, recorder
+from homeassistant.components.recorder import models
 import homeassistant.core as ha
 from homeassistant.setup import async_setup_component, setup_component
 import homeassistant.util.dt as dt_util
@@ -650,3 +652,113 @@ async def test_fetch_period_api_with_include_order(hass, hass_client):
         params={"filter_entity_id": "non.existing,something.else"},
     )
     assert response.status == 200
+
+
+async def test_fetch_period_api_with_minimal_response(hass, hass_client):
+    """Test the fetch period view for history with minimal_response."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    start = dt_util.utcnow()
+    for power, phase in ((100, 100), (200, 200), (300, 300), (350, 300)):
+        hass.states.async_set(
+            "sensor.power",
+            power,
+            {"unit_of_measurement": "W", "friendly_name": "Power", "phase": phase},
+        )
+    hass.states.async_set("sensor.power", 400, {"hidden": True})
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_client()
+    response = await client.get(
+        "/api/history/period/{}".format(start.isoformat()),
+        params={"filter_entity_id": "sensor.power", "minimal_response": ""},
+    )
+    assert response.status == 200
+    json = await response.json()
+    assert len(json) == 1
+    first, *rest = json[0]
+    assert first["entity_id"] == "sensor.power"
+    assert first["attributes"]["unit_of_measurement"] == "W"
+    assert [state["state"] for state in rest] == ["200", "300", "350"]
+    assert all(set(state) == {"state", "last_changed"} for state in rest)
+
+    response = await client.get(
+        "/api/history/period/{}".format(start.isoformat()),
+        params={"filter_entity_id": "sensor.power", "attributes": "phase,missing"},
+    )
+    assert response.status == 200
+    json = await response.json()
+    assert [state["attributes"] for state in json[0][1:]] == [
+        {"phase": 200},
+        {"phase": 300},
+        {"phase": 300},
+    ]
+
+
+async def test_significant_states_parses_needed_attributes(hass):
+    """Test only the attributes that are handed out or filtered on are parsed."""
+    await hass.async_add_job(init_recorder_component, hass)
+    start = dt_util.utcnow()
+    for power, phase in ((100, 100), (200, 200), (300, 300), (350, 300)):
+        hass.states.async_set(
+            "sensor.power",
+            power,
+            {"unit_of_measurement": "W", "friendly_name": "Power", "phase": phase},
+        )
+        if power == 100:
+            after_first = dt_util.utcnow()
+    hass.states.async_set("sensor.power", 400, {"hidden": True})
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    async def get_significant_states(start_time=start, **kwargs):
+        """Return the states of sensor.power, parsed attributes and queries."""
+        with patch.object(models, "json", wraps=models.json) as mock_json, patch.object(
+            history, "_query_states", wraps=history._query_states
+        ) as mock_query:
+            states = await hass.async_add_executor_job(
+                partial(
+                    history.get_significant_states,
+                    hass,
+                    start_time,
+                    entity_ids=["sensor.power"],
+                    **kwargs,
+                )
+            )
+        return (
+            states["sensor.power"],
+            mock_json.loads.call_count,
+            mock_query.call_count,
+        )
+
+    # Only the first state and the one that may be hidden are parsed, the
+    # attributes of the first state are read with an extra query
+    states, parsed, queries = await get_significant_states(minimal_response=True)
+    assert [state["state"] for state in states[1:]] == ["200", "300", "350"]
+    assert states[0].attributes["friendly_name"] == "Power"
+    assert parsed == 2
+    assert queries == 3
+
+    # The state at the start time is returned in full, its attributes are not
+    # read again
+    states, parsed, queries = await get_significant_states(
+        start_time=after_first, minimal_response=True
+    )
+    assert [state["state"] for state in states[1:]] == ["200", "300", "350"]
+    assert parsed == 1
+    assert queries == 2
+    assert states[0].state == "100"
+    assert states[0].attributes["friendly_name"] == "Power"
+
+    # The last two states have identical attributes
+    states, parsed, _ = await get_significant_states(attributes=["unit_of_measurement"])
+    assert [state["attributes"] for state in states[1:]] == [
+        {"unit_of_measurement": "W"}
+    ] * 3
+    assert parsed == 3
+
+    # Attributes that do not mention a requested key are not parsed
+    states, parsed, _ = await get_significant_states(attributes=["missing"])
+    assert [state["attributes"] for state in states[1:]] == [{}] * 3
+    assert parsed == 1
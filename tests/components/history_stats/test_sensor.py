@@ -12,6 +12,7 @@ from homeassistant.const import STATE_UNKNOWN
 import homeassistant.core as ha
 from homeassistant.helpers.template import Template
 from homeassistant.setup import setup_component
+from homeassistant.util.async_ import run_callback_threadsafe
 import homeassistant.util.dt as dt_util
 
 from tests.common import get_test_home_assistant, init_recorder_component
@@ -151,6 +152,77 @@ class TestHistoryStatsSensor(unittest.TestCase):
         assert sensor3.state == 2
         assert sensor4.state == 50
 
+    def test_measure_incremental(self):
+        """Test the measure is kept up to date without reading history again."""
+        init_recorder_component(self.hass)
+        config = {
+            "history": {},
+            "sensor": {
+                "platform": "history_stats",
+                "entity_id": "binary_sensor.test_id",
+                "state": "on",
+                "start": "{{ as_timestamp(now()) - 3600 }}",
+                "end": "{{ now() }}",
+                "type": "time",
+                "name": "Test",
+            },
+        }
+        assert setup_component(self.hass, "sensor", config)
+
+        # Stay in the past, the sensor compares the period with the wall clock
+        start = dt_util.utcnow().replace(microsecond=0) - timedelta(hours=2)
+        now = [start]
+
+        fake_states = {
+            "binary_sensor.test_id": [
+                ha.State(
+                    "binary_sensor.test_id",
+                    "on",
+                    last_changed=start - timedelta(minutes=40),
+                ),
+                ha.State(
+                    "binary_sensor.test_id",
+                    "off",
+                    last_changed=start - timedelta(minutes=30),
+                ),
+            ]
+        }
+
+        def read_history(*args):
+            """Return the history, receiving a state change while reading it."""
+            self.hass.states.set("binary_sensor.test_id", "on")
+            # Let the state change listener run before history is returned
+            run_callback_threadsafe(self.hass.loop, lambda: None).result()
+            return fake_states
+
+        def set_state(minutes, state):
+            """Change the tracked entity at minutes after the start."""
+            now[0] = start + timedelta(minutes=minutes)
+            self.hass.states.set("binary_sensor.test_id", state)
+            self.hass.block_till_done()
+            return self.hass.states.get("sensor.test").state
+
+        with patch("homeassistant.util.dt.utcnow", new=lambda: now[0]), patch(
+            "homeassistant.util.dt.now",
+            new=lambda time_zone=None: dt_util.as_local(now[0]),
+        ), patch(
+            "homeassistant.components.history.state_changes_during_period",
+            side_effect=read_history,
+        ) as mock_changes, patch(
+            "homeassistant.components.history.get_state", return_value=None
+        ):
+            self.hass.start()
+            self.hass.block_till_done()
+
+            # On from -40 to -30 and since the start
+            assert self.hass.states.get("sensor.test").state == "0.17"
+            assert set_state(10, "off") == "0.33"
+            assert set_state(15, "on") == "0.33"
+            # The window slid past the change at -40, on from -35 to -30
+            assert set_state(25, "off") == "0.42"
+
+        assert mock_changes.call_count == 1
+
     def test_wrong_date(self):
         """Test when start or end value is not a timestamp or a date."""
         good = Template("{{ now() }}", self.hass)
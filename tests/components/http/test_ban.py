@@ -14,6 +14,8 @@ from homeassistant.components.http.ban import (
     KEY_BANNED_IPS,
     KEY_FAILED_LOGIN_ATTEMPTS,
     IpBan,
+    IpBanList,
+    async_save_ip_ban,
     setup_bans,
 )
 from homeassistant.components.http.view import request_handler_factory
@@ -24,6 +26,7 @@ from . import mock_real_ip
 from tests.common import mock_coro
 
 BANNED_IPS = ["200.201.202.203", "100.64.0.2"]
+BANNED_NETWORKS = ["198.51.100.0/24", "2001:db8::/32"]
 
 
 async def test_access_from_banned_ip(hass, aiohttp_client):
@@ -44,6 +47,62 @@ async def test_access_from_banned_ip(hass, aiohttp_client):
         assert resp.status == 403
 
 
+async def test_access_from_banned_network(hass, aiohttp_client):
+    """Test accessing to server from an address in a banned network."""
+    app = web.Application()
+    app.router.add_get("/", lambda request: web.Response(text="ok"))
+    setup_bans(hass, app, 5)
+    set_real_ip = mock_real_ip(app)
+
+    with patch(
+        "homeassistant.components.http.ban.async_load_ip_bans_config",
+        return_value=mock_coro([IpBan(network) for network in BANNED_NETWORKS]),
+    ):
+        client = await aiohttp_client(app)
+
+    for remote_addr in ("198.51.100.7", "2001:db8::1"):
+        set_real_ip(remote_addr)
+        resp = await client.get("/")
+        assert resp.status == 403
+
+    for remote_addr in ("198.51.101.7", "2001:db9::1"):
+        set_real_ip(remote_addr)
+        resp = await client.get("/")
+        assert resp.status == 200
+
+
+def test_ip_ban_list():
+    """Test looking up addresses in the ban list."""
+    ip_bans = IpBanList(IpBan(ip_ban) for ip_ban in BANNED_IPS + BANNED_NETWORKS)
+
+    assert len(ip_bans) == 4
+    assert [str(ip_ban) for ip_ban in ip_bans] == BANNED_IPS + BANNED_NETWORKS
+    assert ip_bans.is_banned(ip_address("100.64.0.2"))
+    assert ip_bans.is_banned(ip_address("198.51.100.255"))
+    assert not ip_bans.is_banned(ip_address("100.64.0.3"))
+
+    ip_bans.add(IpBan("100.64.0.0/16"))
+    assert ip_bans.is_banned(ip_address("100.64.0.3"))
+
+
+async def test_ip_bans_written_in_batches(hass):
+    """Test bans queued together are written with one file update."""
+    app = web.Application()
+    setup_bans(hass, app, 5)
+
+    with patch(
+        "homeassistant.components.http.ban.update_ip_bans_config"
+    ) as mock_update:
+        for remote_addr in BANNED_IPS:
+            async_save_ip_ban(hass, app, IpBan(remote_addr))
+        await hass.async_block_till_done()
+
+    assert len(mock_update.mock_calls) == 1
+    path, ip_bans = mock_update.mock_calls[0][1]
+    assert path == hass.config.path(IP_BANS_FILE)
+    assert [str(ip_ban) for ip_ban in ip_bans] == BANNED_IPS
+
+
 async def test_ban_middleware_not_loaded_by_config(hass):
     """Test accessing to server from banned IP when feature is off."""
     with patch("homeassistant.components.http.setup_bans") as mock_setup:
@@ -92,6 +151,7 @@ async def test_ip_bans_file_creation(hass, aiohttp_client):
         resp = await client.get("/")
         assert resp.status == 401
         assert len(app[KEY_BANNED_IPS]) == len(BANNED_IPS) + 1
+        await hass.async_block_till_done()
         m.assert_called_once_with(hass.config.path(IP_BANS_FILE), "a")
 
         resp = await client.get("/")
@@ -0,0 +1,117 @@
+"""The tests for static file serving of the HTTP component."""
+import gzip
+from unittest.mock import patch
+
+from aiohttp import hdrs, web
+
+from homeassistant.components.http import static
+from homeassistant.components.http.static import CachingStaticResource
+
+
+async def _setup_client(aiohttp_client, path, **kwargs):
+    """Return a client for an app serving path as static files."""
+    app = web.Application()
+    app.router.register_resource(CachingStaticResource("/static", str(path)))
+    return await aiohttp_client(app, **kwargs)
+
+
+async def test_serve_file_with_etag(aiohttp_client, tmp_path):
+    """Test serving a file and answering conditional requests."""
+    (tmp_path / "app.js").write_text("console.log('hello');")
+    client = await _setup_client(aiohttp_client, tmp_path)
+
+    resp = await client.get("/static/app.js", headers={hdrs.ACCEPT_ENCODING: ""})
+    assert resp.status == 200
+    assert await resp.text() == "console.log('hello');"
+    assert hdrs.CACHE_CONTROL in resp.headers
+    etag = resp.headers[hdrs.ETAG]
+
+    resp = await client.get(
+        "/static/app.js", headers={hdrs.IF_NONE_MATCH: etag, hdrs.ACCEPT_ENCODING: ""},
+    )
+    assert resp.status == 304
+    assert resp.headers[hdrs.ETAG] == etag
+
+    resp = await client.get("/static/missing.js")
+    assert resp.status == 404
+
+
+async def test_serve_precompressed(aiohttp_client, tmp_path):
+    """Test serving precompressed siblings the client accepts."""
+    (tmp_path / "app.js").write_text("console.log('hello');")
+    (tmp_path / "app.js.gz").write_bytes(gzip.compress(b"console.log('hello');"))
+    (tmp_path / "app.js.br").write_bytes(b"brotli")
+    client = await _setup_client(aiohttp_client, tmp_path, auto_decompress=False)
+
+    resp = await client.get(
+        "/static/app.js", headers={hdrs.ACCEPT_ENCODING: "gzip, deflate, br"}
+    )
+    assert resp.status == 200
+    assert resp.headers[hdrs.CONTENT_ENCODING] == "br"
+    assert resp.headers[hdrs.CONTENT_TYPE] == "application/javascript"
+    assert resp.headers[hdrs.VARY] == hdrs.ACCEPT_ENCODING
+    assert await resp.read() == b"brotli"
+    br_etag = resp.headers[hdrs.ETAG]
+
+    resp = await client.get("/static/app.js", headers={hdrs.ACCEPT_ENCODING: "gzip"})
+    assert resp.status == 200
+    assert resp.headers[hdrs.CONTENT_ENCODING] == "gzip"
+    assert gzip.decompress(await resp.read()) == b"console.log('hello');"
+    assert resp.headers[hdrs.ETAG] != br_etag
+
+    resp = await client.get(
+        "/static/app.js", headers={hdrs.ACCEPT_ENCODING: "br;q=0, gzip;q=0.5"}
+    )
+    assert resp.headers[hdrs.CONTENT_ENCODING] == "gzip"
+
+    resp = await client.get("/static/app.js", headers={hdrs.ACCEPT_ENCODING: "*"})
+    assert resp.headers[hdrs.CONTENT_ENCODING] == "br"
+
+    for accept_encoding in ("xgzip, brx", "*;q=0", "br; q=0.0, gzip;q=0"):
+        resp = await client.get(
+            "/static/app.js", headers={hdrs.ACCEPT_ENCODING: accept_encoding}
+        )
+        assert hdrs.CONTENT_ENCODING not in resp.headers
+        assert await resp.text() == "console.log('hello');"
+
+
+async def test_file_lookup_cached(aiohttp_client, tmp_path):
+    """Test files are only looked up on disk once."""
+    (tmp_path / "app.js").write_text("console.log('hello');")
+    client = await _setup_client(aiohttp_client, tmp_path)
+
+    with patch.object(
+        CachingStaticResource,
+        "_lookup_file",
+        side_effect=CachingStaticResource._lookup_file,
+        autospec=True,
+    ) as mock_lookup:
+        for _ in range(3):
+            resp = await client.get("/static/app.js")
+            assert resp.status == 200
+
+    assert mock_lookup.call_count == 1
+
+
+async def test_file_cache_bounded(aiohttp_client, tmp_path):
+    """Test the least recently requested files are dropped from the cache."""
+    for name in ("one", "two", "three"):
+        (tmp_path / f"{name}.js").write_text(name)
+    client = await _setup_client(aiohttp_client, tmp_path)
+
+    with patch.object(static, "FILE_CACHE_SIZE", 2), patch.object(
+        CachingStaticResource,
+        "_lookup_file",
+        side_effect=CachingStaticResource._lookup_file,
+        autospec=True,
+    ) as mock_lookup:
+        for name in ("one", "two", "one", "three", "one", "two"):
+            resp = await client.get(f"/static/{name}.js")
+            assert await resp.text() == name
+
+    assert [call[0][1] for call in mock_lookup.call_args_list] == [
+        "one.js",
+        "two.js",
+        "three.js",
+        "two.js",
+    ]
@@ -3,6 +3,7 @@
 from datetime import datetime, timedelta
 import logging
 import unittest
+from unittest.mock import patch
 
 import pytest
 import voluptuous as vol
@@ -15,6 +16,8 @@ from homeassistant.components.homekit.const import (
     DOMAIN as DOMAIN_HOMEKIT,
     EVENT_HOMEKIT_CHANGED,
 )
+from homeassistant.components.recorder.models import States
+from homeassistant.components.recorder.util import session_scope
 from homeassistant.const import (
     ATTR_ENTITY_ID,
     ATTR_HIDDEN,
@@ -120,6 +123,47 @@ class TestComponentLogbook(unittest.TestCase):
 
         assert 0 == len(calls)
 
+    def test_get_events_state_changes(self):
+        """Test state changes are rebuilt from the recorded states."""
+        self.hass.states.set("switch.test_switch", "off")
+        self.hass.states.set("switch.test_switch", "on", {"friendly_name": "Test"})
+        self.hass.states.remove("switch.test_switch")
+        self.hass.block_till_done()
+        self.hass.data[recorder.DATA_INSTANCE].block_till_done()
+
+        events = logbook._get_events(
+            self.hass,
+            {},
+            dt_util.utcnow() - timedelta(hours=1),
+            dt_util.utcnow() + timedelta(hours=1),
+        )
+
+        # The new entity and its removal are not reported
+        assert len(events) == 1
+        assert events[0]["entity_id"] == "switch.test_switch"
+        assert events[0]["name"] == "Test"
+        assert events[0]["message"] == "turned on"
+
+    def test_get_events_previous_state_purged(self):
+        """Test a state change is reported after its previous state was purged."""
+        self.hass.states.set("switch.test_switch", "off")
+        self.hass.states.set("switch.test_switch", "on")
+        self.hass.block_till_done()
+        self.hass.data[recorder.DATA_INSTANCE].block_till_done()
+
+        with session_scope(hass=self.hass) as session:
+            session.query(States).filter(States.state == "off").delete()
+
+        events = logbook._get_events(
+            self.hass,
+            {},
+            dt_util.utcnow() - timedelta(hours=1),
+            dt_util.utcnow() + timedelta(hours=1),
+        )
+
+        assert len(events) == 1
+        assert events[0]["message"] == "turned on"
+
     def test_humanify_filter_sensor(self):
         """Test humanify filter too frequent sensor values."""
         entity_id = "sensor.bla"
@@ -1484,3 +1528,102 @@ async def test_humanify_script_started_event(hass):
     assert event2["domain"] == "script"
     assert event2["message"] == "started"
     assert event2["entity_id"] == "script.bye"
+
+
+async def test_event_stream(hass, hass_ws_client):
+    """Test streaming the logbook over the websocket API."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, "logbook", {})
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    hass.states.async_set("switch.test", STATE_OFF)
+    hass.states.async_set("switch.test", STATE_ON)
+    hass.states.async_set("switch.second", STATE_OFF)
+    hass.states.async_set("switch.second", STATE_ON)
+    await hass.async_block_till_done()
+
+    client = await hass_ws_client(hass)
+    await client.send_json(
+        {
+            "id": 5,
+            "type": "logbook/event_stream",
+            "start_time": dt_util.start_of_local_day().isoformat(),
+        }
+    )
+    msg = await client.receive_json()
+    assert msg["id"] == 5
+    assert msg["success"]
+
+    msg = await client.receive_json()
+    assert msg["type"] == "event"
+    assert not msg["event"]["partial"]
+    entries = msg["event"]["events"]
+    assert [entry["entity_id"] for entry in entries] == ["switch.test", "switch.second"]
+
+    hass.states.async_set("switch.test", STATE_OFF)
+    msg = await client.receive_json()
+    entries = msg["event"]["events"]
+    assert len(entries) == 1
+    assert entries[0]["entity_id"] == "switch.test"
+    assert entries[0]["message"] == "turned off"
+
+    await client.send_json({"id": 6, "type": "unsubscribe_events", "subscription": 5})
+    msg = await client.receive_json()
+    assert msg["id"] == 6
+    assert msg["success"]
+
+
+async def test_event_stream_pages(hass, hass_ws_client, monkeypatch):
+    """Test the logbook history is streamed in pages."""
+    monkeypatch.setattr(logbook, "STREAM_PAGE_SIZE", 3)
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, "logbook", {})
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    start = dt_util.utcnow() - timedelta(hours=6)
+    for hour in range(5):
+        with patch(
+            "homeassistant.core.dt_util.utcnow",
+            return_value=start + timedelta(hours=hour),
+        ):
+            hass.states.async_set("switch.test", STATE_ON if hour % 2 else STATE_OFF)
+    await hass.async_block_till_done()
+
+    client = await hass_ws_client(hass)
+    await client.send_json(
+        {
+            "id": 5,
+            "type": "logbook/event_stream",
+            "start_time": (start - timedelta(hours=1)).isoformat(),
+            "entity_id": "switch.test",
+        }
+    )
+    msg = await client.receive_json()
+    assert msg["success"]
+
+    entries = []
+    while True:
+        msg = await client.receive_json()
+        entries.extend(msg["event"]["events"])
+        if not msg["event"]["partial"]:
+            break
+    assert [entry["message"] for entry in entries] == [
+        "turned on",
+        "turned off",
+        "turned on",
+        "turned off",
+    ]
+
+
+async def test_event_stream_invalid_start_time(hass, hass_ws_client):
+    """Test streaming the logbook with an invalid start time."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, "logbook", {})
+
+    client = await hass_ws_client(hass)
+    await client.send_json(
+        {"id": 5, "type": "logbook/event_stream", "start_time": "invalid"}
+    )
+    msg = await client.receive_json()
+    assert not msg["success"]
+    assert msg["error"]["code"] == "invalid_start_time"
@@ -1,15 +1,17 @@
 """The tests for the Recorder component."""
 # pylint: disable=protected-access
 import unittest
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import pytest
+from sqlalchemy import exc
 
-from homeassistant.components.recorder import Recorder
+from homeassistant.components.recorder import Recorder, insert_events
 from homeassistant.components.recorder.const import DATA_INSTANCE
-from homeassistant.components.recorder.models import Events, States
+from homeassistant.components.recorder.models import Entities, Events, States
 from homeassistant.components.recorder.util import session_scope
-from homeassistant.const import MATCH_ALL
+from homeassistant.const import EVENT_STATE_CHANGED, MATCH_ALL
+import homeassistant.core as ha
 from homeassistant.core import callback
 from homeassistant.setup import async_setup_component
 
@@ -189,6 +191,164 @@ def test_saving_state_include_domain_exclude_entity(hass_recorder):
     assert hass.states.get("test.ok").state == "state2"
 
 
+def test_saving_state_batch(hass_recorder):
+    """Test saving a batch of states respects the entity filter."""
+    hass = hass_recorder({"exclude": {"entities": "test.excluded"}})
+    states = [
+        ("test.recorder", "on", {"test_attr": 5}),
+        ("test.excluded", "on", None),
+        ("test2.recorder", "off", None),
+    ]
+
+    hass.add_job(hass.states.async_set_many, states)
+    hass.block_till_done()
+    hass.data[DATA_INSTANCE].block_till_done()
+
+    with session_scope(hass=hass) as session:
+        db_states = list(session.query(States))
+        assert len(db_states) == 2
+        assert all(db_state.event_id is not None for db_state in db_states)
+        assert len({db_state.event_id for db_state in db_states}) == 2
+        native = [db_state.to_native() for db_state in db_states]
+
+    assert native[0] == hass.states.get("test.recorder")
+    assert native[1] == hass.states.get("test2.recorder")
+
+
+def test_saving_state_links_old_state(hass_recorder):
+    """Test states are linked to the previous state of their entity."""
+    hass = hass_recorder()
+
+    for state in ("on", "off"):
+        hass.states.set("test.recorder", state)
+    hass.states.remove("test.recorder")
+    hass.states.set("test.recorder", "on")
+    hass.block_till_done()
+    hass.data[DATA_INSTANCE].block_till_done()
+
+    with session_scope(hass=hass) as session:
+        db_states = list(session.query(States).order_by(States.state_id))
+        assert [db_state.state for db_state in db_states] == ["on", "off", "", "on"]
+        assert [db_state.old_state_id for db_state in db_states] == [
+            None,
+            db_states[0].state_id,
+            db_states[1].state_id,
+            None,
+        ]
+
+        # State payloads are not duplicated in the events table
+        db_events = list(session.query(Events).filter_by(event_type="state_changed"))
+        assert len(db_events) == 4
+        assert all(db_event.event_data == "{}" for db_event in db_events)
+
+
+def test_saving_state_interns_entity_id(hass_recorder):
+    """Test states refer to a single entities row and skip equal timestamps."""
+    hass = hass_recorder()
+
+    hass.states.set("test.recorder", "on", {"attr": 1})
+    hass.states.set("test.recorder", "on", {"attr": 2})
+    hass.states.set("test.other", "on")
+    hass.block_till_done()
+    hass.data[DATA_INSTANCE].block_till_done()
+
+    with session_scope(hass=hass) as session:
+        entities = {
+            entity.entity_id: entity.entity_row_id for entity in session.query(Entities)
+        }
+        assert set(entities) == {"test.recorder", "test.other"}
+
+        db_states = list(session.query(States).order_by(States.state_id))
+        assert [db_state.entity_row_id for db_state in db_states] == [
+            entities["test.recorder"],
+            entities["test.recorder"],
+            entities["test.other"],
+        ]
+        # Only the attribute change has a last_changed of its own
+        assert db_states[0].last_changed is None
+        assert db_states[1].last_changed is not None
+        assert db_states[1].to_native() == hass.states.get("test.recorder")
+
+
+def test_insert_events_skips_invalid_json(hass_recorder):
+    """Test events that cannot be serialized do not stop the batch."""
+    hass = hass_recorder()
+    hass.data[DATA_INSTANCE].block_till_done()
+
+    events = [
+        ha.Event("test_event", {"valid": 1}),
+        ha.Event("test_event", {"invalid": object()}),
+        ha.Event("test_event", {"valid": 2}),
+    ]
+    with session_scope(hass=hass) as session:
+        insert_events(session, events, {}, {})
+
+    with session_scope(hass=hass) as session:
+        db_events = list(session.query(Events).filter_by(event_type="test_event"))
+        assert [db_event.to_native().data for db_event in db_events] == [
+            {"valid": 1},
+            {"valid": 2},
+        ]
+
+
+def test_save_events_drops_only_failing_event(hass_recorder):
+    """Test a batch that fails to save is retried one event at a time."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    instance.block_till_done()
+
+    def failing_insert_events(session, events, state_ids, entity_row_ids):
+        if any(event.data.get("fail") for event in events):
+            raise exc.IntegrityError("INSERT", {}, Exception())
+        insert_events(session, events, state_ids, entity_row_ids)
+
+    events = [
+        ha.Event("test_event", {"value": 1}),
+        ha.Event("test_event", {"fail": True}),
+        ha.Event("test_event", {"value": 2}),
+    ]
+    with patch(
+        "homeassistant.components.recorder.insert_events",
+        side_effect=failing_insert_events,
+    ) as mock_insert:
+        instance._save_events(events)
+
+    assert mock_insert.call_count == 4
+    with session_scope(hass=hass) as session:
+        db_events = list(session.query(Events).filter_by(event_type="test_event"))
+        assert [db_event.to_native().data for db_event in db_events] == [
+            {"value": 1},
+            {"value": 2},
+        ]
+
+
+def test_insert_events_syncs_postgresql_sequences():
+    """Test sequences are moved past the assigned ids on PostgreSQL."""
+    session = MagicMock()
+    session.bind.dialect.name = "postgresql"
+    session.query.return_value.scalar.return_value = 10
+    state = ha.State("light.kitchen", "on")
+    events = [
+        ha.Event("test_event", {}),
+        ha.Event(
+            EVENT_STATE_CHANGED,
+            {"entity_id": "light.kitchen", "old_state": None, "new_state": state},
+        ),
+    ]
+
+    insert_events(session, events, {}, {"light.kitchen": 1})
+
+    setvals = [
+        call[0][1]
+        for call in session.execute.call_args_list
+        if "setval" in str(call[0][0])
+    ]
+    assert setvals == [
+        {"table_name": "events", "column_name": "event_id", "last_id": 12},
+        {"table_name": "states", "column_name": "state_id", "last_id": 11},
+    ]
+
+
 def test_recorder_setup_failure():
     """Test some exceptions."""
     hass = get_test_home_assistant()
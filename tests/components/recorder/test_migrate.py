@@ -76,3 +76,100 @@ def test_forgiving_add_index():
     engine = create_engine("sqlite://", poolclass=StaticPool)
     models.Base.metadata.create_all(engine)
     migration._create_index(engine, "states", "ix_states_context_id")
+
+
+def test_link_old_states():
+    """Test linking states to their previous state and slimming events."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    models_original.Base.metadata.create_all(engine)
+    migration._add_columns(engine, "states", ["old_state_id INTEGER"])
+
+    rows = [
+        ("light.kitchen", "on", '"old_state": null'),
+        ("light.bedroom", "on", '"old_state": null'),
+        ("light.kitchen", "off", '"old_state": {}'),
+        ("light.kitchen", "", '"old_state": {}'),
+        ("light.kitchen", "on", '"old_state": null'),
+        ("light.kitchen", "off", '"old_state": {}'),
+    ]
+    for idx, (entity_id, state, event_data) in enumerate(rows, 1):
+        engine.execute(
+            "INSERT INTO events (event_id, event_type, event_data) "
+            "VALUES (?, 'state_changed', ?)",
+            idx,
+            f'{{"entity_id": "{entity_id}", {event_data}}}',
+        )
+        engine.execute(
+            "INSERT INTO states (state_id, entity_id, state, event_id) "
+            "VALUES (?, ?, ?, ?)",
+            idx,
+            entity_id,
+            state,
+            idx,
+        )
+
+    with patch.object(migration, "MIGRATION_BATCH_SIZE", 4):
+        migration._link_old_states(engine)
+
+    assert [
+        tuple(row)
+        for row in engine.execute("SELECT old_state_id FROM states ORDER BY state_id")
+    ] == [(None,), (None,), (1,), (3,), (None,), (5,)]
+    assert {row[0] for row in engine.execute("SELECT event_data FROM events")} == {"{}"}
+
+
+def test_intern_entities_and_timestamps():
+    """Test moving states to the entities table and epoch timestamps."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    models_original.Base.metadata.create_all(engine)
+    models.Entities.__table__.create(engine)
+    migration._add_columns(
+        engine,
+        "states",
+        [
+            "entity_row_id INTEGER",
+            "last_changed_ts DOUBLE PRECISION",
+            "last_updated_ts DOUBLE PRECISION",
+        ],
+    )
+
+    rows = [
+        ("light.kitchen", "2020-01-01 10:00:00.000000", "2020-01-01 10:00:00.000000"),
+        ("light.bedroom", "2020-01-01 10:00:00.000000", "2020-01-01 11:00:00.000000"),
+        ("light.kitchen", "2020-01-01 12:00:00.500000", "2020-01-01 12:00:00.500000"),
+        # Legacy row without an entity id is removed
+        (None, "2020-01-01 13:00:00.000000", "2020-01-01 13:00:00.000000"),
+    ]
+    for idx, (entity_id, last_changed, last_updated) in enumerate(rows, 1):
+        engine.execute(
+            "INSERT INTO states (state_id, entity_id, state, last_changed, "
+            "last_updated, created) VALUES (?, ?, 'on', ?, ?, ?)",
+            idx,
+            entity_id,
+            last_changed,
+            last_updated,
+            last_updated,
+        )
+
+    with patch.object(migration, "MIGRATION_BATCH_SIZE", 2):
+        migration._intern_entities_and_timestamps(engine)
+
+    entity_row_ids = {
+        entity_id: entity_row_id
+        for entity_id, entity_row_id in engine.execute(
+            "SELECT entity_id, entity_row_id FROM entities"
+        )
+    }
+    assert set(entity_row_ids) == {"light.kitchen", "light.bedroom"}
+
+    assert [
+        tuple(row)
+        for row in engine.execute(
+            "SELECT entity_row_id, last_changed_ts, last_updated_ts, entity_id, "
+            "last_changed, last_updated, created FROM states ORDER BY state_id"
+        )
+    ] == [
+        (entity_row_ids["light.kitchen"], None, 1577872800.0) + (None,) * 4,
+        (entity_row_ids["light.bedroom"], 1577872800.0, 1577876400.0) + (None,) * 4,
+        (entity_row_ids["light.kitchen"], None, 1577880000.5) + (None,) * 4,
+    ]
@@ -5,7 +5,15 @@ import unittest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import scoped_session, sessionmaker
 
-from homeassistant.components.recorder.models import Base, Events, RecorderRuns, States
+from homeassistant.components.recorder.models import (
+    Base,
+    Entities,
+    Events,
+    LazyEvent,
+    LazyState,
+    RecorderRuns,
+    States,
+)
 from homeassistant.const import EVENT_STATE_CHANGED
 import homeassistant.core as ha
 from homeassistant.util import dt
@@ -44,6 +52,15 @@ class TestEvents(unittest.TestCase):
         event = ha.Event("test_event", {"some_data": 15})
         assert event == Events.from_event(event).to_native()
 
+    def test_from_state_changed_event(self):
+        """Test the states of state changed events are not stored."""
+        state = ha.State("sensor.temperature", "18")
+        event = ha.Event(
+            EVENT_STATE_CHANGED,
+            {"entity_id": "sensor.temperature", "old_state": None, "new_state": state},
+        )
+        assert Events.from_event(event).event_data == "{}"
+
 
 class TestStates(unittest.TestCase):
     """Test States model."""
@@ -75,7 +92,7 @@ class TestStates(unittest.TestCase):
         assert db_state.entity_id == "sensor.temperature"
         assert db_state.domain == "sensor"
         assert db_state.state == ""
-        assert db_state.last_changed == event.time_fired
+        assert db_state.last_changed is None
         assert db_state.last_updated == event.time_fired
 
 
@@ -87,6 +104,7 @@ class TestRecorderRuns(unittest.TestCase):
         self.session = session = SESSION()
         session.query(Events).delete()
         session.query(States).delete()
+        session.query(Entities).delete()
         session.query(RecorderRuns).delete()
 
     def tearDown(self):  # pylint: disable=invalid-name
@@ -116,34 +134,30 @@ class TestRecorderRuns(unittest.TestCase):
 
         self.session.add(
             States(
-                entity_id="sensor.temperature",
+                entity=Entities(entity_id="sensor.temperature"),
                 state="20",
-                last_changed=before_run,
                 last_updated=before_run,
             )
         )
         self.session.add(
             States(
-                entity_id="sensor.sound",
+                entity=Entities(entity_id="sensor.sound"),
                 state="10",
-                last_changed=after_run,
                 last_updated=after_run,
             )
         )
 
         self.session.add(
             States(
-                entity_id="sensor.humidity",
+                entity=Entities(entity_id="sensor.humidity"),
                 state="76",
-                last_changed=in_run,
                 last_updated=in_run,
             )
         )
         self.session.add(
             States(
-                entity_id="sensor.lux",
+                entity=Entities(entity_id="sensor.lux"),
                 state="5",
-                last_changed=in_run3,
                 last_updated=in_run3,
             )
         )
@@ -154,8 +168,61 @@ class TestRecorderRuns(unittest.TestCase):
 
 def test_states_from_native_invalid_entity_id():
     """Test loading a state from an invalid entity ID."""
-    event = States()
-    event.entity_id = "test.invalid__id"
-    event.attributes = "{}"
+    event = States(entity=Entities(entity_id="test.invalid__id"), attributes="{}")
     state = event.to_native()
     assert state.entity_id == "test.invalid__id"
+
+
+def test_lazy_state():
+    """Test a lazy state converts its row on access and equals the native state."""
+    state = ha.State("sensor.temperature", "18", {"unit_of_measurement": "°C"})
+    event = ha.Event(
+        EVENT_STATE_CHANGED,
+        {"entity_id": "sensor.temperature", "old_state": None, "new_state": state},
+        context=state.context,
+    )
+    row = States.from_event(event)
+    row.attributes = '{"unit_of_measurement": "°C"}'
+
+    lazy_state = LazyState(row)
+    assert lazy_state._attributes is None
+    assert lazy_state._context is None
+
+    assert lazy_state == state
+    assert state == lazy_state
+    assert lazy_state.attributes == {"unit_of_measurement": "°C"}
+    assert lazy_state.last_changed == state.last_changed
+    assert lazy_state.as_dict() == state.as_dict()
+
+
+def test_lazy_state_invalid_attributes():
+    """Test a lazy state with unparsable attributes has none."""
+    row = States(
+        entity=Entities(entity_id="sensor.temperature"), state="18", attributes="{"
+    )
+    assert LazyState(row).attributes == {}
+
+
+def test_lazy_state_attributes_may_contain():
+    """Test checking the raw attributes of a lazy state without parsing them."""
+    row = States(
+        entity=Entities(entity_id="sensor.temperature"),
+        state="18",
+        attributes='{"hidden": true}',
+    )
+    lazy_state = LazyState(row)
+    assert lazy_state.attributes_may_contain('"hidden"')
+    assert not lazy_state.attributes_may_contain('"friendly_name"')
+    assert lazy_state._attributes is None
+
+
+def test_lazy_event():
+    """Test a lazy event converts its row on access and equals the native event."""
+    event = ha.Event("test_event", {"some_data": 15})
+    lazy_event = LazyEvent(Events.from_event(event))
+    assert lazy_event._data is None
+
+    assert lazy_event == event
+    assert event == lazy_event
+    assert lazy_event.data == {"some_data": 15}
+    assert lazy_event.as_dict() == event.as_dict()
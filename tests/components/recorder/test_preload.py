@@ -0,0 +1,71 @@
+"""Test preloading recorded states."""
+import asyncio
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.components.recorder import preload
+from homeassistant.components.recorder.const import DATA_INSTANCE
+import homeassistant.util.dt as dt_util
+
+from tests.common import init_recorder_component
+
+
+async def _record_states(hass, states):
+    """Record states of entities at the given times."""
+    await hass.async_add_job(init_recorder_component, hass)
+    for entity_id, state, attributes, point in states:
+        with patch("homeassistant.core.dt_util.utcnow", return_value=point):
+            hass.states.async_set(entity_id, state, attributes)
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[DATA_INSTANCE].block_till_done)
+
+
+async def test_preload_states_batched(hass):
+    """Test concurrent requests are read with a single query."""
+    start = dt_util.utcnow() - timedelta(hours=1)
+    await _record_states(
+        hass,
+        [
+            ("sensor.one", str(minute), None, start + timedelta(minutes=minute))
+            for minute in range(10)
+        ]
+        + [("sensor.two", "on", None, start), ("sensor.two", "off", None, start)],
+    )
+
+    with patch.object(preload, "_load_states", wraps=preload._load_states) as load:
+        last, since, same_source, two, unknown = await asyncio.gather(
+            preload.async_preload_states(hass, "sensor.one", limit=3),
+            preload.async_preload_states(
+                hass, "sensor.one", start_time=start + timedelta(minutes=7, seconds=30)
+            ),
+            preload.async_preload_states(hass, "sensor.one", limit=1),
+            preload.async_preload_states(hass, "sensor.two", limit=5),
+            preload.async_preload_states(hass, "sensor.unknown", limit=5),
+        )
+
+    assert load.call_count == 1
+    assert [state.state for state in last] == ["7", "8", "9"]
+    assert [state.state for state in since] == ["7", "8", "9"]
+    assert [state.state for state in same_source] == ["9"]
+    assert [state.state for state in two] == ["on", "off"]
+    assert unknown == []
+
+
+async def test_preload_states_changes_only(hass):
+    """Test states that only changed attributes can be left out."""
+    start = dt_util.utcnow() - timedelta(hours=1)
+    await _record_states(
+        hass,
+        [
+            ("sensor.one", "on", {"count": 1}, start),
+            ("sensor.one", "on", {"count": 2}, start + timedelta(minutes=1)),
+        ],
+    )
+
+    states = await preload.async_preload_states(hass, "sensor.one", limit=5)
+    assert [state.attributes["count"] for state in states] == [1, 2]
+
+    states = await preload.async_preload_states(
+        hass, "sensor.one", limit=5, changes_only=True
+    )
+    assert [state.attributes["count"] for state in states] == [1]
@@ -6,7 +6,7 @@ from unittest.mock import patch
 
 from homeassistant.components import recorder
 from homeassistant.components.recorder.const import DATA_INSTANCE
-from homeassistant.components.recorder.models import Events, States
+from homeassistant.components.recorder.models import Entities, Events, States
 from homeassistant.components.recorder.purge import purge_old_data
 from homeassistant.components.recorder.util import session_scope
 
@@ -37,6 +37,7 @@ class TestRecorderPurge(unittest.TestCase):
         self.hass.data[DATA_INSTANCE].block_till_done()
 
         with recorder.session_scope(hass=self.hass) as session:
+            entity = Entities(entity_id="test.recorder2")
             for event_id in range(6):
                 if event_id < 2:
                     timestamp = eleven_days_ago
@@ -50,13 +51,11 @@ class TestRecorderPurge(unittest.TestCase):
 
                 session.add(
                     States(
-                        entity_id="test.recorder2",
+                        entity=entity,
                         domain="sensor",
                         state=state,
                         attributes=json.dumps(attributes),
-                        last_changed=timestamp,
                         last_updated=timestamp,
-                        created=timestamp,
                         event_id=event_id + 1000,
                     )
                 )
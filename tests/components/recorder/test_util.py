@@ -5,6 +5,7 @@ import pytest
 
 from homeassistant.components.recorder import util
 from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.setup import setup_component
 
 from tests.common import get_test_home_assistant, init_recorder_component
 
@@ -61,3 +62,45 @@ def test_recorder_bad_execute(hass_recorder):
         util.execute((mck1,))
 
     assert e_mock.call_count == 2
+
+
+def test_read_session_scope(hass_recorder):
+    """Test read sessions hold a slot of the read semaphore."""
+    hass = hass_recorder({"db_max_read_queries": 1})
+    instance = hass.data[DATA_INSTANCE]
+
+    # In-memory databases can only be shared through the recorder engine
+    assert instance.read_engine is instance.engine
+
+    with util.read_session_scope(hass=hass) as session:
+        assert session.execute("select 1").scalar() == 1
+        assert not instance.read_semaphore.acquire(blocking=False)
+
+    assert instance.read_semaphore.acquire(blocking=False)
+    instance.read_semaphore.release()
+
+
+def test_read_session_scope_sqlite_file(tmpdir):
+    """Test file based SQLite databases get a read only connection pool."""
+    from sqlalchemy.exc import OperationalError
+
+    hass = get_test_home_assistant()
+    try:
+        dburl = "sqlite:///{}".format(tmpdir.join("test.db"))
+        assert setup_component(hass, "recorder", {"recorder": {"db_url": dburl}})
+        hass.start()
+        hass.block_till_done()
+        instance = hass.data[DATA_INSTANCE]
+        instance.block_till_done()
+
+        assert instance.read_engine is not instance.engine
+
+        with util.read_session_scope(hass=hass) as session:
+            assert session.execute("select count(*) from recorder_runs").scalar() == 1
+
+        with pytest.raises(OperationalError), util.read_session_scope(
+            hass=hass
+        ) as session:
+            session.execute("delete from recorder_runs")
+    finally:
+        hass.stop()
@@ -0,0 +1,98 @@
+"""The tests for the stream core."""
+import asyncio
+from unittest.mock import MagicMock
+
+from homeassistant.components.stream.core import (
+    FragmentBuffer,
+    Part,
+    Segment,
+    StreamOutput,
+)
+
+
+def _box(box_type, payload=b""):
+    """Return a MP4 box."""
+    return (len(payload) + 8).to_bytes(4, "big") + box_type + payload
+
+
+def test_fragment_buffer():
+    """Test splitting muxer output into an init segment and fragments."""
+    buffer = FragmentBuffer()
+    init = _box(b"ftyp", b"isom") + _box(b"moov", b"\x00" * 16)
+    fragment = _box(b"moof", b"\x01" * 8) + _box(b"mdat", b"\x02" * 32)
+
+    buffer.write(init[:10])
+    assert buffer.pop_fragments() == []
+    assert buffer.init is None
+
+    buffer.write(init[10:] + fragment[:-4])
+    assert buffer.pop_fragments() == []
+    assert buffer.init == init
+
+    buffer.write(fragment[-4:] + fragment)
+    assert buffer.pop_fragments() == [fragment, fragment]
+    assert buffer.pop_fragments() == []
+
+
+def test_fragment_buffer_large_size():
+    """Test boxes using a 64 bit size."""
+    buffer = FragmentBuffer()
+    payload = b"\x03" * 8
+    mdat = (1).to_bytes(4, "big") + b"mdat" + (len(payload) + 16).to_bytes(8, "big")
+    fragment = _box(b"moof") + mdat + payload
+
+    buffer.write(fragment + _box(b"mfra"))
+    assert buffer.pop_fragments() == [fragment]
+
+
+async def test_stream_output_parts(hass):
+    """Test tracking the parts of the segment being written."""
+    output = StreamOutput(MagicMock(hass=hass, keepalive=False))
+    part_1 = Part(duration=1.0, independent=True, data=b"1")
+    part_2 = Part(duration=0.5, independent=False, data=b"2")
+
+    assert not output.has_part(1)
+    waiter = hass.async_create_task(output.async_wait_for_part(1, 1))
+
+    output.put_part(1, part_1)
+    await asyncio.sleep(0)
+    assert not waiter.done()
+    assert output.has_part(1, 0)
+    assert not output.has_part(1)
+
+    output.put_part(1, part_2)
+    await asyncio.sleep(0)
+    assert waiter.done()
+    assert output.get_part(1, 1) is part_2
+    assert output.get_part(1, 2) is None
+
+    segment = Segment(1, None, 1.5, init=b"init", parts=[part_1, part_2])
+    output.put(segment)
+    assert output.has_part(1)
+    assert output.parts == []
+    assert output.part_sequence is None
+    assert output.get_part(1, 0) is part_1
+    assert segment.get_bytes() == b"12"
+    assert output.target_duration == 2
+
+
+async def test_stream_output_inits(hass):
+    """Test init segments are kept while segments refer to them."""
+    output = StreamOutput(MagicMock(hass=hass, keepalive=False))
+
+    output.put_init(1, b"init-1")
+    output.put(Segment(1, None, 1.0, generation=1))
+    output.put(Segment(2, None, 1.0, generation=1))
+    # Reconnected, parts of the next segment use a new init segment
+    output.put_init(3, b"init-3")
+    assert output.part_generation == 3
+    output.put(Segment(3, None, 1.0, generation=3, discontinuity=True))
+    output.put(Segment(4, None, 1.0, generation=3))
+
+    assert output.get_init(1) == b"init-1"
+    assert output.get_init(3) == b"init-3"
+
+    output.put(Segment(5, None, 1.0, generation=3))
+
+    assert output.get_init(1) is None
+    assert output.get_init(3) == b"init-3"
@@ -0,0 +1,95 @@
+"""The tests for the fragmented MP4 utilities."""
+from homeassistant.components.stream.fmp4utils import (
+    FragmentTiming,
+    VideoTrack,
+    get_fragment_timing,
+    get_video_track,
+)
+
+NON_SYNC = 0x10000
+
+
+def _box(box_type, *payload):
+    """Return a MP4 box."""
+    payload = b"".join(payload)
+    return (len(payload) + 8).to_bytes(4, "big") + box_type + payload
+
+
+def _full_box(box_type, version, flags, *payload):
+    """Return a MP4 full box."""
+    return _box(box_type, bytes([version]), flags.to_bytes(3, "big"), *payload)
+
+
+def _uint(value, size=4):
+    """Return a big endian unsigned integer."""
+    return value.to_bytes(size, "big")
+
+
+def _trak(track_id, handler, timescale):
+    """Return a track box."""
+    return _box(
+        b"trak",
+        _full_box(b"tkhd", 0, 3, _uint(0), _uint(0), _uint(track_id), _uint(0)),
+        _box(
+            b"mdia",
+            _full_box(b"mdhd", 0, 0, _uint(0), _uint(0), _uint(timescale), _uint(0)),
+            _full_box(b"hdlr", 0, 0, _uint(0), handler, b"\x00" * 12),
+        ),
+    )
+
+
+def _traf(track_id, base_time, samples, default_flags=None):
+    """Return a track fragment with samples of (duration, flags)."""
+    tfhd_flags = 0x20000
+    tfhd = [_uint(track_id)]
+    if default_flags is not None:
+        tfhd_flags |= 0x20
+        tfhd.append(_uint(default_flags))
+    trun = [_uint(len(samples)), _uint(samples[0][1])]
+    for duration, _ in samples:
+        trun.extend([_uint(duration), _uint(100)])
+    return _box(
+        b"traf",
+        _full_box(b"tfhd", 0, tfhd_flags, *tfhd),
+        _full_box(b"tfdt", 1, 0, _uint(base_time, 8)),
+        _full_box(b"trun", 0, 0x304, *trun),
+    )
+
+
+INIT = _box(b"ftyp", b"iso5") + _box(
+    b"moov",
+    _trak(1, b"soun", 44100),
+    _trak(2, b"vide", 90000),
+    _box(
+        b"mvex",
+        _full_box(b"trex", 0, 0, _uint(2), _uint(1), _uint(3000), _uint(0), _uint(0)),
+    ),
+)
+
+
+def test_get_video_track():
+    """Test finding the video track of an init segment."""
+    assert get_video_track(INIT) == VideoTrack(2, 90000, 3000, 0)
+    assert get_video_track(_box(b"ftyp") + _box(b"moov")) is None
+
+
+def test_get_fragment_timing():
+    """Test reading the timing of the video samples of a fragment."""
+    track = get_video_track(INIT)
+    fragment = _box(
+        b"moof",
+        _traf(1, 0, [(1024, 0)] * 2),
+        _traf(2, 45000, [(3000, 0), (3000, NON_SYNC), (3000, NON_SYNC)]),
+    ) + _box(b"mdat", b"\x00" * 500)
+
+    assert get_fragment_timing(fragment, track) == FragmentTiming(0.5, 0.1, True)
+
+    fragment = _box(
+        b"moof", _traf(2, 54000, [(3000, NON_SYNC)] * 2, default_flags=NON_SYNC)
+    ) + _box(b"mdat", b"\x00" * 200)
+
+    assert get_fragment_timing(fragment, track) == FragmentTiming(0.6, 1 / 15, False)
+
+    fragment = _box(b"moof", _traf(1, 0, [(1024, 0)])) + _box(b"mdat")
+
+    assert get_fragment_timing(fragment, track) is None
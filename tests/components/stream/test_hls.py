@@ -1,10 +1,13 @@
 """The tests for hls streams."""
 from datetime import timedelta
+from unittest.mock import MagicMock
 from urllib.parse import urlparse
 
 import pytest
 
 from homeassistant.components.stream import request_stream
+from homeassistant.components.stream.core import Part, Segment
+from homeassistant.components.stream.hls import M3U8Renderer
 from homeassistant.setup import async_setup_component
 import homeassistant.util.dt as dt_util
 
@@ -113,3 +116,88 @@ async def test_stream_ended(hass):
 
     # Stop stream, if it hasn't quit already
     stream.stop()
+
+
+def _mock_track(segments, **kwargs):
+    """Return a track holding the given segments."""
+    track = MagicMock(
+        segments=[segment.sequence for segment in segments],
+        target_duration=2,
+        **kwargs,
+    )
+    track.get_segment.side_effect = lambda sequence=None: (
+        segments
+        if sequence is None
+        else next(segment for segment in segments if segment.sequence == sequence)
+    )
+    return track
+
+
+def test_render_playlist():
+    """Test rendering a MPEG-TS playlist."""
+    track = _mock_track(
+        [Segment(1, None, 2.0), Segment(2, None, 1.5, discontinuity=True)],
+        format="mpegts",
+        part_duration=None,
+    )
+
+    playlist = M3U8Renderer(None).render(track, None)
+
+    assert playlist.splitlines() == [
+        "#EXTM3U",
+        "#EXT-X-VERSION:3",
+        "#EXT-X-TARGETDURATION:2",
+        "#EXT-X-MEDIA-SEQUENCE:1",
+        "#EXTINF:2.0000,",
+        "./segment/1.ts",
+        "#EXT-X-DISCONTINUITY",
+        "#EXTINF:1.5000,",
+        "./segment/2.ts",
+    ]
+
+
+def test_render_ll_hls_playlist():
+    """Test rendering a low latency HLS playlist."""
+    parts = [
+        Part(duration=1.0, independent=True, data=b"1"),
+        Part(duration=1.0, independent=False, data=b"2"),
+    ]
+    track = _mock_track(
+        [
+            Segment(1, None, 2.0, generation=1, parts=parts),
+            Segment(2, None, 2.0, generation=2, parts=parts, discontinuity=True),
+        ],
+        format="mp4",
+        part_duration=1.0,
+        part_sequence=3,
+        part_generation=2,
+        parts=[Part(duration=1.2, independent=True, data=b"3")],
+    )
+
+    playlist = M3U8Renderer(None).render(track, None)
+
+    assert playlist.splitlines() == [
+        "#EXTM3U",
+        "#EXT-X-VERSION:9",
+        "#EXT-X-TARGETDURATION:2",
+        "#EXT-X-SERVER-CONTROL:CAN-BLOCK-RELOAD=YES,PART-HOLD-BACK=3.600",
+        "#EXT-X-PART-INF:PART-TARGET=1.200",
+        "#EXT-X-MEDIA-SEQUENCE:1",
+        '#EXT-X-MAP:URI="./init/1.mp4"',
+        '#EXT-X-PART:DURATION=1.000,URI="./segment/1.0.m4s",INDEPENDENT=YES',
+        '#EXT-X-PART:DURATION=1.000,URI="./segment/1.1.m4s"',
+        "#EXTINF:2.0000,",
+        "./segment/1.m4s",
+        "#EXT-X-DISCONTINUITY",
+        '#EXT-X-MAP:URI="./init/2.mp4"',
+        '#EXT-X-PART:DURATION=1.000,URI="./segment/2.0.m4s",INDEPENDENT=YES',
+        '#EXT-X-PART:DURATION=1.000,URI="./segment/2.1.m4s"',
+        "#EXTINF:2.0000,",
+        "./segment/2.m4s",
+        '#EXT-X-PART:DURATION=1.200,URI="./segment/3.0.m4s",INDEPENDENT=YES',
+    ]
+
+    # Parts of a new init segment are left out until their segment is done
+    track.part_generation = 3
+    playlist = M3U8Renderer(None).render(track, None)
+    assert playlist.splitlines()[-1] == "./segment/2.m4s"
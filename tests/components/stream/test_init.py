@@ -1,8 +1,10 @@
 """The tests for stream."""
+import threading
 from unittest.mock import MagicMock, patch
 
 import pytest
 
+from homeassistant.components.stream import Stream
 from homeassistant.components.stream.const import (
     ATTR_STREAMS,
     CONF_LOOKBACK,
@@ -85,3 +87,41 @@ async def test_record_service_lookback(hass):
         assert stream_mock.called
         stream_mock.return_value.add_provider.assert_called_once_with("recorder")
         assert hls_mock.recv.called
+
+
+async def test_stream_worker_reconnects_keepalive(hass):
+    """Test a kept alive stream reconnects when the worker ends."""
+    await async_setup_component(hass, "stream", {"stream": {}})
+    stream = Stream(hass, "rtsp://my.video", keepalive=True)
+    quit_event = threading.Event()
+    calls = []
+
+    def mock_worker(hass, stream, quit_event):
+        """Fail twice, then get stopped."""
+        calls.append(stream.sequence)
+        stream.sequence += 1
+        if len(calls) == 3:
+            quit_event.set()
+
+    with patch(
+        "homeassistant.components.stream.worker.stream_worker", mock_worker
+    ), patch("homeassistant.components.stream.STREAM_RESTART_BACKOFF_MIN", 0):
+        stream._run_worker(quit_event)
+
+    # Segment numbering continues across connections
+    assert calls == [0, 1, 2]
+
+
+async def test_stream_worker_ends_without_keepalive(hass):
+    """Test the outputs are ended when a stream without keepalive fails."""
+    await async_setup_component(hass, "stream", {"stream": {}})
+    stream = Stream(hass, "rtsp://my.video")
+    output = MagicMock()
+    stream.outputs["hls"] = output
+
+    with patch("homeassistant.components.stream.worker.stream_worker") as mock_worker:
+        stream._run_worker(threading.Event())
+        await hass.async_block_till_done()
+
+    assert len(mock_worker.mock_calls) == 1
+    output.put.assert_called_once_with(None)
@@ -0,0 +1,71 @@
+"""The tests for the stream worker."""
+import io
+import threading
+
+import av
+
+from homeassistant.components.stream.worker import stream_worker
+from homeassistant.setup import async_setup_component
+
+from tests.components.stream.common import generate_h264_video, preload_stream
+
+PART_DURATION = 0.5
+FPS = 24
+
+
+async def test_fragmented_output(hass):
+    """Test muxing a stream into fragmented MP4 segments and parts."""
+    await async_setup_component(
+        hass,
+        "stream",
+        {
+            "stream": {
+                "ll_hls": True,
+                "part_duration": PART_DURATION,
+                "segment_buffer": 30,
+            }
+        },
+    )
+
+    source = generate_h264_video()
+    stream = preload_stream(hass, source)
+    track = stream.add_provider("hls")
+
+    await hass.async_add_executor_job(stream_worker, hass, stream, threading.Event())
+    await hass.async_block_till_done()
+
+    segments = list(track.get_segment())
+    assert [segment.sequence for segment in segments] == list(
+        range(1, len(segments) + 1)
+    )
+    assert stream.sequence == segments[-1].sequence
+
+    init = track.get_init(segments[0].generation)
+    assert init[4:8] == b"ftyp"
+    assert all(segment.init == init for segment in segments)
+
+    frames = 0
+    for segment in segments:
+        # Only the first part of a segment starts with a keyframe
+        assert [part.independent for part in segment.parts] == [True] + [False] * (
+            len(segment.parts) - 1
+        )
+        assert all(
+            part.duration <= PART_DURATION + 1 / FPS for part in segment.parts
+        )
+        assert segment.duration == sum(part.duration for part in segment.parts)
+
+        # Every segment can be played on its own with the init segment
+        container = av.open(io.BytesIO(init + segment.get_bytes()), format="mp4")
+        packets = [
+            packet
+            for packet in container.demux(container.streams.video[0])
+            if packet.dts is not None
+        ]
+        assert [packet.is_keyframe for packet in packets] == [True] + [False] * (
+            len(packets) - 1
+        )
+        frames += len(packets)
+
+    assert frames == 5 * FPS
+    assert abs(sum(segment.duration for segment in segments) - 5) < 1 / FPS
@@ -467,3 +467,111 @@ async def test_render_template_returns_with_match_all(
     assert msg["id"] == 5
     assert msg["type"] == const.TYPE_RESULT
     assert msg["success"]
+
+
+async def test_subscribe_entities(hass, websocket_client):
+    """Test subscribe entities sends a snapshot followed by diffs."""
+    hass.states.async_set("light.permitted", "off", {"color": "red", "old": 1})
+    hass.states.async_set("light.other", "on")
+
+    await websocket_client.send_json(
+        {"id": 7, "type": "subscribe_entities", "entity_ids": ["light.permitted"]}
+    )
+
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 7
+    assert msg["type"] == const.TYPE_RESULT
+    assert msg["success"]
+
+    state = hass.states.get("light.permitted")
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 7
+    assert msg["type"] == "event"
+    assert msg["event"] == {
+        "a": {
+            "light.permitted": {
+                "s": "off",
+                "a": {"color": "red", "old": 1},
+                "c": state.context.id,
+                "lc": state.last_changed.timestamp(),
+            }
+        }
+    }
+
+    hass.states.async_set("light.other", "off")
+    hass.states.async_set("light.permitted", "on", {"color": "blue"})
+
+    state = hass.states.get("light.permitted")
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 7
+    assert msg["event"] == {
+        "c": {
+            "light.permitted": {
+                "+": {
+                    "s": "on",
+                    "a": {"color": "blue"},
+                    "c": state.context.id,
+                    "lc": state.last_changed.timestamp(),
+                    "lu": state.last_updated.timestamp(),
+                },
+                "-": {"a": ["old"]},
+            }
+        }
+    }
+
+    hass.states.async_remove("light.permitted")
+
+    msg = await websocket_client.receive_json()
+    assert msg["event"] == {"r": ["light.permitted"]}
+
+
+async def test_update_entities_subscription(hass, websocket_client):
+    """Test changing the entities of a subscription without resubscribing."""
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("light.bedroom", "off")
+
+    await websocket_client.send_json(
+        {"id": 7, "type": "subscribe_entities", "entity_ids": ["light.kitchen"]}
+    )
+    assert (await websocket_client.receive_json())["success"]
+    msg = await websocket_client.receive_json()
+    assert list(msg["event"]["a"]) == ["light.kitchen"]
+
+    await websocket_client.send_json(
+        {
+            "id": 8,
+            "type": "update_entities_subscription",
+            "subscription": 7,
+            "entity_ids": ["light.bedroom"],
+        }
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 8
+    assert msg["success"]
+
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 7
+    assert list(msg["event"]["a"]) == ["light.bedroom"]
+    assert msg["event"]["r"] == ["light.kitchen"]
+
+    hass.states.async_set("light.kitchen", "off")
+    hass.states.async_set("light.bedroom", "on")
+
+    msg = await websocket_client.receive_json()
+    assert list(msg["event"]["c"]) == ["light.bedroom"]
+
+    await websocket_client.send_json(
+        {"id": 9, "type": "update_entities_subscription", "subscription": 7}
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["success"]
+    msg = await websocket_client.receive_json()
+    assert list(msg["event"]["a"]) == ["light.kitchen"]
+    assert "r" not in msg["event"]
+
+    await websocket_client.send_json(
+        {"id": 10, "type": "update_entities_subscription", "subscription": 99}
+    )
+    msg = await websocket_client.receive_json()
+    assert not msg["success"]
+    assert msg["error"]["code"] == const.ERR_NOT_FOUND
@@ -0,0 +1,154 @@
+"""Tests for the Home Assistant Websocket API connection handler."""
+import json
+
+import pytest
+
+from homeassistant.components.websocket_api import messages
+from homeassistant.components.websocket_api.http import OutboundQueue
+from homeassistant.const import EVENT_STATE_CHANGED, MATCH_ALL
+from homeassistant.core import Event, State
+
+
+def state_changed_message(iden, entity_id, old, new):
+    """Return a state changed event message."""
+    return messages.event_message(
+        iden,
+        Event(
+            EVENT_STATE_CHANGED,
+            {
+                "entity_id": entity_id,
+                "old_state": State(entity_id, old),
+                "new_state": State(entity_id, new),
+            },
+        ),
+    )
+
+
+async def test_outbound_queue_coalesces_state_changes(hass):
+    """Test pending state changes of an entity are replaced."""
+    queue = OutboundQueue(10000, 10000)
+
+    assert queue.put(state_changed_message(5, "light.kitchen", "off", "on"), True)
+    assert queue.put(state_changed_message(5, "light.bedroom", "off", "on"), True)
+    assert queue.put(messages.result_message(6), True)
+    assert queue.put(state_changed_message(5, "light.kitchen", "on", "dim"), True)
+    assert queue.put(state_changed_message(7, "light.kitchen", "on", "dim"), True)
+
+    assert len(queue) == 4
+    assert queue.coalesced == 1
+
+    texts = await queue.async_get(batch=True)
+    assert queue.size == 0
+    assert queue.sent == 4
+    assert queue.frames == 1
+
+    first = json.loads(texts[0])
+    assert first["id"] == 5
+    assert first["event"]["data"]["entity_id"] == "light.kitchen"
+    assert first["event"]["data"]["old_state"]["state"] == "off"
+    assert first["event"]["data"]["new_state"]["state"] == "dim"
+    assert [json.loads(text)["id"] for text in texts[1:]] == [5, 6, 7]
+
+    # Nothing pending anymore, a new state change is queued again
+    assert queue.put(state_changed_message(5, "light.kitchen", "dim", "off"), True)
+    assert len(queue) == 1
+
+
+async def test_outbound_queue_coalesces_when_behind(hass):
+    """Test state changes are only replaced once the backlog grows."""
+    queue = OutboundQueue(10000, 10000)
+
+    assert queue.put(state_changed_message(5, "light.kitchen", "off", "on"))
+    assert queue.put(state_changed_message(5, "light.kitchen", "on", "off"))
+    assert len(queue) == 2
+    assert queue.coalesced == 0
+
+    # The client fell behind, the latest pending state change is replaced
+    queue.coalesce_size = 0
+    assert queue.put(state_changed_message(5, "light.kitchen", "off", "dim"))
+    assert len(queue) == 2
+    assert queue.coalesced == 1
+
+    events = [
+        json.loads(text)["event"]["data"] for text in await queue.async_get(batch=True)
+    ]
+    assert [
+        (data["old_state"]["state"], data["new_state"]["state"]) for data in events
+    ] == [("off", "on"), ("on", "dim")]
+
+
+async def test_outbound_queue_size(hass):
+    """Test the backlog is limited by its size."""
+    queue = OutboundQueue(60, 60)
+
+    assert queue.put('{"id": 1, "type": "pong"}')
+    assert queue.put('{"id": 2, "type": "pong"}')
+    assert not queue.put('{"id": 3, "type": "pong"}')
+    assert queue.peak_size == 75
+
+    assert await queue.async_get(batch=False) == ['{"id": 1, "type": "pong"}']
+    assert queue.size == 50
+
+    queue.close()
+    assert len(await queue.async_get(batch=True)) == 2
+    assert await queue.async_get(batch=True) == []
+
+
+@pytest.mark.parametrize("event_type", [EVENT_STATE_CHANGED, MATCH_ALL])
+async def test_coalesce_messages(hass, websocket_client, event_type):
+    """Test pending messages are sent as one frame if the client supports it."""
+    await websocket_client.send_json(
+        {"id": 5, "type": "supported_features", "features": {"coalesce_messages": 1}}
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["id"] == 5
+    assert msg["success"]
+
+    await websocket_client.send_json(
+        {"id": 6, "type": "subscribe_events", "event_type": event_type}
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["success"]
+
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("light.bedroom", "on")
+    hass.states.async_set("light.kitchen", "off")
+
+    msgs = []
+    while len(msgs) < 2:
+        msg = await websocket_client.receive_json()
+        msgs.extend(msg if isinstance(msg, list) else [msg])
+
+    assert [msg["event"]["data"]["entity_id"] for msg in msgs] == [
+        "light.kitchen",
+        "light.bedroom",
+    ]
+    assert msgs[0]["type"] == "event"
+    assert msgs[0]["event"]["data"]["new_state"]["state"] == "off"
+    assert msgs[0]["event"]["data"]["old_state"] is None
+
+
+async def test_state_changes_not_coalesced(hass, websocket_client):
+    """Test a client that keeps up receives every state change."""
+    await websocket_client.send_json(
+        {"id": 5, "type": "subscribe_events", "event_type": MATCH_ALL}
+    )
+    msg = await websocket_client.receive_json()
+    assert msg["success"]
+
+    hass.states.async_set("light.kitchen", "off")
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("light.kitchen", "off")
+
+    changes = []
+    while len(changes) < 3:
+        msg = await websocket_client.receive_json()
+        data = msg["event"]["data"]
+        changes.append(
+            (
+                data["old_state"] and data["old_state"]["state"],
+                data["new_state"]["state"],
+            )
+        )
+
+    assert changes == [(None, "off"), ("off", "on"), ("on", "off")]
@@ -11,7 +11,7 @@ from homeassistant.components.websocket_api import const, messages
 @pytest.fixture
 def mock_low_queue():
     """Mock a low queue."""
-    with patch("homeassistant.components.websocket_api.http.MAX_PENDING_MSG", 5):
+    with patch("homeassistant.components.websocket_api.http.MAX_PENDING_SIZE", 100):
         yield
 
 
@@ -480,3 +480,53 @@ async def test_loading_race_condition(hass):
 
         mock_load.assert_called_once_with()
         assert results[0] == results[1]
+
+
+async def test_get_device_follows_updates(registry):
+    """Test lookups by identifiers and connections follow changes."""
+    entry = registry.async_get_or_create(
+        config_entry_id="1234",
+        connections={(device_registry.CONNECTION_NETWORK_MAC, "12:34:56:AB:CD:EF")},
+        identifiers={("hue", "456")},
+    )
+
+    assert registry.async_get_device({("hue", "456")}, set()) == entry
+    assert (
+        registry.async_get_device(
+            set(), {(device_registry.CONNECTION_NETWORK_MAC, "12:34:56:ab:cd:ef")}
+        )
+        == entry
+    )
+
+    updated_entry = registry.async_update_device(
+        entry.id, new_identifiers={("hue", "654")}
+    )
+
+    assert registry.async_get_device({("hue", "456")}, set()) is None
+    assert registry.async_get_device({("hue", "654")}, set()) == updated_entry
+
+    registry.async_remove_device(entry.id)
+
+    assert registry.async_get_device({("hue", "654")}, set()) is None
+    assert (
+        registry.async_get_device(
+            set(), {(device_registry.CONNECTION_NETWORK_MAC, "12:34:56:ab:cd:ef")}
+        )
+        is None
+    )
+
+
+async def test_index_with_duplicate_identifiers(registry):
+    """Test removing a device reveals another one with the same identifier."""
+    first = device_registry.DeviceEntry(identifiers={("hue", "456")})
+    second = device_registry.DeviceEntry(
+        identifiers={("hue", "456")},
+        connections={(device_registry.CONNECTION_NETWORK_MAC, "12:34:56:ab:cd:ef")},
+    )
+    registry.devices = {first.id: first, second.id: second}
+
+    assert registry.async_get_device({("hue", "456")}, set()) == first
+
+    registry.async_remove_device(first.id)
+
+    assert registry.async_get_device({("hue", "456")}, set()) == second
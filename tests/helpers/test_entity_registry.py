@@ -535,3 +535,74 @@ async def test_restore_states(hass):
     assert hass.states.get("light.simple") is None
     assert hass.states.get("light.disabled") is None
     assert hass.states.get("light.all_info_set") is None
+
+
+async def test_indexes_follow_updates(registry):
+    """Test lookups by unique_id, device and config entry follow changes."""
+    config_entry = MockConfigEntry(domain="light")
+    entry = registry.async_get_or_create(
+        "light", "hue", "1234", config_entry=config_entry, device_id="device-1"
+    )
+
+    assert registry.async_get_entity_id("light", "hue", "1234") == entry.entity_id
+    assert entity_registry.async_entries_for_device(registry, "device-1") == [entry]
+    assert entity_registry.async_entries_for_config_entry(
+        registry, config_entry.entry_id
+    ) == [entry]
+
+    updated = registry.async_update_entity(
+        entry.entity_id, new_entity_id="light.renamed", new_unique_id="5678"
+    )
+
+    assert registry.async_get_entity_id("light", "hue", "1234") is None
+    assert registry.async_get_entity_id("light", "hue", "5678") == "light.renamed"
+    assert entity_registry.async_entries_for_device(registry, "device-1") == [updated]
+
+    registry.async_remove("light.renamed")
+
+    assert registry.async_get_entity_id("light", "hue", "5678") is None
+    assert entity_registry.async_entries_for_device(registry, "device-1") == []
+    assert (
+        entity_registry.async_entries_for_config_entry(registry, config_entry.entry_id)
+        == []
+    )
+
+
+async def test_indexes_for_assigned_entities(hass):
+    """Test entries assigned directly to the registry are indexed."""
+    registry = mock_registry(
+        hass,
+        {
+            "light.kitchen": entity_registry.RegistryEntry(
+                entity_id="light.kitchen",
+                unique_id="1234",
+                platform="hue",
+                device_id="device-1",
+            )
+        },
+    )
+
+    assert registry.async_get_entity_id("light", "hue", "1234") == "light.kitchen"
+    assert [
+        entry.entity_id
+        for entry in entity_registry.async_entries_for_device(registry, "device-1")
+    ] == ["light.kitchen"]
+
+
+async def test_index_with_duplicate_unique_ids(hass):
+    """Test removing an entity reveals another one with the same unique_id."""
+    registry = mock_registry(
+        hass,
+        {
+            entity_id: entity_registry.RegistryEntry(
+                entity_id=entity_id, unique_id="1234", platform="hue"
+            )
+            for entity_id in ("light.first", "light.second")
+        },
+    )
+
+    assert registry.async_get_entity_id("light", "hue", "1234") == "light.first"
+
+    registry.async_remove("light.first")
+
+    assert registry.async_get_entity_id("light", "hue", "1234") == "light.second"
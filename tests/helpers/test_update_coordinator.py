@@ -5,6 +5,7 @@ import logging
 from asynctest import CoroutineMock, Mock
 import pytest
 
+from homeassistant.const import EVENT_STATE_CHANGED
 from homeassistant.helpers import update_coordinator
 from homeassistant.util.dt import utcnow
 
@@ -57,6 +58,27 @@ async def test_async_refresh(crd):
     assert updates == [2]
 
 
+async def test_refresh_batches_state_writes(hass, crd):
+    """Test states written by listeners are fired as one batch."""
+    batches = []
+    hass.bus.async_listen_batch(EVENT_STATE_CHANGED, batches.append)
+
+    for entity_id in ("sensor.a", "sensor.b", "sensor.c"):
+        crd.async_add_listener(
+            lambda entity_id=entity_id: hass.states.async_set(entity_id, crd.data)
+        )
+
+    await crd.async_refresh()
+    await hass.async_block_till_done()
+
+    assert len(batches) == 1
+    assert [event.data["entity_id"] for event in batches[0]] == [
+        "sensor.a",
+        "sensor.b",
+        "sensor.c",
+    ]
+
+
 async def test_request_refresh(crd):
     """Test request refresh for update coordinator."""
     assert crd.data is None
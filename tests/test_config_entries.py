@@ -6,6 +6,7 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from homeassistant import config_entries, data_entry_flow, loader
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.core import callback
 from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.setup import async_setup_component
@@ -195,6 +196,162 @@ async def test_call_async_migrate_entry_failure_not_supported(hass):
     assert entry.state == config_entries.ENTRY_STATE_MIGRATION_ERROR
 
 
+async def test_setup_entries_concurrently(hass):
+    """Test entries of one domain are set up concurrently."""
+    entry_1 = MockConfigEntry(domain="comp")
+    entry_1.add_to_hass(hass)
+    entry_2 = MockConfigEntry(domain="comp")
+    entry_2.add_to_hass(hass)
+
+    started = []
+    release = asyncio.Event()
+
+    async def mock_setup_entry(hass, entry):
+        """Block setup until all entries have started."""
+        started.append(entry)
+        if len(started) == 2:
+            release.set()
+        await release.wait()
+        return True
+
+    mock_integration(hass, MockModule("comp", async_setup_entry=mock_setup_entry))
+    mock_entity_platform(hass, "config_flow.comp", None)
+
+    assert await async_setup_component(hass, "comp", {})
+    assert len(started) == 2
+    assert entry_1.state == config_entries.ENTRY_STATE_LOADED
+    assert entry_2.state == config_entries.ENTRY_STATE_LOADED
+
+
+async def test_slow_entry_setup_continues_in_background(hass, caplog):
+    """Test a domain is loaded while a slow entry continues to set up."""
+    entry = MockConfigEntry(domain="comp", title="Slow")
+    entry.add_to_hass(hass)
+
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def mock_setup_entry(hass, entry):
+        """Block setup until released."""
+        started.set()
+        await release.wait()
+        return True
+
+    mock_integration(hass, MockModule("comp", async_setup_entry=mock_setup_entry))
+    mock_entity_platform(hass, "config_flow.comp", None)
+
+    with patch("homeassistant.config_entries.ENTRY_SETUP_TIMEOUT", 0):
+        assert await async_setup_component(hass, "comp", {})
+
+    assert started.is_set()
+    assert "comp" in hass.config.components
+    assert entry.state == config_entries.ENTRY_STATE_SETUP_IN_PROGRESS
+    assert "Setup of config entry Slow for comp is taking over 0 seconds" in caplog.text
+
+    # Dependents that need the entries can wait for them
+    wait_task = hass.async_create_task(
+        hass.config_entries.async_wait_domain_entries("comp")
+    )
+    await asyncio.sleep(0)
+    assert not wait_task.done()
+
+    release.set()
+    await wait_task
+    assert entry.state == config_entries.ENTRY_STATE_LOADED
+
+
+async def test_setup_waits_for_slow_entry(hass, manager):
+    """Test setting up an entry waits for it after the domain is loaded."""
+    entry = MockConfigEntry(domain="comp")
+    entry.add_to_manager(manager)
+
+    release = asyncio.Event()
+
+    async def mock_setup_entry(hass, entry):
+        """Block setup until released."""
+        await release.wait()
+        return True
+
+    mock_integration(hass, MockModule("comp", async_setup_entry=mock_setup_entry))
+    mock_entity_platform(hass, "config_flow.comp", None)
+
+    with patch("homeassistant.config_entries.ENTRY_SETUP_TIMEOUT", 0):
+        setup_task = hass.async_create_task(manager.async_setup(entry.entry_id))
+        await asyncio.sleep(0.01)
+
+    assert "comp" in hass.config.components
+    assert not setup_task.done()
+
+    release.set()
+    assert await setup_task
+    assert entry.state == config_entries.ENTRY_STATE_LOADED
+
+
+async def test_unload_waits_for_setup(hass, manager):
+    """Test unloading an entry that is still setting up waits for the setup."""
+    entry = MockConfigEntry(domain="comp")
+    entry.add_to_manager(manager)
+
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def mock_setup_entry(hass, entry):
+        """Block setup until released."""
+        started.set()
+        await release.wait()
+        return True
+
+    mock_unload_entry = MagicMock(return_value=mock_coro(True))
+    mock_integration(
+        hass,
+        MockModule(
+            "comp",
+            async_setup_entry=mock_setup_entry,
+            async_unload_entry=mock_unload_entry,
+        ),
+    )
+    mock_entity_platform(hass, "config_flow.comp", None)
+
+    setup_task = hass.async_create_task(async_setup_component(hass, "comp", {}))
+    await started.wait()
+    unload_task = hass.async_create_task(manager.async_unload(entry.entry_id))
+    release.set()
+
+    assert await setup_task
+    assert await unload_task
+    assert len(mock_unload_entry.mock_calls) == 1
+    assert entry.state == config_entries.ENTRY_STATE_NOT_LOADED
+
+
+async def test_stop_cancels_entry_setup(hass):
+    """Test entries that are still setting up are cancelled on stop."""
+    entry = MockConfigEntry(domain="comp")
+    entry.add_to_hass(hass)
+
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def mock_setup_entry(hass, entry):
+        """Block setup until cancelled."""
+        started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    mock_integration(hass, MockModule("comp", async_setup_entry=mock_setup_entry))
+    mock_entity_platform(hass, "config_flow.comp", None)
+
+    setup_task = hass.async_create_task(async_setup_component(hass, "comp", {}))
+    await started.wait()
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STOP)
+
+    assert await setup_task
+    assert cancelled.is_set()
+    assert entry.state == config_entries.ENTRY_STATE_NOT_LOADED
+
+
 async def test_remove_entry(hass, manager):
     """Test that we can remove an entry."""
 
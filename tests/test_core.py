@@ -27,6 +27,7 @@ from homeassistant.const import (
     EVENT_STATE_CHANGED,
     EVENT_TIME_CHANGED,
     EVENT_TIMER_OUT_OF_SYNC,
+    MATCH_ALL,
     __version__,
 )
 import homeassistant.core as ha
@@ -1169,6 +1170,205 @@ async def test_service_call_event_contains_original_data(hass):
     assert calls[0].context is context
 
 
+async def test_service_call_reuses_validated_data(hass):
+    """Test that identical service data is only validated once."""
+    validated = []
+
+    def validate(value):
+        validated.append(value)
+        return {"entity_id": [value["entity_id"]], "level": int(value["level"])}
+
+    calls = []
+    hass.services.async_register(
+        "test", "service", calls.append, validate, cache_schema=True
+    )
+
+    for _ in range(3):
+        await hass.services.async_call(
+            "test", "service", {"entity_id": "light.a", "level": "5"}, blocking=True
+        )
+
+    assert len(validated) == 1
+    assert len(calls) == 3
+    assert all(call.data == {"entity_id": ["light.a"], "level": 5} for call in calls)
+    # Each call receives its own copy of the validated data
+    assert calls[0].data["entity_id"] is not calls[1].data["entity_id"]
+
+    # Values that only compare equal are validated separately
+    await hass.services.async_call(
+        "test", "service", {"entity_id": "light.a", "level": 5}, blocking=True
+    )
+    assert len(validated) == 2
+
+    # Invalid data is never cached
+    with pytest.raises(KeyError):
+        await hass.services.async_call("test", "service", {"level": 5}, blocking=True)
+    with pytest.raises(KeyError):
+        await hass.services.async_call("test", "service", {"level": 5}, blocking=True)
+    assert len(validated) == 4
+
+
+async def test_service_call_validates_without_cache_schema(hass):
+    """Test that service data is validated on every call by default."""
+    validated = []
+
+    def validate(value):
+        validated.append(value)
+        return value
+
+    async_mock_service(hass, "test", "service", validate)
+
+    for _ in range(2):
+        await hass.services.async_call("test", "service", {"value": 1}, blocking=True)
+
+    assert len(validated) == 2
+
+
+async def test_service_call_does_not_cache_unsafe_data(hass):
+    """Test that payloads or results with arbitrary objects are not cached."""
+    validated = []
+    marker = object()
+
+    def validate(value):
+        validated.append(value)
+        return {"value": marker}
+
+    hass.services.async_register(
+        "test", "service", lambda call: None, validate, cache_schema=True
+    )
+
+    for _ in range(2):
+        await hass.services.async_call("test", "service", {"value": 1}, blocking=True)
+        await hass.services.async_call(
+            "test", "service", {"value": {1, 2}}, blocking=True
+        )
+
+    assert len(validated) == 4
+
+
+async def test_state_machine_async_set_many(hass):
+    """Test setting multiple states fires events after all states are set."""
+    seen = []
+
+    @ha.callback
+    def listener(event):
+        seen.append(
+            (
+                event.data["entity_id"],
+                hass.states.get("light.a") is not None,
+                hass.states.get("light.b") is not None,
+            )
+        )
+
+    batches = []
+    hass.bus.async_listen(EVENT_STATE_CHANGED, listener)
+    hass.bus.async_listen_batch(EVENT_STATE_CHANGED, batches.append)
+    context = ha.Context()
+
+    hass.states.async_set_many(
+        [("light.a", "on", None), ("light.b", "off", {"brightness": 10})],
+        context=context,
+    )
+    await hass.async_block_till_done()
+
+    assert hass.states.get("light.b").attributes == {"brightness": 10}
+    assert seen == [("light.a", True, True), ("light.b", True, True)]
+    assert len(batches) == 1
+    assert [event.data["entity_id"] for event in batches[0]] == ["light.a", "light.b"]
+    assert batches[0][0].time_fired == batches[0][1].time_fired
+    assert all(event.context is context for event in batches[0])
+
+    # Unchanged states do not fire events
+    hass.states.async_set_many([("light.a", "on", None)])
+    await hass.async_block_till_done()
+    assert len(seen) == 2
+    assert len(batches) == 1
+
+
+async def test_state_machine_nested_batch(hass):
+    """Test nested batches are fired when the outermost batch exits."""
+    batches = []
+    hass.bus.async_listen_batch(MATCH_ALL, batches.append)
+
+    with patch.object(
+        hass.bus, "async_fire_batch", wraps=hass.bus.async_fire_batch
+    ) as mock_fire_batch:
+        with hass.states.async_batch():
+            hass.states.async_set("light.a", "on")
+            with hass.states.async_batch():
+                hass.states.async_set("light.b", "on")
+                hass.states.async_remove("light.a")
+            assert not mock_fire_batch.called
+
+        assert mock_fire_batch.call_count == 1
+
+    await hass.async_block_till_done()
+    assert len(batches) == 1
+    assert [
+        (event.data["entity_id"], event.data["new_state"] is None)
+        for event in batches[0]
+    ] == [("light.a", False), ("light.b", False), ("light.a", True)]
+
+    # Single events are passed to batch listeners as a list of one
+    hass.bus.async_fire("test_event")
+    await hass.async_block_till_done()
+    assert len(batches) == 2
+    assert batches[1][0].event_type == "test_event"
+
+
+async def test_state_machine_batch_other_task(hass, caplog):
+    """Test state changes of other tasks are not swallowed by an open batch."""
+    events = []
+    hass.bus.async_listen(EVENT_STATE_CHANGED, events.append)
+
+    async def set_state():
+        """Change a state from another task."""
+        hass.states.async_set("light.b", "on")
+
+    with hass.states.async_batch():
+        hass.states.async_set("light.a", "on")
+        # Awaiting inside a batch breaks its contract
+        await hass.async_create_task(set_state())
+
+    await hass.async_block_till_done()
+    assert [event.data["entity_id"] for event in events] == ["light.b", "light.a"]
+    assert (
+        "State of light.b changed while a state change batch of another task is open"
+        in caplog.text
+    )
+
+
+async def test_state_machine_generation(hass):
+    """Test the generation increases with every state change."""
+    generation = hass.states.generation
+
+    hass.states.async_set("light.a", "on")
+    assert hass.states.generation == generation + 1
+
+    hass.states.async_set("light.a", "on")
+    assert hass.states.generation == generation + 1
+
+    hass.states.async_set_many([("light.a", "off", None), ("light.b", "on", None)])
+    assert hass.states.generation == generation + 3
+
+    hass.states.async_remove("light.a")
+    assert hass.states.generation == generation + 4
+
+
+async def test_remove_batch_listener(hass):
+    """Test removing a batch listener."""
+    batches = []
+    unsub = hass.bus.async_listen_batch("test_event", batches.append)
+    assert hass.bus.async_listeners()["test_event"] == 1
+
+    unsub()
+    assert "test_event" not in hass.bus.async_listeners()
+
+    hass.bus.async_fire_batch("test_event", [({}, None), ({}, None)])
+    await hass.async_block_till_done()
+    assert batches == []
+
+
 def test_context():
     """Test context init."""
     c = ha.Context()